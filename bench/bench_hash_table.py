@@ -0,0 +1,50 @@
+# Insert/lookup throughput for both HashTable backends.
+# Run from the repo root:  python -m bench.bench_hash_table [n ...]   (default: 1k 100k 1M)
+import random
+import sys
+import time
+
+from core.hash_table import HashTable, OpenAddressingHashTable
+from core.models import Package
+
+
+def _rate(n, seconds):
+    return f"{n / seconds / 1e6:6.2f} M ops/s" if seconds else "     inf"
+
+
+_DEADLINES = ["EOD", "EOD", "9:00 AM", "10:30 AM", "12:00 PM", "2:15 PM", "4:45 PM"]
+
+
+def bench(n: int) -> None:
+    # mixed deadlines so the deadline index sees many keys, not one "EOD" bucket
+    pkgs = [Package(i, "1 Main St", random.choice(_DEADLINES), "Salt Lake City", "84101", 1) for i in range(1, n + 1)]
+    probe = [random.randrange(1, 2 * n) for _ in range(n)]  # ~50% hits
+    for cls in (HashTable, OpenAddressingHashTable):
+        t = cls(64)  # start small: growth is part of what we measure
+        t0 = time.perf_counter()
+        for p in pkgs:
+            t.bulk_insert((p,))
+        t_ins = time.perf_counter() - t0
+
+        t0 = time.perf_counter()
+        lookup = t.lookup
+        for pid in probe:
+            lookup(pid)
+        t_get = time.perf_counter() - t0
+
+        t0 = time.perf_counter()
+        t.lookup_many(probe)
+        t_many = time.perf_counter() - t0
+
+        print(f"{n:>9,} {cls.__name__:<24} insert {_rate(n, t_ins)}  lookup {_rate(n, t_get)}  "
+              f"lookup_many {_rate(n, t_many)}  load={t.load_factor:.2f}")
+
+
+def main(sizes):
+    random.seed(0)
+    for n in sizes:
+        bench(n)
+
+
+if __name__ == "__main__":
+    main([int(a) for a in sys.argv[1:]] or [1_000, 100_000, 1_000_000])
@@ -0,0 +1,53 @@
+# Exact Held-Karp ordering vs. the heuristic planner (greedy NN + local search) per
+# trip size: latency of each and how many miles the exact order saves.
+# Run from the repo root:  python -m bench.bench_held_karp [max_stops] [instances]   (default: 12 30)
+import random
+import sys
+import time
+
+from config import DISTANCE_CSV, DISTANCE_CACHE, HUB_ADDRESS, SPEED_MPH
+from data.distance_service import DistanceService
+from routing.planner import _construct_greedy, _evaluate, _held_karp, _improve_order
+
+_DEADLINES = [540, 540, 540, 150, 240]   # minutes after 08:00: mostly EOD, some 10:30 / 12:00
+
+
+def bench(ds, n: int, instances: int) -> None:
+    hub = ds.index_of(HUB_ADDRESS)
+    t_heur = t_exact = 0.0
+    saved = []
+    for _ in range(instances):
+        locs = random.sample(range(1, len(ds.addresses)), n)
+        dls = [random.choice(_DEADLINES) for _ in range(n)]
+        fixes = [None] * n
+        windows = (dls, fixes, 0, SPEED_MPH)
+
+        t0 = time.perf_counter()
+        heur = _improve_order(ds, hub, locs, _construct_greedy(ds, hub, locs, dls, n), windows=windows)
+        t1 = time.perf_counter()
+        exact = _held_karp(ds, hub, locs, heur, dls, fixes, 0, SPEED_MPH)
+        t2 = time.perf_counter()
+        t_heur += t1 - t0
+        t_exact += t2 - t1
+
+        h = _evaluate(ds, hub, locs, dls, fixes, heur, 0, SPEED_MPH)
+        if exact is not None:
+            e = _evaluate(ds, hub, locs, dls, fixes, exact, 0, SPEED_MPH)
+            if e[0] <= h[0]:
+                saved.append(100.0 * (h[1] - e[1]) / h[1] if h[1] else 0.0)
+    avg = sum(saved) / len(saved) if saved else 0.0
+    print(f"{n:>3} stops  heuristic {t_heur / instances * 1e3:8.2f} ms  held-karp {t_exact / instances * 1e3:8.2f} ms  "
+          f"miles saved avg {avg:5.2f}%  max {max(saved, default=0.0):5.2f}%  ({len(saved)}/{instances} on time)")
+
+
+def main(max_stops: int, instances: int) -> None:
+    random.seed(0)
+    ds = DistanceService()
+    ds.load_cached(str(DISTANCE_CSV), str(DISTANCE_CACHE))
+    for n in range(4, max_stops + 1):
+        bench(ds, n, instances)
+
+
+if __name__ == "__main__":
+    args = [int(a) for a in sys.argv[1:]]
+    main(args[0] if args else 12, args[1] if len(args) > 1 else 30)
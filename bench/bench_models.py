@@ -0,0 +1,61 @@
+# Memory benchmark: slotted Package vs. the old __dict__ record vs. PackageBatch columns.
+# Run from the repo root:  python -m bench.bench_models [n_packages]
+import sys
+import tracemalloc
+
+from core.models import Package, PackageBatch
+
+CITIES = ["Salt Lake City", "West Valley City", "Millcreek", "Holladay", "Murray"]
+DEADLINES = ["EOD", "10:30 AM", "9:00 AM"]
+
+
+class _DictPackage:
+    """The pre-slots record layout (per-instance __dict__, string weight/city/zip)."""
+    def __init__(self, package_id, address, deadline, city, zip_code, weight):
+        self.package_id = int(package_id)
+        self.address = address
+        self.city = city
+        self.state = "UT"
+        self.zip_code = zip_code
+        self.deadline = deadline
+        self.weight = weight
+        self.status = "at_hub"
+        self.delivery_time = None
+        self.special_notes = ""
+        self.truck_id = None
+        self.board_time_min = None
+        self.available_time_min = None
+        self.address_fix_time_min = None
+        self.truck_restriction = None
+        self.group_id = None
+        self.location_idx = None
+
+
+def _rows(n):
+    # fresh strings per row, as a CSV reader would produce them
+    for i in range(n):
+        yield (i + 1, f"{100 + i % 900} S {i % 50} E", DEADLINES[i % 3],
+               "".join(CITIES[i % 5]), str(84100 + i % 30), str(1 + i % 90))
+
+
+def _measure(build):
+    tracemalloc.start()
+    obj = build()
+    size, _peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return size, obj
+
+
+def main(n: int = 100_000):
+    dict_bytes, _ = _measure(lambda: [_DictPackage(*r) for r in _rows(n)])
+    slot_bytes, pkgs = _measure(lambda: [Package(pid, a, d, c, z, w, location_idx=pid % 27)
+                                         for pid, a, d, c, z, w in _rows(n)])
+    batch_bytes, _ = _measure(lambda: PackageBatch.from_packages(pkgs))
+
+    print(f"{n:,} packages")
+    for label, b in (("dict Package", dict_bytes), ("slotted Package", slot_bytes), ("PackageBatch", batch_bytes)):
+        print(f"  {label:<16} {b / 1e6:8.1f} MB  {b / n:7.1f} B/pkg")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 100_000)
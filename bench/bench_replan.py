@@ -0,0 +1,56 @@
+# Dispatcher.apply_event latency vs. a full re-plan on a synthetic day.
+# Run from the repo root:  python -m bench.bench_replan [n_packages ...]   (default: 500)
+import random
+import sys
+import time
+
+from config import DISTANCE_CSV, DISTANCE_CACHE
+from core.models import Package
+from data.distance_service import DistanceService
+from routing.scheduler import Dispatcher
+
+_DEADLINES = ["EOD", "EOD", "EOD", "10:30 AM", "12:00 PM"]
+
+
+def _day(ds, n: int) -> list:
+    addrs = ds.addresses[1:]  # index 0 is the HUB
+    pkgs = [Package(i, random.choice(addrs), random.choice(_DEADLINES), "Salt Lake City", "84101", 2)
+            for i in range(1, n + 1)]
+    for p in pkgs:
+        ds.package_index(p)
+    return pkgs
+
+
+def bench(ds, n: int, events: int = 500) -> None:
+    pkgs = _day(ds, n)
+    d = Dispatcher(ds, pkgs, fleet=[1, 2, 3], drivers=3)
+    t0 = time.perf_counter()
+    d.run()
+    t_full = time.perf_counter() - t0
+
+    addrs = ds.addresses[1:]
+    times = []
+    for _ in range(events):
+        upd = {"package_id": random.randint(1, n), "address": random.choice(addrs)}
+        t0 = time.perf_counter()
+        try:
+            d.apply_event(upd, random.randint(0, 240))
+        except ValueError:  # already delivered / out for delivery
+            continue
+        times.append(time.perf_counter() - t0)
+    times.sort()
+    p = lambda q: times[min(len(times) - 1, int(q * len(times)))] * 1e3
+    print(f"{n:>6} pkgs  full plan {t_full * 1e3:8.1f} ms  apply_event ({len(times)} applied) "
+          f"p50 {p(0.5):.3f} ms  p90 {p(0.9):.3f} ms  max {times[-1] * 1e3:.3f} ms")
+
+
+def main(sizes):
+    random.seed(0)
+    ds = DistanceService()
+    ds.load_cached(str(DISTANCE_CSV), str(DISTANCE_CACHE))
+    for n in sizes:
+        bench(ds, n)
+
+
+if __name__ == "__main__":
+    main([int(a) for a in sys.argv[1:]] or [500])
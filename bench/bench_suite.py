@@ -0,0 +1,157 @@
+# Scaling benchmark over generated workloads: per-stage time and peak memory, plus
+# total miles / late count, written to JSON so versions can be compared.
+# Run from the repo root:
+#   python -m bench.bench_suite [--sizes 100x500 1000x2000 ...] [--seed N] [--out FILE] [--compare OLD.json]
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+from bench.generate import generate
+from config import SNAPSHOTS
+from core.hash_table import HashTable
+from data.distance_service import DistanceService
+from main import DeliveryOptimizer, _apply_constraints
+from reporting.status import snapshot_at
+from routing.planner import improve_route, plan_route_for_truck
+from routing.scheduler import run_full_plan
+from routing.simulate import simulate_batch
+
+DEFAULT_SIZES = ["100x500", "1000x2000"]
+
+
+class _Stages:
+    """Times each `with stages(name):` block and records its tracemalloc peak."""
+
+    def __init__(self, memory: bool):
+        self.memory = memory
+        self.results = {}
+
+    @contextlib.contextmanager
+    def __call__(self, name: str):
+        if self.memory:
+            tracemalloc.reset_peak()
+            base = tracemalloc.get_traced_memory()[0]
+        t0 = time.perf_counter()
+        yield
+        row = {"seconds": round(time.perf_counter() - t0, 6)}
+        if self.memory:
+            row["peak_kb"] = round((tracemalloc.get_traced_memory()[1] - base) / 1024, 1)
+        self.results[name] = row
+
+
+def run_case(n_locations: int, n_packages: int, seed: int, memory: bool) -> dict:
+    stage = _Stages(memory)
+    with tempfile.TemporaryDirectory() as tmp:
+        with stage("generate"):
+            dist_csv, pkg_csv = generate(tmp, n_locations, n_packages, seed)
+
+        ds = DistanceService()
+        with stage("load_distances"):
+            ds.load_distance_data(dist_csv)
+
+        ht = HashTable()
+        with stage("load_packages"), contextlib.redirect_stdout(io.StringIO()):
+            DeliveryOptimizer(ht, ds).load_packages_from_file(pkg_csv)
+        packages = list(ht)
+
+        with stage("constraints"), contextlib.redirect_stdout(io.StringIO()):
+            _apply_constraints(packages)
+
+        with stage("hash_lookup"):
+            ht.lookup_many(range(1, n_packages + 1))
+
+        with stage("plan_trip"):
+            trip = plan_route_for_truck(ds, packages, truck_id=1, depart_time_min=0)
+
+        with stage("local_search"):
+            improve_route(ds, trip)
+
+        with stage("full_plan"):
+            result = run_full_plan(ds, packages, hash_table=ht)
+
+        routes = [[ds.package_index(ht.lookup(pid)) for pid in t["packages"]] for t in result["trips"]]
+        with stage("simulate_batch"):   # re-time every planned route (what-if evaluation path)
+            simulate_batch(ds, routes * 100, 0)
+
+        with stage("status_at"):
+            for ts in SNAPSHOTS:
+                snapshot_at(ts, ht, result)
+
+    return {
+        "locations": n_locations,
+        "packages": n_packages,
+        "seed": seed,
+        "stages": stage.results,
+        "total_miles": round(result["total_miles"], 1),
+        "late": sum(1 for p in packages if p.delivery_min is not None and p.delivery_min > p.deadline_min),
+        "delivered": result["delivered"],
+        "trips": len(result["trips"]),
+    }
+
+
+def _revision():
+    try:
+        out = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True,
+                             cwd=os.path.dirname(os.path.abspath(__file__)))
+        return out.stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def _compare(old: dict, new: dict) -> None:
+    key = lambda c: (c["locations"], c["packages"], c["seed"])
+    prev = {key(c): c for c in old.get("cases", [])}
+    for c in new["cases"]:
+        o = prev.get(key(c))
+        if o is None:
+            continue
+        print(f"\n{c['locations']}x{c['packages']}: {old.get('revision')} -> {new.get('revision')}")
+        for name, row in c["stages"].items():
+            before = o["stages"].get(name)
+            if before and before["seconds"]:
+                print(f"  {name:<15} {before['seconds']:9.4f}s -> {row['seconds']:9.4f}s "
+                      f"({row['seconds'] / before['seconds']:5.2f}x)")
+        print(f"  miles {o['total_miles']} -> {c['total_miles']}   late {o['late']} -> {c['late']}")
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Scaling benchmark over generated workloads")
+    ap.add_argument("--sizes", nargs="+", default=DEFAULT_SIZES, help="LOCATIONSxPACKAGES")
+    ap.add_argument("--seed", type=int, default=0)
+    ap.add_argument("--out", default="bench_results.json")
+    ap.add_argument("--compare", help="earlier results JSON to diff against")
+    ap.add_argument("--no-memory", action="store_true",
+                    help="skip tracemalloc: no peak_kb, but stage times without tracing overhead")
+    a = ap.parse_args()
+
+    memory = not a.no_memory
+    if memory:
+        tracemalloc.start()
+    cases = []
+    for size in a.sizes:
+        n_loc, n_pkg = (int(x) for x in size.lower().split("x"))
+        case = run_case(n_loc, n_pkg, a.seed, memory)
+        cases.append(case)
+        stages = "  ".join(f"{k} {v['seconds']:.3f}s" for k, v in case["stages"].items())
+        print(f"{n_loc:>6} loc {n_pkg:>7} pkg  miles {case['total_miles']:9.1f}  late {case['late']:6d}  {stages}")
+
+    out = {"revision": _revision(), "python": platform.python_version(), "timestamp": time.time(),
+           "memory": memory, "cases": cases}
+    with open(a.out, "w", encoding="utf-8") as f:
+        json.dump(out, f, indent=2)
+    print(f"Wrote {a.out}")
+    if a.compare:
+        with open(a.compare, encoding="utf-8") as f:
+            _compare(json.load(f), out)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,130 @@
+# Seeded synthetic workloads in the bundled CSV formats (distance_table.csv / package_file.csv).
+# Run from the repo root:
+#   python -m bench.generate OUT_DIR [--locations N] [--packages N] [--seed N] [--gzip]
+import argparse
+import csv
+import gzip
+import math
+import os
+import random
+
+HUB_CELL = "Western Governors University\n4001 South 700 East, \nSalt Lake City, UT 84107"
+CITIES = [("Salt Lake City", "84101"), ("West Valley City", "84119"), ("Millcreek", "84106"),
+          ("Holladay", "84117"), ("Murray", "84107"), ("Taylorsville", "84123")]
+STREETS = ["S State St", "W 500 S", "E 900 S", "S 700 E", "W North Temple", "S Main St", "Highland Dr",
+           "W 2100 S", "S Redwood Rd", "E 3300 S", "S 1300 E", "W 4500 S"]
+
+DEADLINE_MIX = {"EOD": 0.65, "12:00 PM": 0.1, "10:30 AM": 0.2, "9:00 AM": 0.05}
+# fraction of packages carrying each special note
+NOTE_MIX = {"truck": 0.05, "delayed": 0.05, "wrong_address": 0.01, "group": 0.03}
+
+
+def _open(path: str, gz: bool):
+    if gz:
+        return gzip.open(path + ".gz", "wt", newline="", encoding="utf-8")
+    return open(path, "w", newline="", encoding="utf-8")
+
+
+def location_streets(n_locations: int) -> list:
+    """Street address of each location (index 0 is the HUB); unique house numbers."""
+    rng = random.Random(0)
+    return ["4001 South 700 East"] + [f"{100 + i} {rng.choice(STREETS)}" for i in range(1, n_locations)]
+
+
+def write_distance_table(path: str, n_locations: int, seed: int = 0, gz: bool = False,
+                         radius_mi: float = 12.0) -> list:
+    """
+    Random locations in a disc around the HUB; distance = straight line x 1.3 (street
+    detour), rounded to 0.1 mi like the bundled table. Rows are written as they are
+    produced (lower triangle only), so memory stays O(locations). Returns the streets.
+    """
+    rng = random.Random(seed)
+    pts = [(0.0, 0.0)]
+    for _ in range(1, n_locations):
+        r = radius_mi * math.sqrt(rng.random())
+        a = rng.random() * 2 * math.pi
+        pts.append((r * math.cos(a), r * math.sin(a)))
+    streets = location_streets(n_locations)
+    names = [HUB_CELL] + [f"Site {i}\n {streets[i]}" for i in range(1, n_locations)]
+
+    with _open(path, gz) as f:
+        w = csv.writer(f)
+        w.writerow(["DISTANCE BETWEEN HUBS IN MILES", ""] + names)
+        for i, (xi, yi) in enumerate(pts):
+            label = " HUB" if i == 0 else f" {streets[i]}\n({CITIES[i % len(CITIES)][1]})"
+            row = [names[i], label]
+            for xj, yj in pts[:i + 1]:
+                row.append(f"{1.3 * math.hypot(xi - xj, yi - yj):.1f}")
+            w.writerow(row + [""] * (n_locations - i - 1))
+    return streets
+
+
+def _pick(rng, mix: dict) -> str:
+    x, acc = rng.random(), 0.0
+    for k, p in mix.items():
+        acc += p
+        if x < acc:
+            return k
+    return next(iter(mix))
+
+
+def write_manifest(path: str, streets: list, n_packages: int, seed: int = 0, gz: bool = False,
+                   deadline_mix: dict | None = None, note_mix: dict | None = None) -> None:
+    """Package manifest with the bundled header, deadline mix and special-note constraints."""
+    rng = random.Random(seed)
+    deadline_mix = deadline_mix or DEADLINE_MIX
+    note_mix = note_mix or NOTE_MIX
+    groups_left = 0
+    group_ids = []
+
+    with _open(path, gz) as f:
+        w = csv.writer(f)
+        w.writerow(["Package\nID", "Address", "City ", "State", "Zip", "Delivery\nDeadline", "Weight\nKILO",
+                    "page 1 of 1PageSpecial Notes"])
+        for pid in range(1, n_packages + 1):
+            loc = rng.randrange(1, len(streets))
+            city, zip_code = CITIES[loc % len(CITIES)]
+            deadline = _pick(rng, deadline_mix)
+            note = ""
+            if groups_left:                    # next member of an open group
+                note = "Must be delivered with " + ", ".join(str(g) for g in group_ids)
+                group_ids.append(pid)
+                groups_left -= 1
+            else:
+                x = rng.random()
+                if x < note_mix["truck"]:
+                    note = "Can only be on truck 2"
+                elif x < note_mix["truck"] + note_mix["delayed"]:
+                    note = "Delayed on flight---will not arrive to depot until 9:05 am"
+                elif x < note_mix["truck"] + note_mix["delayed"] + note_mix["wrong_address"]:
+                    note = "Wrong address listed"
+                elif x < sum(note_mix.values()) and pid + 2 <= n_packages:
+                    group_ids, groups_left = [pid], 2   # this one plus the next two
+            w.writerow([pid, streets[loc], city, "UT", zip_code, deadline, rng.randint(1, 90), note])
+
+
+def generate(out_dir: str, n_locations: int, n_packages: int, seed: int = 0, gz: bool = False) -> tuple:
+    """Write distance_table.csv and package_file.csv (+ .gz) into out_dir; return their paths."""
+    os.makedirs(out_dir, exist_ok=True)
+    dist = os.path.join(out_dir, "distance_table.csv")
+    pkgs = os.path.join(out_dir, "package_file.csv")
+    streets = write_distance_table(dist, n_locations, seed, gz)
+    write_manifest(pkgs, streets, n_packages, seed, gz)
+    suffix = ".gz" if gz else ""
+    return dist + suffix, pkgs + suffix
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__)
+    ap.add_argument("out_dir")
+    ap.add_argument("--locations", type=int, default=100)
+    ap.add_argument("--packages", type=int, default=500)
+    ap.add_argument("--seed", type=int, default=0)
+    ap.add_argument("--gzip", action="store_true")
+    a = ap.parse_args()
+    for p in generate(a.out_dir, a.locations, a.packages, a.seed, a.gzip):
+        print(p)
+
+
+if __name__ == "__main__":
+    main()
@@ -4,17 +4,48 @@ from pathlib import Path
 DATA_DIR      = Path(__file__).parent
 DISTANCE_CSV  = DATA_DIR / "distance_table.csv"
 PACKAGE_CSV   = DATA_DIR / "package_file.csv"
+DISTANCE_CACHE = DATA_DIR / "distance_table.dmx"   # binary matrix cache, rebuilt when the CSV changes
+LOAD_BATCH_SIZE = 4096    # package records per HashTable.bulk_insert while streaming a manifest
 
 # Vehicle / capacity
 SPEED_MPH       = 18.0
 TRUCK_CAPACITY  = 16
 HUB_ADDRESS     = "Western Governors University"
+MAX_TOTAL_MILES = 140     # day mileage budget (main); a trip whose lower bound exceeds what is left is rejected
+
+# Fleet / dispatch (routing.scheduler.Dispatcher)
+FLEET        = [1, 2, 3]   # truck ids
+NUM_DRIVERS  = 2           # concurrent drivers (at most len(FLEET))
+
+# Route improvement (2-opt + Or-opt local search, see routing.planner.improve_route)
+IMPROVE_NEIGHBORS     = 8      # candidate moves per stop: its k nearest stops
+IMPROVE_TIME_BUDGET_S = None   # wall-clock cap per route in seconds (None = to local optimum)
+IMPROVE_MAX_ITERS     = None   # cap on applied moves per route (None = unlimited)
+IMPROVE_GAP_TARGET    = None   # stop once (miles - lower bound) / miles <= this (None = off)
+
+# Trip planner (routing.planner.plan_route_for_truck)
+PLANNER_MODE  = "greedy"   # "greedy" | "grasp" | "insertion"
+GRASP_STARTS  = 8          # randomized constructions per trip (start 0 is the plain greedy)
+GRASP_WORKERS = 1          # processes for the starts (1 = in-process)
+GRASP_ALPHA   = 0.3        # RCL width: d <= d_min + alpha * (d_max - d_min)
+GRASP_SEED    = 0          # base seed; same seed -> same plan
+INSERTION_POOL = 64        # insertion mode: most urgent candidates considered per trip (0 = all)
+HELD_KARP_MAX_STOPS = 8    # trips with at most this many stops get the exact Held-Karp order (0 = off);
+                           # ~5 ms at 8 stops, ~20 ms at 10, ~85 ms at 12 (bench/bench_held_karp.py)
+HELD_KARP_RETURN    = False  # Held-Karp objective includes the drive back to the HUB; off because trip
+                             # and day miles (simulate_route, the budget, bounds) end at the last stop
+
+# Partitioning pre-pass (routing.partition): one capacity-sized cluster per trip
+PARTITION           = False  # cluster at-hub packages before dispatching
+PARTITION_WORKERS   = 1      # processes over (truck mask, release) classes
+PARTITION_MAX_ITERS = 10     # k-medoids assign/update rounds per class
 
 # Constraint times (minutes after 08:00)
 ARRIVAL_905_MIN   = 65    # 9:05 AM
-ADDR_FIX_1020_MIN = 140   # 10:20 AM
+ADDR_FIX_1020_MIN = 140   # 10:20 AM (also when "Wrong address" notes get their fix)
 
-# Constraint sets
+# Constraint sets: main derives constraints from special notes; these ID sets are the
+# defaults for routing.constraints.apply_constraints (what-if scenario overrides)
 ONLY_TRUCK2   = {3, 18, 36, 38}
 DELAYED_905   = {6, 25, 28, 32}
 ADDR_FIX_1020 = {9}
@@ -24,3 +55,6 @@ SNAPSHOTS = ["08:55", "10:05", "12:45"]
 
 # Default logging
 DEBUG = False
+
+# Run metrics (core.metrics): counters and phase timers on result["metrics"]
+METRICS = False
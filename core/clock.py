@@ -0,0 +1,40 @@
+import re
+
+# All times are integer minutes after the 08:00 day start.
+_CLOCK_RE = re.compile(r"^\s*(\d{1,2}):(\d{2})\s*(AM|PM)?\s*$")
+
+def minutes_to_str(m: int) -> str:
+    total = 8 * 60 + int(m)
+    h = total // 60; mi = total % 60
+    return f"{h:02d}:{mi:02d}"
+
+def clock_to_min(s: str) -> int:
+    """'HH:MM' / 'H:MM AM|PM' -> minutes since 08:00 (clamped at 0). Raises on bad input."""
+    s = (s or "").strip().upper()
+    m = _CLOCK_RE.match(s)
+    if not m:
+        raise ValueError(f"Bad time format: {s!r}")
+    h = int(m.group(1)); mi = int(m.group(2)); ap = m.group(3)
+    if mi > 59 or h > (12 if ap else 23) or (ap and h == 0):
+        raise ValueError(f"Bad time format: {s!r}")
+    if ap == "PM" and h != 12: h += 12
+    if ap == "AM" and h == 12: h = 0
+    return max(0, (h * 60 + mi) - (8 * 60))
+
+def deadline_to_min(deadline: str) -> int:
+    """Deadline column value -> minutes since 08:00; 'EOD'/blank/unparseable mean 17:00."""
+    s = (deadline or "").strip().upper()
+    if s in {"", "EOD"}:
+        hh, mm = 17, 0
+    else:
+        m = _CLOCK_RE.match(s)
+        if m:
+            hh = int(m.group(1)); mm = int(m.group(2)); ap = m.group(3)
+            if ap == "PM" and hh != 12: hh += 12
+            if ap == "AM" and hh == 12: hh = 0
+        else:
+            try:
+                hh = int(s); mm = 0
+            except ValueError:
+                hh, mm = 17, 0
+    return max(0, (hh * 60 + mm) - (8 * 60))
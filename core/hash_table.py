@@ -1,4 +1,6 @@
-from core.models import Package
+import sys
+from bisect import bisect_right, insort
+from core.models import Package, parse_weight
 
 
 class HashTable:
@@ -7,15 +9,39 @@ class HashTable:
     - insert(id, address, deadline, city, zip_code, weight, status) -> stores/updates a Package
     - lookup(id) -> returns the Package (or None)
     - get_all_packages() -> iterable of all Package objects
+    - bulk_insert(records) / lookup_many(ids) -> batched forms of the above
+    Grows (x2) when count/capacity exceeds max_load and shrinks (/2) below min_load,
+    so operations stay O(1) amortized at any volume. Rehashing moves the existing
+    Package objects; nothing is re-allocated.
+
+    Secondary indexes (status -> ids, truck_id -> ids, deadline order) are kept
+    current on insert/remove and whenever an owned Package's status, truck_id or
+    deadline is assigned, so "what is at the hub" / "what is on truck 2" need no scan.
     """
-    def __init__(self, capacity: int = 64):
-        # capacity should be >= number of packages; power-of-two is fine
-        if capacity < 8:
-            capacity = 8
-        self._buckets = [[] for _ in range(capacity)]
+    MAX_LOAD = 1.0
+    MIN_LOAD = 0.25
+    MIN_CAPACITY = 8
+
+    def __init__(self, capacity: int = 64, max_load: float | None = None, min_load: float | None = None):
+        # capacity is only the starting size now; the table resizes itself
+        self._max_load = self.MAX_LOAD if max_load is None else max_load
+        self._min_load = self.MIN_LOAD if min_load is None else min_load
         self._count = 0
+        self._init_storage(self._round_capacity(capacity))
+
+        # Secondary indexes
+        self._by_status: dict[str, set[int]] = {}
+        self._by_truck: dict[int, set[int]] = {}
+        self._by_deadline: dict[int, set[int]] = {}     # deadline_min -> ids
+        self._deadlines: list[int] = []                 # sorted distinct deadline_min keys
+
+    # ---------------- storage (chaining) ----------------
+    def _init_storage(self, capacity: int) -> None:
+        self._buckets = [[] for _ in range(capacity)]
+
+    def _capacity(self) -> int:
+        return len(self._buckets)
 
-    # ---------------- internals ----------------
     def _hash(self, key: int) -> int:
         # key is package_id (int). Simple modulo hashing.
         return int(key) % len(self._buckets)
@@ -27,62 +53,284 @@ class HashTable:
                 return i, pkg
         return -1, None
 
+    def _get(self, package_id: int):
+        _, pkg = self._find_slot(self._buckets[self._hash(package_id)], package_id)
+        return pkg
+
+    def _add(self, pkg: Package) -> None:
+        # caller guarantees the key is not present
+        self._buckets[self._hash(pkg.package_id)].append(pkg)
+
+    def _discard(self, package_id: int):
+        bucket = self._buckets[self._hash(package_id)]
+        pos, pkg = self._find_slot(bucket, package_id)
+        if pkg is not None:
+            bucket[pos] = bucket[-1]
+            bucket.pop()
+        return pkg
+
+    def _iter_packages(self):
+        for bucket in self._buckets:
+            yield from bucket
+
+    # ---------------- sizing ----------------
+    def _round_capacity(self, capacity: int) -> int:
+        c = self.MIN_CAPACITY
+        while c < capacity:
+            c *= 2
+        return c
+
+    def _rehash(self, capacity: int) -> None:
+        pkgs = list(self._iter_packages())
+        self._init_storage(capacity)
+        for pkg in pkgs:
+            self._add(pkg)
+
+    def _grow_for(self, count: int) -> None:
+        cap = self._capacity()
+        if count > cap * self._max_load:
+            while count > cap * self._max_load:
+                cap *= 2
+            self._rehash(cap)
+
+    def _maybe_shrink(self) -> None:
+        cap = self._capacity()
+        if cap <= self.MIN_CAPACITY or self._count >= cap * self._min_load:
+            return
+        while cap > self.MIN_CAPACITY and self._count < cap * self._min_load:
+            cap //= 2
+        if cap != self._capacity():
+            self._rehash(cap)
+
+    def reserve(self, count: int) -> None:
+        """Pre-size for `count` packages so a bulk load rehashes at most once."""
+        self._grow_for(count)
+
+    @property
+    def load_factor(self) -> float:
+        return self._count / self._capacity()
+
+    # ---------------- secondary indexes ----------------
+    def _index_add(self, pkg: Package) -> None:
+        pkg._owner = self
+        pid = pkg.package_id
+        self._by_status.setdefault(pkg.status, set()).add(pid)
+        if pkg.truck_id is not None:
+            self._by_truck.setdefault(pkg.truck_id, set()).add(pid)
+        self._deadline_add(pkg.deadline_min, pid)
+
+    def _index_remove(self, pkg: Package) -> None:
+        pkg._owner = None
+        pid = pkg.package_id
+        self._by_status.get(pkg.status, set()).discard(pid)
+        if pkg.truck_id is not None:
+            self._by_truck.get(pkg.truck_id, set()).discard(pid)
+        self._deadline_discard(pkg.deadline_min, pid)
+
+    # deadline order is bucketed by minute: an add is O(1), plus an insort into the
+    # (short) key list the first time a minute is seen, so bulk loads stay linear
+    def _deadline_add(self, deadline_min: int, pid: int) -> None:
+        ids = self._by_deadline.get(deadline_min)
+        if ids is None:
+            ids = self._by_deadline[deadline_min] = set()
+            insort(self._deadlines, deadline_min)
+        ids.add(pid)
+
+    def _deadline_discard(self, deadline_min: int, pid: int) -> None:
+        ids = self._by_deadline.get(deadline_min)
+        if ids is None:
+            return
+        ids.discard(pid)
+        if not ids:
+            del self._by_deadline[deadline_min]
+            del self._deadlines[bisect_right(self._deadlines, deadline_min) - 1]
+
+    # Package setter callbacks (see Package.status / truck_id / deadline)
+    def _on_status(self, pkg: Package, old: str) -> None:
+        self._by_status.get(old, set()).discard(pkg.package_id)
+        self._by_status.setdefault(pkg.status, set()).add(pkg.package_id)
+
+    def _on_truck(self, pkg: Package, old) -> None:
+        if old is not None:
+            self._by_truck.get(old, set()).discard(pkg.package_id)
+        if pkg.truck_id is not None:
+            self._by_truck.setdefault(pkg.truck_id, set()).add(pkg.package_id)
+
+    def _on_deadline(self, pkg: Package, old) -> None:
+        if old is not None:
+            self._deadline_discard(old, pkg.package_id)
+        self._deadline_add(pkg.deadline_min, pkg.package_id)
+
+    # ---------------- indexed queries ----------------
+    def count_with_status(self, status: str) -> int:
+        return len(self._by_status.get(status, ()))
+
+    def ids_with_status(self, status: str) -> set:
+        return set(self._by_status.get(status, ()))
+
+    def packages_with_status(self, status: str) -> list:
+        """Packages in `status`, ordered by ID."""
+        return self.lookup_many(sorted(self._by_status.get(status, ())))
+
+    def packages_on_truck(self, truck_id: int) -> list:
+        """Packages assigned to `truck_id`, ordered by ID."""
+        return self.lookup_many(sorted(self._by_truck.get(truck_id, ())))
+
+    def by_deadline(self, status: str | None = None, due_by: int | None = None) -> list:
+        """Packages in deadline order (then ID), optionally only `status` and deadline_min <= due_by."""
+        keys = self._deadlines
+        end = len(keys) if due_by is None else bisect_right(keys, due_by)
+        ids = self._by_status.get(status, set()) if status is not None else None
+        get = self._get
+        return [get(pid) for d in keys[:end] for pid in sorted(self._by_deadline[d])
+                if ids is None or pid in ids]
+
+    def eligible_at_hub(self, t: int) -> list:
+        """At-hub packages already released (available / address fixed) at minute t, by ID."""
+        out = []
+        for p in self.packages_with_status("at_hub"):
+            if (p.available_time_min or 0) <= t and (p.address_fix_time_min or 0) <= t:
+                out.append(p)
+        return out
+
+    # ---------------- public API ----------------
     def insert(self, package_id: int, address: str, deadline: str, city: str,
                zip_code: str, weight: str, status: str = "at_hub",
-               state: str = "UT", special_notes: str = "") -> None:
+               state: str = "UT", special_notes: str = "",
+               location_idx: int | None = None) -> None:
         """
         Insert or update a package by ID. Stores all required fields:
         - address, deadline, city, zip_code, weight, and delivery status (+delivery time kept if set).
+        - location_idx: resolved distance-matrix index for address (None = resolve lazily; an
+          update keeps the stored index unless the address changed).
         """
-        idx = self._hash(package_id)
-        bucket = self._buckets[idx]
-        pos, existing = self._find_slot(bucket, package_id)
+        existing = self._get(package_id)
 
         if existing is None:
-            pkg = Package(package_id, address, deadline, city, zip_code, weight, status, state, special_notes)
-            bucket.append(pkg)
-            self._count += 1
+            pkg = Package(package_id, address, deadline, city, zip_code, weight, status, state, special_notes,
+                          location_idx)
+            self._insert_new(pkg)
         else:
             # Update fields in-place (keep delivery_time/truck_id if already set)
+            if location_idx is not None:
+                existing.location_idx = location_idx
+            elif address != existing.address:
+                existing.location_idx = None      # stale: re-resolved lazily
             existing.address = address
             existing.deadline = deadline
-            existing.city = city
-            existing.state = state
-            existing.zip_code = zip_code
-            existing.weight = weight
+            existing.city = sys.intern(city)
+            existing.state = sys.intern(state)
+            existing.zip_code = sys.intern(zip_code)
+            existing.weight = parse_weight(weight)
             existing.status = status
             existing.special_notes = special_notes
 
+    def _insert_new(self, pkg: Package) -> None:
+        self._grow_for(self._count + 1)
+        self._add(pkg)
+        self._count += 1
+        self._index_add(pkg)
+
+    def bulk_insert(self, records) -> int:
+        """
+        Insert many packages. Each record is a Package (stored as-is, replacing any
+        package with the same ID) or a dict of insert() keyword arguments.
+        Sized inputs pre-grow the table once. Returns the number of records processed.
+        """
+        if hasattr(records, "__len__"):
+            self.reserve(self._count + len(records))
+        n = 0
+        for r in records:
+            if isinstance(r, Package):
+                old = self._discard(r.package_id)
+                if old is not None:
+                    self._index_remove(old)
+                    self._count -= 1
+                self._insert_new(r)
+            else:
+                self.insert(**r)
+            n += 1
+        return n
+
     def lookup(self, package_id: int):
         """
         Return the Package for this ID, or None if not present.
         """
-        idx = self._hash(package_id)
-        bucket = self._buckets[idx]
-        _, pkg = self._find_slot(bucket, package_id)
+        return self._get(package_id)
+
+    def lookup_many(self, package_ids) -> list:
+        """Return [Package or None] for each ID, in order."""
+        get = self._get
+        return [get(pid) for pid in package_ids]
+
+    def remove(self, package_id: int):
+        """Remove and return the Package for this ID (None if absent); may shrink the table."""
+        pkg = self._discard(package_id)
+        if pkg is not None:
+            self._index_remove(pkg)
+            self._count -= 1
+            self._maybe_shrink()
         return pkg
 
-    def update_status(self, package_id: int, status: str, delivery_time: str | None = None, truck_id: int | None = None):
+    def update_status(self, package_id: int, status: str, delivery_time: str | None = None, truck_id: int | None = None,
+                      delivery_min: int | None = None):
         """
-        Convenience: set status and optional delivery_time/truck_id.
+        Convenience: set status and optional delivery time/truck_id.
+        delivery_min (minutes since 08:00) is canonical; delivery_time "HH:MM" is parsed if given instead.
         """
         pkg = self.lookup(package_id)
         if not pkg:
             return False
         pkg.status = status
-        if delivery_time is not None:
+        if delivery_min is not None:
+            pkg.delivery_min = delivery_min
+        elif delivery_time is not None:
             pkg.delivery_time = delivery_time
         if truck_id is not None:
             pkg.truck_id = truck_id
         return True
 
+    def bulk_update(self, package_ids, status: str | None = None, truck_id: int | None = None,
+                    delivery_mins=None) -> int:
+        """
+        Batched update_status: set status / truck_id (when given) and delivery_min
+        (delivery_mins is parallel to package_ids) on many packages. The status and
+        truck indexes are updated once per old value instead of once per package.
+        Unknown IDs are skipped; returns the number of packages updated.
+        """
+        pkgs = self.lookup_many(package_ids)
+        if delivery_mins is not None:
+            for pkg, m in zip(pkgs, delivery_mins):
+                if pkg is not None:
+                    pkg.delivery_min = m
+        pkgs = [p for p in pkgs if p is not None]
+
+        if status is not None:
+            moved: dict = {}   # old status -> ids
+            for pkg in pkgs:
+                if pkg._status != status:
+                    moved.setdefault(pkg._status, set()).add(pkg.package_id)
+                    pkg._status = status
+            for old, ids in moved.items():
+                self._by_status.get(old, set()).difference_update(ids)
+                self._by_status.setdefault(status, set()).update(ids)
+        if truck_id is not None:
+            moved = {}         # old truck -> ids
+            for pkg in pkgs:
+                if pkg._truck_id != truck_id:
+                    moved.setdefault(pkg._truck_id, set()).add(pkg.package_id)
+                    pkg._truck_id = truck_id
+            for old, ids in moved.items():
+                if old is not None:
+                    self._by_truck.get(old, set()).difference_update(ids)
+                self._by_truck.setdefault(truck_id, set()).update(ids)
+        return len(pkgs)
+
     def get_all_packages(self):
         """
         Return a generator over all Package objects (use list(...) if you need indexing).
         """
-        for bucket in self._buckets:
-            for pkg in bucket:
-                yield pkg
+        return self._iter_packages()
 
     # ---------------- optional helpers ----------------
     def __len__(self):
@@ -90,3 +338,64 @@ class HashTable:
 
     def __iter__(self):
         return self.get_all_packages()
+
+
+class OpenAddressingHashTable(HashTable):
+    """
+    Same API, stored as parallel key/value arrays with linear probing (no per-bucket
+    lists). Deletion uses backward-shift, so there are no tombstones.
+    """
+    MAX_LOAD = 0.7
+    MIN_LOAD = 0.2
+
+    def _init_storage(self, capacity: int) -> None:
+        self._keys = [None] * capacity
+        self._vals = [None] * capacity
+        self._mask = capacity - 1  # capacity is a power of two
+
+    def _capacity(self) -> int:
+        return len(self._keys)
+
+    def _probe(self, package_id: int) -> int:
+        # slot holding package_id, or the empty slot where it would go
+        keys, mask = self._keys, self._mask
+        i = hash(package_id) & mask
+        while True:
+            k = keys[i]
+            if k is None or k == package_id:
+                return i
+            i = (i + 1) & mask
+
+    def _get(self, package_id: int):
+        return self._vals[self._probe(package_id)]
+
+    def _add(self, pkg: Package) -> None:
+        i = self._probe(pkg.package_id)
+        self._keys[i] = pkg.package_id
+        self._vals[i] = pkg
+
+    def _discard(self, package_id: int):
+        keys, vals, mask = self._keys, self._vals, self._mask
+        i = self._probe(package_id)
+        pkg = vals[i]
+        if pkg is None:
+            return None
+        # backward-shift: pull later members of the probe run into the hole
+        j = i
+        while True:
+            j = (j + 1) & mask
+            k = keys[j]
+            if k is None:
+                break
+            home = hash(k) & mask
+            if (j > i and (home <= i or home > j)) or (j < i and home <= i and home > j):
+                keys[i], vals[i] = k, vals[j]
+                i = j
+        keys[i] = None
+        vals[i] = None
+        return pkg
+
+    def _iter_packages(self):
+        for v in self._vals:
+            if v is not None:
+                yield v
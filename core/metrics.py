@@ -0,0 +1,196 @@
+import cProfile
+import io
+import json
+import pstats
+import time
+import tracemalloc
+from collections import Counter, defaultdict
+from contextlib import contextmanager, nullcontext
+
+_NULL_CTX = nullcontext()
+
+
+class Metrics:
+    """
+    Run counters and phase timers (seconds), each kept as a day total and under the
+    trip scope that was open when it was recorded, so per-trip and per-truck
+    breakdowns come for free.
+      counters: distance_lookups, resolver_misses, dispatches, two_opt_tried/applied,
+                or_opt_tried/applied
+      timers:   load, resolve, construct, improve, simulate, report
+    instrument(ds) adds the DistanceService counters by wrapping that instance's
+    lookup methods, so a service that is never instrumented pays nothing.
+    """
+    enabled = True
+
+    def __init__(self):
+        self.counters: Counter = Counter()
+        self.timers: defaultdict = defaultdict(float)
+        self.trips: list = []          # one scope per dispatch attempt, in order
+        self.profile: list = []        # top cProfile rows, filled by capture()
+        self.memory_peak_kb = None     # tracemalloc peak, filled by capture()
+        self._scope = None
+
+    # ---- recording ----
+    def count(self, name: str, n: int = 1) -> None:
+        self.counters[name] += n
+        if self._scope is not None:
+            self._scope["counters"][name] += n
+
+    def add_time(self, name: str, seconds: float) -> None:
+        self.timers[name] += seconds
+        if self._scope is not None:
+            self._scope["timers"][name] += seconds
+
+    @contextmanager
+    def timer(self, name: str):
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add_time(name, time.perf_counter() - t0)
+
+    @contextmanager
+    def trip(self, truck: int, **info):
+        """Scope for one dispatch; the caller may set scope["trip"] to its trip index."""
+        scope = {"truck": truck, "trip": None, **info, "counters": Counter(), "timers": defaultdict(float)}
+        prev, self._scope = self._scope, scope
+        try:
+            yield scope
+        finally:
+            self._scope = prev
+            self.trips.append(scope)
+
+    def instrument(self, ds) -> bool:
+        """
+        Count distance lookups and resolver misses, and time address resolution, on ds.
+        Returns False (and changes nothing) if ds is already instrumented.
+        """
+        if "distance_by_idx" in vars(ds):
+            return False
+        dist, nearest, pairs = ds.distance_by_idx, ds.nearest_candidate, ds.pair_distances
+        resolve, find = ds._resolve_uncached, ds._find_address_index
+
+        def distance_by_idx(i, j):
+            self.count("distance_lookups")
+            return dist(i, j)
+
+        def nearest_candidate(i, locs, deadlines, active):
+            self.count("distance_lookups", len(locs))
+            return nearest(i, locs, deadlines, active)
+
+        def pair_distances(a, b):
+            self.count("distance_lookups", len(a))
+            return pairs(a, b)
+
+        def resolve_uncached(address):
+            self.count("resolver_misses")
+            return resolve(address)
+
+        def find_address_index(address):   # under index_of, package_index and get_distance
+            t0 = time.perf_counter()
+            try:
+                return find(address)
+            finally:
+                self.add_time("resolve", time.perf_counter() - t0)
+
+        ds.distance_by_idx = distance_by_idx
+        ds.nearest_candidate = nearest_candidate
+        ds.pair_distances = pair_distances
+        ds._resolve_uncached = resolve_uncached
+        ds._find_address_index = find_address_index
+        return True
+
+    @staticmethod
+    def uninstrument(ds) -> None:
+        for name in ("distance_by_idx", "nearest_candidate", "pair_distances", "_resolve_uncached",
+                     "_find_address_index"):
+            vars(ds).pop(name, None)
+
+    # ---- reporting ----
+    def by_truck(self) -> dict:
+        out: dict = {}
+        for s in self.trips:
+            t = out.setdefault(s["truck"], {"trips": 0, "counters": Counter(), "timers": defaultdict(float)})
+            t["trips"] += s["trip"] is not None
+            t["counters"].update(s["counters"])
+            for k, v in s["timers"].items():
+                t["timers"][k] += v
+        return out
+
+    def to_dict(self) -> dict:
+        def plain(scope):
+            return {**scope, "counters": dict(scope["counters"]),
+                    "timers": {k: round(v, 6) for k, v in scope["timers"].items()}}
+        return {
+            "counters": dict(self.counters),
+            "timers": {k: round(v, 6) for k, v in self.timers.items()},
+            "trucks": {str(t): plain(s) for t, s in sorted(self.by_truck().items())},
+            "trips": [plain(s) for s in self.trips],
+            "memory_peak_kb": self.memory_peak_kb,
+            "profile": self.profile,
+        }
+
+    def to_json(self, indent: int | None = 2) -> str:
+        return json.dumps(self.to_dict(), indent=indent)
+
+    def dump(self, path: str) -> None:
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(self.to_json())
+            f.write("\n")
+
+
+class _NullMetrics:
+    """Stand-in when metrics are off: every hook is a no-op."""
+    enabled = False
+
+    def count(self, name: str, n: int = 1) -> None:
+        pass
+
+    def add_time(self, name: str, seconds: float) -> None:
+        pass
+
+    def timer(self, name: str):
+        return _NULL_CTX
+
+    def trip(self, truck: int, **info):
+        return nullcontext({})
+
+
+NULL_METRICS = _NullMetrics()
+
+
+@contextmanager
+def capture(metrics: Metrics, profile_path: str | None = None, profile: bool = False,
+            trace_memory: bool = False, top: int = 25):
+    """
+    Run the block under cProfile and/or tracemalloc. The top `top` functions by
+    cumulative time go to metrics.profile (and the raw stats to profile_path, if
+    given, for pstats/snakeviz); the traced peak goes to metrics.memory_peak_kb.
+    """
+    prof = cProfile.Profile() if profile or profile_path else None
+    started = trace_memory and not tracemalloc.is_tracing()
+    if started:
+        tracemalloc.start()
+    elif trace_memory:
+        tracemalloc.reset_peak()
+    if prof is not None:
+        prof.enable()
+    try:
+        yield metrics
+    finally:
+        if prof is not None:
+            prof.disable()
+            if profile_path:
+                prof.dump_stats(profile_path)
+            stats = pstats.Stats(prof, stream=io.StringIO())
+            rows = []
+            for (file, line, func), (_cc, calls, tottime, cumtime, _callers) in stats.stats.items():
+                rows.append({"function": f"{file}:{line}({func})", "calls": calls,
+                             "tottime": round(tottime, 6), "cumtime": round(cumtime, 6)})
+            rows.sort(key=lambda r: -r["cumtime"])
+            metrics.profile = rows[:top]
+        if trace_memory:
+            metrics.memory_peak_kb = round(tracemalloc.get_traced_memory()[1] / 1024, 1)
+            if started:
+                tracemalloc.stop()
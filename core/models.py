@@ -1,13 +1,27 @@
 
+import sys
+from array import array
 from typing import List, Optional
 from config import SPEED_MPH, TRUCK_CAPACITY, HUB_ADDRESS
+from core.clock import minutes_to_str, clock_to_min, deadline_to_min
 
 
 class Package:
     """
     Minimal package record shared by the hash table, planner, simulator, and UI.
 
+    Times are canonical integer minutes since 08:00 (deadline_min, delivery_min);
+    deadline / delivery_time are display strings kept in sync by their setters.
+    Slotted (no per-instance __dict__); city/state/zip are interned and weight is numeric
+    so 100k+ package manifests stay small.
     """
+    __slots__ = (
+        "package_id", "address", "city", "state", "zip_code", "location_idx",
+        "_deadline", "deadline_min", "weight", "_status", "delivery_min",
+        "special_notes", "_truck_id", "board_time_min", "available_time_min",
+        "address_fix_time_min", "truck_mask", "deliver_with", "group_id", "_owner",
+    )
+
     def __init__(
         self,
         package_id: int,
@@ -15,32 +29,105 @@ class Package:
         deadline: str,
         city: str,
         zip_code: str,
-        weight: str,
+        weight,
         status: str = "at_hub",
         state: str = "UT",
         special_notes: str = "",
+        location_idx: Optional[int] = None,
     ):
         # Identity
         self.package_id: int = int(package_id)
+        self._owner = None  # HashTable whose secondary indexes track this package
 
         # Delivery metadata
         self.address: str = address
-        self.city: str = city
-        self.state: str = state
-        self.zip_code: str = zip_code
-        self.deadline: str = deadline
-        self.weight: str = weight
-        self.status: str = status              # "at_hub" | "en_route" | "delivered"
-        self.delivery_time: Optional[str] = None  # "HH:MM" when delivered
+        self.city: str = sys.intern(city)
+        self.state: str = sys.intern(state)
+        self.zip_code: str = sys.intern(zip_code)
+        self.location_idx: Optional[int] = location_idx  # distance-matrix index, resolved at load
+        self.deadline: str = deadline          # also sets deadline_min
+        self.weight: float = parse_weight(weight)
+        self._status: str = status             # "at_hub" | "en_route" | "delivered"
+        self.delivery_min: Optional[int] = None   # minutes since 08:00 when delivered
 
         # Scenario helpers
         self.special_notes: str = special_notes
-        self.truck_id: Optional[int] = None
+        self._truck_id: Optional[int] = None
         self.board_time_min: Optional[int] = None
         self.available_time_min: Optional[int] = None
         self.address_fix_time_min: Optional[int] = None
-        self.truck_restriction: Optional[int] = None
-        self.group_id: Optional[str] = None
+        self.truck_mask: int = 0               # bit t set = may ride truck t; 0 = any truck
+        self.deliver_with: tuple = ()          # package IDs that must ride on the same trip
+        self.group_id: Optional[int] = None    # smallest package ID of its deliver-together group
+
+    # ---- Pickling / copying: never carry the owning table along ----
+    def __getstate__(self):
+        return {k: getattr(self, k) for k in self.__slots__ if k != "_owner" and hasattr(self, k)}
+
+    def __setstate__(self, state):
+        self._owner = None
+        for k, v in state.items():
+            object.__setattr__(self, k, v)
+
+    # ---- Derived display values ----
+    @property
+    def deadline(self) -> str:
+        return self._deadline
+
+    @deadline.setter
+    def deadline(self, value: str) -> None:
+        self._deadline = value
+        old = getattr(self, "deadline_min", None)
+        self.deadline_min: int = deadline_to_min(value)
+        if self._owner is not None and old != self.deadline_min:
+            self._owner._on_deadline(self, old)
+
+    # ---- Indexed fields: changes are reported to the owning HashTable ----
+    @property
+    def status(self) -> str:
+        return self._status
+
+    @status.setter
+    def status(self, value: str) -> None:
+        old = self._status
+        self._status = value
+        if self._owner is not None and old != value:
+            self._owner._on_status(self, old)
+
+    @property
+    def truck_id(self) -> Optional[int]:
+        return self._truck_id
+
+    @truck_id.setter
+    def truck_id(self, value: Optional[int]) -> None:
+        old = self._truck_id
+        self._truck_id = value
+        if self._owner is not None and old != value:
+            self._owner._on_truck(self, old)
+
+    # ---- Truck eligibility (bitmask) ----
+    @property
+    def truck_restriction(self) -> Optional[int]:
+        """The one truck this package may ride, or None if any (or several) may."""
+        m = self.truck_mask
+        return m.bit_length() - 1 if m and not m & (m - 1) else None
+
+    @truck_restriction.setter
+    def truck_restriction(self, value: Optional[int]) -> None:
+        self.truck_mask = 0 if value is None else 1 << value
+
+    def allows_truck(self, truck_id: int) -> bool:
+        m = self.truck_mask
+        return not m or bool(m >> truck_id & 1)
+
+    @property
+    def delivery_time(self) -> Optional[str]:
+        """'HH:MM' when delivered, derived from delivery_min."""
+        return None if self.delivery_min is None else minutes_to_str(self.delivery_min)
+
+    @delivery_time.setter
+    def delivery_time(self, value: Optional[str]) -> None:
+        self.delivery_min = clock_to_min(value) if value else None
 
     def __repr__(self) -> str:
         dt = self.delivery_time if self.delivery_time else "--:--"
@@ -48,11 +135,103 @@ class Package:
                 f"ddl={self.deadline} wt={self.weight} status={self.status} t={dt}>")
 
 
+def parse_weight(weight) -> float:
+    """Weight column -> int if whole (kg), float otherwise; blank/garbage -> 0."""
+    if isinstance(weight, (int, float)):
+        return weight
+    s = str(weight or "").strip()
+    try:
+        return int(s)
+    except ValueError:
+        try:
+            return float(s)
+        except ValueError:
+            return 0
+
+
+# Columnar status codes (PackageBatch.status)
+STATUS_CODES = {"at_hub": 0, "en_route": 1, "delivered": 2}
+
+
+class PackageBatch:
+    """
+    Columnar view over a package list: parallel arrays of ids, location indices,
+    deadline minutes, status codes, allowed-truck bitmask (0 = any; a list of ints,
+    as masks for trucks past 62 don't fit an int64), release minute (max of
+    available/address-fix time) and group (-1 = none; group_size counts rows per group).
+    Row i describes packages[i], so the planner can filter and build candidate arrays
+    without touching Package objects.
+    The caller keeps `status` current via mark().
+    """
+    __slots__ = ("ids", "location_idx", "deadline_min", "status", "truck_mask", "release_min", "group",
+                 "group_size", "_row")
+
+    def __init__(self):
+        self.ids = array("q")
+        self.location_idx = array("q")
+        self.deadline_min = array("q")
+        self.status = array("b")
+        self.truck_mask: list = []
+        self.release_min = array("q")
+        self.group = array("q")
+        self.group_size: dict = {}
+        self._row: dict = {}
+
+    @classmethod
+    def from_packages(cls, packages) -> "PackageBatch":
+        b = cls()
+        for p in packages:
+            b.append(p)
+        return b
+
+    def append(self, p) -> None:
+        self._row[p.package_id] = len(self.ids)
+        self.ids.append(p.package_id)
+        self.location_idx.append(-1 if p.location_idx is None else p.location_idx)
+        self.deadline_min.append(p.deadline_min)
+        self.status.append(STATUS_CODES.get(p.status, 0))
+        self.truck_mask.append(p.truck_mask)
+        self.release_min.append(max(p.available_time_min or 0, p.address_fix_time_min or 0))
+        g = -1 if p.group_id is None else p.group_id
+        self.group.append(g)
+        if g != -1:
+            self.group_size[g] = self.group_size.get(g, 0) + 1
+
+    def refresh(self, p) -> None:
+        """Re-read an appended package's location, deadline, truck mask and release."""
+        i = self._row[p.package_id]
+        self.location_idx[i] = -1 if p.location_idx is None else p.location_idx
+        self.deadline_min[i] = p.deadline_min
+        self.truck_mask[i] = p.truck_mask
+        self.release_min[i] = max(p.available_time_min or 0, p.address_fix_time_min or 0)
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def row_of(self, package_id: int) -> int:
+        return self._row[package_id]
+
+    def mark(self, package_ids, status: str) -> None:
+        code = STATUS_CODES[status]
+        for pid in package_ids:
+            self.status[self._row[pid]] = code
+
+    def candidates(self, truck_id: int, depart_min: int) -> list:
+        """Rows that are at the hub and eligible for truck_id departing at depart_min."""
+        st, tm, rel = self.status, self.truck_mask, self.release_min
+        bit = 1 << truck_id
+        return [i for i in range(len(st))
+                if st[i] == 0 and (tm[i] == 0 or tm[i] & bit) and rel[i] <= depart_min]
+
+
 class Truck:
     """
     Simple truck model.
 
     """
+    __slots__ = ("truck_id", "speed", "capacity", "current_location", "current_time", "total_miles",
+                 "packages", "delivered_packages", "_delivered")
+
     def __init__(self, truck_id: int):
         self.truck_id: int = int(truck_id)
         self.speed: float = SPEED_MPH
@@ -65,7 +244,8 @@ class Truck:
 
         # Cargo tracking
         self.packages: List[int] = []            # package IDs currently on truck (if used)
-        self.delivered_packages: List[int] = []  # package IDs delivered by this truck
+        self.delivered_packages: List[int] = []  # package IDs delivered by this truck, in order
+        self._delivered: set = set()             # same IDs, for O(1) membership
 
     # ---- Optional helpers ----
     def can_load_package(self, _package: Package) -> bool:
@@ -82,37 +262,21 @@ class Truck:
         Mark a package as delivered.
 
         """
-        if package_id not in self.delivered_packages:
+        if package_id not in self._delivered:
+            self._delivered.add(package_id)
             self.delivered_packages.append(package_id)
 
         if hash_table is not None:
-            try:
-                from reporting.status import minutes_to_str
-                if delivered_time_decimal is not None:
-                    hhmm = self._convert_time_to_string(delivered_time_decimal)
-                else:
-                    hhmm = None
-
-                if hasattr(hash_table, "update_status"):
-                    hash_table.update_status(package_id, "delivered", delivery_time=hhmm, truck_id=self.truck_id)
-                else:
-                    # Fallback: look up and mutate directly
-                    pkg = hash_table.lookup(package_id)
-                    if pkg:
-                        pkg.status = "delivered"
-                        pkg.truck_id = self.truck_id
-                        if hhmm:
-                            pkg.delivery_time = hhmm
-            except Exception:
-                pass
-
-    @staticmethod
-    def _convert_time_to_string(time_decimal: float) -> str:
-        """
-        Convert decimal hours (e.g., 8.2667) to 'HH:MM' (08:16).
-
-        """
-        total_minutes = int(round(time_decimal * 60))
-        h = total_minutes // 60
-        m = total_minutes % 60
-        return f"{h:02d}:{m:02d}"
+            delivery_min = None
+            if delivered_time_decimal is not None:
+                delivery_min = max(0, int(round(delivered_time_decimal * 60)) - 8 * 60)
+            if hasattr(hash_table, "update_status"):
+                hash_table.update_status(package_id, "delivered", truck_id=self.truck_id, delivery_min=delivery_min)
+            else:
+                # Fallback: look up and mutate directly
+                pkg = hash_table.lookup(package_id)
+                if pkg:
+                    pkg.status = "delivered"
+                    pkg.truck_id = self.truck_id
+                    if delivery_min is not None:
+                        pkg.delivery_min = delivery_min
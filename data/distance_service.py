@@ -1,5 +1,26 @@
 import csv
+import hashlib
+import json
+import mmap
+import os
 import re
+import struct
+from collections import OrderedDict
+
+from data.sources import open_text
+
+try:
+    import numpy as np
+except ImportError:  # optional: list-of-lists matrix and Python NN scans
+    np = None
+
+_TOKEN_RE = re.compile(r"\d+|[A-Z]+")
+
+# Binary matrix cache: header | JSON address/alias table | packed upper triangle (i < j)
+_BIN_MAGIC = b"WGDM"
+_BIN_VERSION = 1
+_BIN_HEADER = struct.Struct("<4sHcxIIQQ32s")  # magic, version, typecode, n, meta_len, mtime_ns, size, sha256
+_BIN_TYPECODES = {"float64": b"d", "float32": b"f"}
 
 class DistanceService:
     """
@@ -7,23 +28,43 @@ class DistanceService:
 
     """
 
-    def __init__(self):
+    def __init__(self, resolver_cache_size: int = 4096, use_numpy: bool | None = None, dtype: str = "float64"):
         # Matrix in display order (0..N-1). Index 0 is HUB (WGU).
+        # With NumPy it is a contiguous (N, N) ndarray of `dtype`, else a list of lists.
+        if use_numpy and np is None:
+            raise ImportError("use_numpy=True requires numpy")
+        self.use_numpy: bool = (np is not None) if use_numpy is None else bool(use_numpy)
+        self.dtype = dtype
         self.addresses: list[str] = []
-        self.distance_matrix: list[list[float]] = []
+        self.distance_matrix = []
 
         # Lookup maps
         self._raw_to_idx: dict[str, int] = {}   # exact raw string -> index
         self._norm_to_idx: dict[str, int] = {}  # normalized string -> index
+        self._lc_to_idx: dict[str, int] = {}    # stripped lowercase raw -> index (first wins)
+        self._fuzzy_to_idx: dict[tuple, int] = {}  # (house number, first token) -> index (first wins)
+
+        # Resolver memo (bounded LRU, misses cached too) + counters
+        self._resolve_cache: OrderedDict[str, int] = OrderedDict()
+        self.resolver_cache_size = resolver_cache_size
+        self.cache_hits = 0
+        self.cache_misses = 0
 
         self.address_indices: dict[str, int] = {}
 
+        # Packed upper triangle when loaded from a binary cache (memory-mapped, shared pages)
+        self._tri = None
+        self._mmap = None
+        self._n = 0
+        self.cache_path: str | None = None  # binary cache backing _tri, if any
+
         # flip to True when you actually want verbose logs
         self.debug = False
 
-    def _dbg(self, *a):
-            if self.debug:
-                print(*a)
+    def _dbg(self, msg: str, *args):
+        # %-style args: nothing is formatted unless debug is on
+        if self.debug:
+            print(msg % args if args else msg)
 
     #  Normalization
     def _normalize(self, s: str) -> str:
@@ -62,25 +103,29 @@ class DistanceService:
 
     #  Loading
     def load_distance_data(self, filename: str):
-        with open(filename, "r", encoding="utf-8", errors="ignore") as file:
-            rows = list(csv.reader(file))
+        """Parse the distance CSV (path, ".gz" or "-" for stdin), streaming its rows."""
+        self._close_binary()
+        with open_text(filename, encoding="utf-8", errors="ignore") as file:
+            self._parse_distance_rows(csv.reader(file))
 
+    def _parse_distance_rows(self, rows):
         # Find header row (the one that has "Western Governors" among its cells)
-        header_row = -1
-        for i, row in enumerate(rows):
+        header = None
+        for row in rows:
             if len(row) > 5 and any("Western Governors" in str(cell) for cell in row):
-                header_row = i
+                header = row
                 break
-        if header_row == -1:
+        if header is None:
             raise RuntimeError("Distance table header row not found.")
 
-        header = rows[header_row]
-
         # Reset structures
         self.addresses = []
         self.distance_matrix = []
         self._raw_to_idx.clear()
         self._norm_to_idx.clear()
+        self._lc_to_idx.clear()
+        self._fuzzy_to_idx.clear()
+        self._resolve_cache.clear()
         self.address_indices.clear()
 
         # Build addresses list (0..N-1) and map BOTH the name and street to SAME index
@@ -118,19 +163,23 @@ class DistanceService:
 
         for raw, idx in self._raw_to_idx.items():
             self.address_indices[raw] = idx
+        self._build_fallback_indexes()
 
         # Build symmetric matrix (read lower triangle under the header)
         size = len(self.addresses)
         if size == 0:
             raise RuntimeError("No addresses parsed from the distance table header.")
 
-        self.distance_matrix = [[0.0 for _ in range(size)] for _ in range(size)]
+        if self.use_numpy:
+            m = np.zeros((size, size), dtype=self.dtype)
+        else:
+            m = [[0.0 for _ in range(size)] for _ in range(size)]
 
         # Rows immediately after header correspond to matrix rows
         for r in range(1, size + 1):                 # r = 1..size
-            if header_row + r >= len(rows):
+            row = next(rows, None)
+            if row is None:
                 break
-            row = rows[header_row + r]
             i = r - 1                                 # matrix row index
             # lower triangle including diagonal for this row
             for c in range(2, 2 + r):
@@ -144,27 +193,206 @@ class DistanceService:
                 except ValueError:
                     continue
                 j = c - 2
-                self.distance_matrix[i][j] = d
-                self.distance_matrix[j][i] = d       # mirror
+                m[i][j] = d
+                m[j][i] = d       # mirror
 
         # Final symmetry/diagonal pass (no made-up defaults)
-        for i in range(size):
-            self.distance_matrix[i][i] = 0.0
-            for j in range(size):
-                a = self.distance_matrix[i][j]
-                b = self.distance_matrix[j][i]
-                if a == 0.0 and b != 0.0:
-                    self.distance_matrix[i][j] = b
-                elif b == 0.0 and a != 0.0:
-                    self.distance_matrix[j][i] = a
-
-        self._dbg(f"DEBUG: Created {size}x{size} matrix with addresses: {self.addresses[:5]}")
+        if self.use_numpy:
+            m = np.where((m == 0.0) & (m.T != 0.0), m.T, m)
+            np.fill_diagonal(m, 0.0)
+            m = np.ascontiguousarray(m, dtype=self.dtype)
+        else:
+            for i in range(size):
+                m[i][i] = 0.0
+                for j in range(size):
+                    a = m[i][j]
+                    b = m[j][i]
+                    if a == 0.0 and b != 0.0:
+                        m[i][j] = b
+                    elif b == 0.0 and a != 0.0:
+                        m[j][i] = a
+        self.distance_matrix = m
+
+        self._dbg("DEBUG: Created %dx%d matrix with addresses: %s", size, size, self.addresses[:5])
+
+    #  Binary cache
+    def load_cached(self, filename: str, cache_path: str | None = None) -> bool:
+        """
+        Load the matrix from a binary cache next to the CSV, re-parsing the CSV only
+        when its size/mtime changed AND its content hash differs. Returns True on a
+        cache hit, False if the CSV was parsed (and the cache rewritten).
+        """
+        cache_path = cache_path or os.path.splitext(filename)[0] + ".dmx"
+        st = os.stat(filename)
+        header = self._read_binary_header(cache_path)
+        if header is not None:
+            _, _, _, _, _, mtime_ns, size, digest = header
+            if (mtime_ns, size) == (st.st_mtime_ns, st.st_size):
+                self.load_binary(cache_path)
+                return True
+            if digest == _file_sha256(filename):
+                # Touched but unchanged: refresh the stamp so the next start skips hashing
+                with open(cache_path, "r+b") as f:
+                    f.write(_BIN_HEADER.pack(*header[:5], st.st_mtime_ns, st.st_size, digest))
+                self.load_binary(cache_path)
+                return True
+
+        self.load_distance_data(filename)
+        self.export_binary(cache_path, source=filename)
+        return False
+
+    def export_binary(self, path: str, source: str | None = None) -> None:
+        """Write header, address/alias table and packed upper triangle; atomic replace."""
+        n = len(self.addresses)
+        typecode = _BIN_TYPECODES.get(str(self.dtype), b"d")
+        meta = json.dumps({
+            "addresses": self.addresses,
+            "raw": list(self._raw_to_idx.items()),
+            "norm": list(self._norm_to_idx.items()),
+        }).encode("utf-8")
+        pad = (-(_BIN_HEADER.size + len(meta))) % 8
+
+        if source:
+            st = os.stat(source)
+            mtime_ns, size, digest = st.st_mtime_ns, st.st_size, _file_sha256(source)
+        else:
+            mtime_ns, size, digest = 0, 0, b"\0" * 32
+
+        tc = typecode.decode()
+        if self._tri is not None:  # already packed: same layout, copy straight through
+            body = bytes(memoryview(self._tri).cast("B")) if tc == self._tri_typecode() else \
+                _pack(tc, (float(x) for x in self._tri))
+        elif np is not None:
+            body = np.asarray(self.distance_matrix, dtype=tc)[np.triu_indices(n, 1)].tobytes()
+        else:
+            body = _pack(tc, (self.distance_matrix[i][j] for i in range(n) for j in range(i + 1, n)))
+
+        tmp = f"{path}.tmp{os.getpid()}"
+        with open(tmp, "wb") as f:
+            f.write(_BIN_HEADER.pack(_BIN_MAGIC, _BIN_VERSION, typecode, n, len(meta), mtime_ns, size, digest))
+            f.write(meta)
+            f.write(b"\0" * pad)
+            f.write(body)
+        os.replace(tmp, path)  # readers holding the old mapping keep their inode
+
+    def load_binary(self, path: str) -> None:
+        """Memory-map a cache written by export_binary; the triangle is never copied."""
+        header = self._read_binary_header(path)
+        if header is None:
+            raise RuntimeError(f"Not a distance cache (or wrong version): {path}")
+        _, _, typecode, n, meta_len, _, _, _ = header
+
+        with open(path, "rb") as f:
+            mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        start = _BIN_HEADER.size
+        meta = json.loads(mm[start:start + meta_len].decode("utf-8"))
+        offset = start + meta_len + ((-(start + meta_len)) % 8)
+        count = n * (n - 1) // 2
+
+        self._close_binary()
+        tc = typecode.decode()
+        if self.use_numpy:
+            self._tri = np.frombuffer(mm, dtype=tc, count=count, offset=offset)
+        else:
+            self._tri = memoryview(mm)[offset:offset + count * struct.calcsize(tc)].cast(tc)
+        self._mmap = mm
+        self._n = n
+        self.cache_path = path
+        self.distance_matrix = []
+
+        self.addresses = list(meta["addresses"])
+        self._raw_to_idx = {k: v for k, v in meta["raw"]}
+        self._norm_to_idx = {k: v for k, v in meta["norm"]}
+        self.address_indices = dict(self._raw_to_idx)
+        self._build_fallback_indexes()
+        self._dbg("DEBUG: Mapped %dx%d packed matrix from %s", n, n, path)
+
+    def _read_binary_header(self, path: str):
+        try:
+            with open(path, "rb") as f:
+                raw = f.read(_BIN_HEADER.size)
+        except OSError:
+            return None
+        if len(raw) < _BIN_HEADER.size:
+            return None
+        header = _BIN_HEADER.unpack(raw)
+        if header[0] != _BIN_MAGIC or header[1] != _BIN_VERSION:
+            return None
+        return header
+
+    def _close_binary(self) -> None:
+        if self._tri is not None and not self.use_numpy:
+            self._tri.release()
+        self._tri = None
+        if self._mmap is not None:
+            try:
+                self._mmap.close()
+            except BufferError:  # an exported ndarray view is still alive; let GC close it
+                pass
+        self._mmap = None
+        self._n = 0
+        self.cache_path = None
+
+    # Pickling: a memory-mapped service travels as its cache path and re-maps on arrival,
+    # so worker processes share the page cache instead of receiving a matrix copy.
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state["_mmap"] = None
+        if self._tri is not None:
+            state["_tri"] = None
+        # per-instance method overrides (Metrics.instrument wrappers) are closures that
+        # don't pickle; a copy in another process gets the plain methods
+        for name in [k for k in state if callable(getattr(type(self), k, None))]:
+            del state[name]
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        if self.cache_path is not None:
+            self.load_binary(self.cache_path)
+
+    def _tri_typecode(self) -> str:
+        return self._tri.dtype.char if self.use_numpy else self._tri.format
+
+    def _tri_pos(self, i, j):
+        """Offset of (i, j), i < j, in the packed upper triangle."""
+        return i * self._n - i * (i + 1) // 2 + j - i - 1
+
+    def _fuzzy_key(self, normalized: str):
+        """(house number, first token) of a normalized address, or None if too short."""
+        parts = _TOKEN_RE.findall(normalized)
+        return (parts[0], parts[1]) if len(parts) >= 2 else None
+
+    def _build_fallback_indexes(self) -> None:
+        """Precompute the raw-lowercase and fuzzy maps so resolver fallbacks are O(1)."""
+        self._lc_to_idx.clear()
+        self._fuzzy_to_idx.clear()
+        for raw, i in self._raw_to_idx.items():
+            self._lc_to_idx.setdefault(raw.strip().lower(), i)
+            key = self._fuzzy_key(self._normalize(raw))
+            if key is not None:
+                self._fuzzy_to_idx.setdefault(key, i)
+        self._resolve_cache.clear()
 
     #  Lookup & distance
     def _find_address_index(self, address: str) -> int:
-        """Resolve an arbitrary address string to its matrix index."""
+        """Resolve an arbitrary address string to its matrix index (memoized)."""
         if not address:
             return -1
+        cache = self._resolve_cache
+        idx = cache.get(address)
+        if idx is not None:
+            self.cache_hits += 1
+            cache.move_to_end(address)
+            return idx
+        self.cache_misses += 1
+        idx = self._resolve_uncached(address)
+        cache[address] = idx
+        if len(cache) > self.resolver_cache_size:
+            cache.popitem(last=False)
+        return idx
+
+    def _resolve_uncached(self, address: str) -> int:
         n = self._normalize(address)
 
         # 1) normalized direct hit
@@ -173,24 +401,126 @@ class DistanceService:
             return idx
 
         # 2) raw exact fallback
-        addr_lc = address.strip().lower()
-        for raw, i in self._raw_to_idx.items():
-            if addr_lc == raw.strip().lower():
-                return i
+        idx = self._lc_to_idx.get(address.strip().lower())
+        if idx is not None:
+            return idx
 
         # 3) tiny fuzzy: match by house number + first token (kept minimal to avoid false hits)
-        parts = re.findall(r"\d+|[A-Z]+", n)
-        for raw, i in self._raw_to_idx.items():
-            rparts = re.findall(r"\d+|[A-Z]+", self._normalize(raw))
-            if len(parts) >= 2 and len(rparts) >= 2 and parts[0] == rparts[0] and parts[1] == rparts[1]:
-                self._dbg(f"DEBUG: Fuzzy match: {address} -> {raw}")
-                return i
+        key = self._fuzzy_key(n)
+        idx = self._fuzzy_to_idx.get(key) if key is not None else None
+        if idx is not None:
+            self._dbg("DEBUG: Fuzzy match: %s -> %s", address, self.addresses[idx])
+            return idx
 
         return -1
 
+    def resolver_stats(self) -> dict:
+        """Resolver cache counters (hits/misses/size)."""
+        return {"hits": self.cache_hits, "misses": self.cache_misses, "size": len(self._resolve_cache)}
+
+    def index_of(self, address: str) -> int:
+        """Public resolver: matrix index for an address, or -1 if unknown."""
+        return self._find_address_index(address)
+
+    def package_index(self, pkg) -> int:
+        """
+        Matrix index for a package. Uses the location_idx resolved at load time;
+        resolves (and caches on the package) only if it was never set.
+        """
+        idx = getattr(pkg, "location_idx", None)
+        if idx is None:
+            idx = self._find_address_index(pkg.address)
+            if idx == -1:
+                raise ValueError(f"Address not in distance matrix: '{pkg.address}' (package {pkg.package_id})")
+            pkg.location_idx = idx
+        return idx
+
+    def distance_by_idx(self, i: int, j: int) -> float:
+        """Return miles between two matrix indices (no address resolution)."""
+        if self._tri is not None:
+            if i == j:
+                return 0.0
+            if i > j:
+                i, j = j, i
+            return float(self._tri[self._tri_pos(i, j)])
+        if self.use_numpy:
+            return float(self.distance_matrix[i, j])
+        return self.distance_matrix[i][j]
+
+    def path_distances(self, start: int, locs):
+        """
+        Leg miles of the open path start -> locs[0] -> locs[1] -> ...; one gather over
+        the matrix with NumPy (float64 ndarray), else a list of distance_by_idx calls.
+        """
+        if self.use_numpy:
+            b = np.asarray(locs, dtype=np.intp)
+            a = np.empty_like(b)
+            if len(b):
+                a[0] = start
+                a[1:] = b[:-1]
+            return self.pair_distances(a, b)
+        dist = self.distance_by_idx
+        out, prev = [], start
+        for loc in locs:
+            out.append(dist(prev, loc) if loc != prev else 0.0)
+            prev = loc
+        return out
+
+    def pair_distances(self, a, b):
+        """Miles between a[k] and b[k] for intp index arrays (NumPy only), as float64."""
+        if self._tri is not None:
+            lo = np.minimum(a, b); hi = np.maximum(a, b)
+            d = np.where(lo == hi, 0.0, self._tri.take(np.where(lo == hi, 0, self._tri_pos(lo, hi))))
+        else:
+            d = self.distance_matrix[a, b]
+        return d.astype(np.float64, copy=False)
+
+    #  Vectorized nearest-neighbour
+    def candidate_arrays(self, locs: list, deadlines: list):
+        """
+        Pack candidate location indices and deadline minutes for nearest_candidate.
+        Returns (locs, deadlines, active) as ndarrays with NumPy, else plain lists.
+        """
+        if self.use_numpy:
+            return (np.asarray(locs, dtype=np.intp), np.asarray(deadlines, dtype=np.int64),
+                    np.ones(len(locs), dtype=bool))
+        return list(locs), list(deadlines), [True] * len(locs)
+
+    def nearest_candidate(self, i: int, locs, deadlines, active) -> int:
+        """
+        Position of the nearest active candidate from location i, ties broken by
+        earlier deadline, then by position. Returns -1 if nothing is active.
+        With NumPy this is one masked argmin over row i instead of a Python loop.
+        """
+        if self.use_numpy:
+            if self._tri is not None:
+                a = np.minimum(locs, i); b = np.maximum(locs, i)
+                packed = self._tri.take(np.where(a == b, 0, self._tri_pos(a, b)))
+                dists = np.where(a == b, 0.0, packed)
+            else:
+                dists = self.distance_matrix[i].take(locs)
+            row = np.where(active, dists, np.inf)
+            if not len(row):
+                return -1
+            best = row.min()
+            if best == np.inf:
+                return -1
+            dl = np.where(row == best, deadlines, np.iinfo(np.int64).max)
+            return int(dl.argmin())
+
+        dist = self.distance_by_idx
+        best_pos, best_key = -1, None
+        for pos, loc in enumerate(locs):
+            if not active[pos]:
+                continue
+            key = (dist(i, loc), deadlines[pos])
+            if best_key is None or key < best_key:
+                best_key = key; best_pos = pos
+        return best_pos
+
     def get_distance(self, from_addr: str, to_addr: str) -> float:
         """
-        Return miles between two addresses using the distance matrix.
+        Compatibility shim: resolve both addresses, then defer to distance_by_idx.
         Fail-fast if either endpoint is unknown (no silent defaults).
         """
         i = self._find_address_index(from_addr)
@@ -203,7 +533,20 @@ class DistanceService:
                 f"Examples: {examples}"
             )
 
-        d = self.distance_matrix[i][j]
-        self._dbg(f"DEBUG: Distance from {from_addr[:20]}... to {to_addr[:20]}... = {d:.1f} miles")
+        d = self.distance_by_idx(i, j)
+        self._dbg("DEBUG: Distance from %.20s... to %.20s... = %.1f miles", from_addr, to_addr, d)
         return d
 
+
+
+def _pack(typecode: str, values) -> bytes:
+    import array
+    return array.array(typecode, values).tobytes()
+
+
+def _file_sha256(path: str) -> bytes:
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            h.update(chunk)
+    return h.digest()
@@ -0,0 +1,84 @@
+import csv
+from core.clock import clock_to_min
+
+# Columns: Package ID, Address, City, State, Zip, Delivery Deadline, Weight, [Special Notes]
+_MIN_COLUMNS = 7
+
+
+class MissingHeaderError(ValueError):
+    pass
+
+
+def _is_header(row: list) -> bool:
+    # robust match for funky headers like 'Package\nID'
+    joined = " ".join(str(c) for c in row).lower()
+    return "package" in joined and "id" in joined
+
+
+def _raise(line: int, message: str):
+    raise ValueError(f"line {line}: {message}")
+
+
+def parse_package_row(row: list) -> dict:
+    """One data row -> HashTable.insert() keyword arguments. Raises ValueError if malformed."""
+    if len(row) < _MIN_COLUMNS:
+        raise ValueError(f"expected at least {_MIN_COLUMNS} columns, got {len(row)}")
+    try:
+        package_id = int(row[0].strip())
+    except ValueError:
+        raise ValueError(f"bad package ID {row[0]!r}") from None
+    address = row[1].strip()
+    if not address:
+        raise ValueError(f"package {package_id}: missing address")
+    deadline = row[5].strip() or "EOD"
+    if deadline.upper() != "EOD":
+        try:
+            clock_to_min(deadline)
+        except ValueError:
+            raise ValueError(f"package {package_id}: bad deadline {deadline!r}") from None
+    weight = row[6].strip()
+    if weight:
+        try:
+            float(weight)
+        except ValueError:
+            raise ValueError(f"package {package_id}: bad weight {weight!r}") from None
+    return {
+        "package_id": package_id,
+        "address": address,
+        "city": row[2].strip(),
+        "state": row[3].strip(),
+        "zip_code": row[4].strip(),
+        "deadline": deadline,
+        "weight": weight,
+        "special_notes": row[7].strip() if len(row) > 7 else "",
+    }
+
+
+def iter_package_records(f, on_error=None):
+    """
+    Stream validated package records (dicts of HashTable.insert() kwargs) from an open
+    CSV text stream, one row in memory at a time. Rows up to the header are skipped;
+    after it, blank rows are ignored and each malformed row goes to
+    on_error(line_no, message) (default: raise ValueError). line_no is the row's first
+    physical line, so quoted multi-line cells don't throw the count off.
+    Raises MissingHeaderError if the stream has no header row.
+    """
+    on_error = on_error or _raise
+    reader = csv.reader(f)
+    header_found = False
+    line = 1
+    for row in reader:
+        start, line = line, reader.line_num + 1
+        if not header_found:
+            header_found = bool(row) and _is_header(row)
+            continue
+        if not any(c.strip() for c in row):
+            continue
+        try:
+            record = parse_package_row(row)
+        except ValueError as e:
+            on_error(start, str(e))
+            continue
+        yield record
+    if not header_found:
+        raise MissingHeaderError("Could not find package header row")
@@ -0,0 +1,37 @@
+import gzip
+import io
+import sys
+
+
+def open_text(source, encoding: str = "utf-8-sig", errors: str = "strict"):
+    """
+    Open a CSV source for streaming text reads: a path (".gz" is decompressed on the
+    fly), "-" for stdin, or an already-open file object (returned as-is). Use as a
+    context manager; stdin and caller-owned files are not closed on exit.
+    """
+    if hasattr(source, "read"):
+        return _Borrowed(source)
+    source = str(source)
+    if source == "-":
+        buf = getattr(sys.stdin, "buffer", None)
+        if buf is None:
+            return _Borrowed(sys.stdin)
+        return _Borrowed(io.TextIOWrapper(buf, encoding=encoding, errors=errors, newline=""))
+    if source.endswith(".gz"):
+        return gzip.open(source, "rt", encoding=encoding, errors=errors, newline="")
+    return open(source, "r", encoding=encoding, errors=errors, newline="")
+
+
+class _Borrowed:
+    """Context wrapper that leaves the underlying stream open."""
+
+    def __init__(self, f):
+        self.f = f
+
+    def __enter__(self):
+        return self.f
+
+    def __exit__(self, *exc):
+        if isinstance(self.f, io.TextIOWrapper) and self.f.buffer is getattr(sys.stdin, "buffer", None):
+            self.f.detach()  # don't close stdin along with the wrapper
+        return False
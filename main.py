@@ -1,24 +1,34 @@
 
 # Delivery routing system using a custom hash table and greedy nearest-feasible algorithm with priority selection
 
+import argparse
 
-from config import DISTANCE_CSV, PACKAGE_CSV, ONLY_TRUCK2, DELAYED_905, ADDR_FIX_1020, ARRIVAL_905_MIN, ADDR_FIX_1020_MIN, SNAPSHOTS
+from config import (DISTANCE_CSV, DISTANCE_CACHE, PACKAGE_CSV, SNAPSHOTS, NUM_DRIVERS, LOAD_BATCH_SIZE, METRICS,
+                    MAX_TOTAL_MILES)
 from core.hash_table import HashTable
+from core.metrics import Metrics, NULL_METRICS, capture
 from data.distance_service import DistanceService
+from data.package_loader import MissingHeaderError, iter_package_records
+from data.sources import open_text
+from routing.constraints import apply_note_constraints, assign_groups
 from routing.scheduler import run_full_plan
 from reporting.status import status_at, minutes_to_str
 from ui.cli import UserInterface
 
+MAX_REPORTED = 20  # malformed rows listed individually
+
 class DeliveryOptimizer:
     def __init__(self, hash_table, distance_service):
         self.hash_table = hash_table
         self.distance_service = distance_service
-        self.max_total_miles = 140
+        self.max_total_miles = MAX_TOTAL_MILES
         self.result = {}
 
-    def load_packages_from_file(self, filename: str):
+    def load_packages_from_file(self, filename: str, batch_size: int = LOAD_BATCH_SIZE):
         """
-        Load package data from CSV into the custom HashTable.
+        Stream package data from CSV into the custom HashTable, batch_size records per
+        bulk_insert, so memory stays flat for any manifest size. filename may be a
+        ".gz" file or "-" for stdin.
         Expected header (any row containing 'Package' and 'ID' is treated as header):
           0: Package ID
           1: Address
@@ -28,75 +38,82 @@ class DeliveryOptimizer:
           5: Delivery Deadline (e.g., '10:30 AM', 'EOD')
           6: Weight
           7: Special Notes (optional)
+        Malformed rows are skipped and reported with their line numbers.
         """
-        import csv, os
+        import os
 
-        if not os.path.exists(filename):
+        if filename != "-" and not os.path.exists(filename):
             print(f"Package file not found: {filename}")
             return
 
-        with open(filename, "r", newline="", encoding="utf-8-sig") as f:
-            rows = list(csv.reader(f))
-
-        # Find header row
-        header_row = -1
-        for i, row in enumerate(rows):
-            if not row:
-                continue
-            # robust match for funky headers like 'Package\nID'
-            joined = " ".join(str(c) for c in row).lower()
-            if "package" in joined and "id" in joined:
-                header_row = i
-                break
-
-        if header_row == -1:
-            print("Could not find header in package_file.csv")
-            return
-
         loaded = 0
-        for r in rows[header_row + 1:]:
-            if not r or len(r) < 7:
-                continue
-            try:
-                package_id = int(str(r[0]).strip())
-            except:
-                continue  # skip non-data rows
-
-            address       = str(r[1]).strip()
-            city          = str(r[2]).strip()
-            state         = str(r[3]).strip() if len(r) > 3 else "UT"
-            zip_code      = str(r[4]).strip() if len(r) > 4 else ""
-            deadline      = str(r[5]).strip() if len(r) > 5 else "EOD"
-            weight        = str(r[6]).strip() if len(r) > 6 else ""
-            special_notes = str(r[7]).strip() if len(r) > 7 else ""
-
-            # Insert into custom hash table (status starts at 'at_hub')
-            self.hash_table.insert(
-                package_id=package_id,
-                address=address,
-                deadline=deadline,
-                city=city,
-                zip_code=zip_code,
-                weight=weight,
-                status="at_hub",
-                state=state,
-                special_notes=special_notes,
-            )
-            loaded += 1
+        unresolved = []  # (package_id, address) not found in the distance matrix
+        bad_rows = []    # first MAX_REPORTED (line, message); bad_count has the total
+        bad_count = 0
+
+        def on_error(line, message):
+            nonlocal bad_count
+            bad_count += 1
+            if len(bad_rows) < MAX_REPORTED:
+                bad_rows.append((line, message))
+
+        batch = []
+        try:
+            with open_text(filename) as f:
+                for rec in iter_package_records(f, on_error):
+                    # Resolve the address to a matrix index once, here, so routing works on ints
+                    loc = self.distance_service.index_of(rec["address"])
+                    if loc == -1:
+                        unresolved.append((rec["package_id"], rec["address"]))
+                    rec["location_idx"] = loc if loc != -1 else None
+                    batch.append(rec)  # status starts at 'at_hub'
+                    if len(batch) >= batch_size:
+                        loaded += self.hash_table.bulk_insert(batch)
+                        batch = []
+        except MissingHeaderError:
+            print(f"Could not find header in {filename}")
+            return
+        if batch:
+            loaded += self.hash_table.bulk_insert(batch)
 
         print(f"Loaded {loaded} packages into the system")
+        for line, message in bad_rows:
+            print(f"Skipped malformed row at line {line}: {message}")
+        if bad_count > len(bad_rows):
+            print(f"... and {bad_count - len(bad_rows)} more malformed row(s)")
+
+        # Report every unknown address at once instead of failing mid-route
+        if unresolved:
+            listing = ", ".join(f"#{pid} '{addr}'" for pid, addr in unresolved)
+            raise ValueError(f"{len(unresolved)} package address(es) not in distance matrix: {listing}")
 
 
 def _apply_constraints(packages):
-    for p in packages:
-        if p.package_id in ONLY_TRUCK2:
-            p.truck_restriction = 2
-        if p.package_id in DELAYED_905:
-            p.available_time_min = ARRIVAL_905_MIN
-        if p.package_id in ADDR_FIX_1020:
-            p.address_fix_time_min = ADDR_FIX_1020_MIN
-
-def main():
+    # constraints come from each package's special notes (routing.constraints rules)
+    for pid, note in apply_note_constraints(packages):
+        print(f"Unrecognized special note on package {pid}: {note!r}")
+    assign_groups(packages)
+
+def _parse_args(argv=None):
+    ap = argparse.ArgumentParser(description="WGUPS delivery routing")
+    ap.add_argument("--metrics", metavar="FILE", help="write run counters and phase timers as JSON")
+    ap.add_argument("--profile", metavar="FILE", help="run under cProfile and write the stats (pstats format)")
+    ap.add_argument("--trace-memory", action="store_true", help="record the tracemalloc peak in the metrics")
+    return ap.parse_args(argv)
+
+def main(argv=None):
+    args = _parse_args(argv)
+    metrics = Metrics() if (METRICS or args.metrics or args.profile or args.trace_memory) else None
+    if metrics is None:
+        return run(None)
+    with capture(metrics, profile_path=args.profile, trace_memory=args.trace_memory):
+        result = run(metrics)
+    if args.metrics:
+        metrics.dump(args.metrics)
+        print(f"Metrics written to {args.metrics}")
+    return result
+
+def run(metrics=None):
     print("WGUPS Delivery Routing Program Starting...")
     print("Initializing system components...")
 
@@ -104,27 +121,46 @@ def main():
     ds = DistanceService()
 
     print("Loading distance data...")
-    ds.load_distance_data(str(DISTANCE_CSV))
+    ds.load_cached(str(DISTANCE_CSV), str(DISTANCE_CACHE))
+    m = metrics or NULL_METRICS
+    if metrics is not None:
+        metrics.instrument(ds)
 
     optimizer = DeliveryOptimizer(ht, ds)
     print("Loading package data...")
-    optimizer.load_packages_from_file(str(PACKAGE_CSV))
+    with m.timer("load"):
+        optimizer.load_packages_from_file(str(PACKAGE_CSV))
 
     packages = list(ht.get_all_packages())
     _apply_constraints(packages)
     print(f"Loaded {len(packages)} packages into the system")
 
     print("\nStarting delivery optimization...")
-    result = run_full_plan(ds, packages)
+    result = run_full_plan(ds, packages, hash_table=ht, metrics=metrics or False,
+                           max_miles=optimizer.max_total_miles)
     optimizer.result = result  # for UI access
 
+    with m.timer("report"):
+        _report(ht, result, optimizer.max_total_miles)
+
+    print("\nStarting user interface...")
+    ui = UserInterface(ht, optimizer)  # UI reads optimizer.result
+    ui.display_main_menu()
+    return result
+
+def _report(ht, result, max_miles):
     # Summary
     print("\nOptimization Results:")
     print(f"Total miles traveled: {result['total_miles']:.1f}")
-    print(f"Maximum allowed: 140")
-    ok = "Yes" if result["total_miles"] <= 140 else "No"
+    print(f"Lower bound: {result['lower_bound']:.1f} (gap {100 * result['gap']:.1f}%)")
+    print(f"Maximum allowed: {max_miles}")
+    ok = "Yes" if result["total_miles"] <= max_miles else "No"
     print(f"Constraint satisfied: {ok}")
     print(f"Packages delivered: {result['delivered']}/{result['total_packages']}")
+    if result["undelivered"]:
+        print(f"Undelivered packages: {', '.join(map(str, result['undelivered']))}")
+    if result["rejected"]:
+        print(f"Rejected by the mileage budget: {', '.join(map(str, result['rejected']))}")
 
     print("\nFinal Delivery Status by Truck:")
     for t in result["trucks"]:
@@ -133,7 +169,7 @@ def main():
     # Timeline
     trips = result.get("trips", [])
     if trips:
-        print("\nTrip timeline (max two trucks active):")
+        print(f"\nTrip timeline (max {NUM_DRIVERS} trucks active):")
         for tr in sorted(trips, key=lambda x: x["depart"]):
             dep = minutes_to_str(tr["depart"]); ret = minutes_to_str(tr["return"])
             print(f"  Truck {tr['truck']}: {dep} → {ret} | {tr['count']} pkgs | {tr['miles']:.1f} mi")
@@ -142,9 +178,5 @@ def main():
     for ts in SNAPSHOTS:
         status_at(ts, ht, result)
 
-    print("\nStarting user interface...")
-    ui = UserInterface(ht, optimizer)  # UI reads optimizer.result
-    ui.display_main_menu()
-
 if __name__ == "__main__":
     main()
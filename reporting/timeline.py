@@ -0,0 +1,99 @@
+from bisect import bisect_left, bisect_right
+from typing import NamedTuple, Optional
+
+# Same-minute ordering inside the event log
+_KIND_ORDER = {"depart": 0, "board": 1, "deliver": 2, "return": 3}
+
+
+class Event(NamedTuple):
+    t: int                      # minutes since 08:00
+    kind: str                   # "depart" | "board" | "deliver" | "return"
+    truck: int
+    trip: int                   # index into result["trips"]
+    package_id: Optional[int]   # None for trip-level events
+
+
+class PackageStatus(NamedTuple):
+    package_id: int
+    status: str                 # "at_hub" | "en_route" | "delivered"
+    truck_id: Optional[int]
+    board_min: Optional[int]
+    delivery_min: Optional[int]
+    address: str
+
+
+def sort_events(events: list) -> list:
+    return sorted(events, key=lambda e: (e.t, _KIND_ORDER[e.kind], e.trip, e.package_id or 0))
+
+
+class StatusTimeline:
+    """
+    Point-in-time package status built once from the scheduler's event log.
+    Each package has a (board, deliver) interval, so one package's status at T is a
+    bisect over two times; whole-day counts at T bisect the sorted board/deliver
+    columns. Results are PackageStatus tuples; printing lives in reporting.status.
+    """
+
+    def __init__(self, packages, events: list):
+        self.events = sort_events(events)
+        self._event_times = [e.t for e in self.events]
+
+        by_id = {p.package_id: p for p in packages}
+        board, deliver, truck = {}, {}, {}
+        for e in self.events:
+            if e.package_id is None:
+                continue
+            if e.kind == "board":
+                board[e.package_id] = e.t
+                truck[e.package_id] = e.truck
+            elif e.kind == "deliver":
+                deliver[e.package_id] = e.t
+
+        # per-package records, in ID order (the order every report uses)
+        self._ids = sorted(by_id)
+        self._row = {pid: i for i, pid in enumerate(self._ids)}
+        self._address = [by_id[pid].address for pid in self._ids]
+        self._board = [board.get(pid) for pid in self._ids]
+        self._deliver = [deliver.get(pid) for pid in self._ids]
+        self._truck = [truck.get(pid) for pid in self._ids]
+
+        # sorted columns for O(log n) counts
+        self._board_sorted = sorted(t for t in self._board if t is not None)
+        self._deliver_sorted = sorted(t for t in self._deliver if t is not None)
+
+    @classmethod
+    def from_result(cls, packages, result: dict) -> "StatusTimeline":
+        return cls(packages, result.get("events", []))
+
+    def _status(self, i: int, t: int) -> PackageStatus:
+        b, d = self._board[i], self._deliver[i]
+        bounds = [x for x in (b, d) if x is not None]
+        k = bisect_right(bounds, t)
+        if d is not None and k == len(bounds):
+            st = "delivered"
+        elif b is not None and k >= 1:
+            st = "en_route"
+        else:
+            st = "at_hub"
+        return PackageStatus(self._ids[i], st, self._truck[i], b, d, self._address[i])
+
+    def package_at(self, package_id: int, t: int) -> Optional[PackageStatus]:
+        """Status of one package at minute t (None if unknown)."""
+        i = self._row.get(package_id)
+        return None if i is None else self._status(i, t)
+
+    def all_at(self, t: int) -> list:
+        """Status of every package at minute t, ordered by package ID."""
+        return [self._status(i, t) for i in range(len(self._ids))]
+
+    def counts_at(self, t: int) -> dict:
+        """{'at_hub', 'en_route', 'delivered'} counts at minute t without touching packages."""
+        delivered = bisect_right(self._deliver_sorted, t)
+        boarded = bisect_right(self._board_sorted, t)
+        return {"at_hub": len(self._ids) - boarded, "en_route": boarded - delivered, "delivered": delivered}
+
+    def events_between(self, t0: int, t1: int) -> list:
+        """Events with t0 <= t <= t1, in log order."""
+        lo = bisect_left(self._event_times, t0)
+        hi = bisect_right(self._event_times, t1)
+        return self.events[lo:hi]
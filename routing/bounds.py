@@ -0,0 +1,114 @@
+from config import HUB_ADDRESS
+
+try:
+    import numpy as np
+except ImportError:  # optional: Python row scans
+    np = None
+
+_BLOCK = 1 << 22   # distance-table cells per assignment_lower_bound block
+
+def _prim(D, nodes) -> float:
+    """Weight of a minimum spanning tree over `nodes` (positions into D), O(n^2) Prim."""
+    nodes = list(nodes)
+    if len(nodes) < 2:
+        return 0.0
+    first, rest = nodes[0], nodes[1:]
+    best = [D[first][v] for v in rest]
+    total = 0.0
+    while rest:
+        k = min(range(len(rest)), key=best.__getitem__)
+        total += best[k]
+        u = rest[k]
+        rest[k] = rest[-1]; rest.pop()
+        best[k] = best[-1]; best.pop()
+        Du = D[u]
+        for i, v in enumerate(rest):
+            if Du[v] < best[i]:
+                best[i] = Du[v]
+    return total
+
+def path_lower_bound(D, closed: bool = False) -> float:
+    """
+    Lower bound on a route over the trip-local table D (node 0 = HUB, the rest stops).
+    Open path (how routes are costed): a HUB-first path is a spanning tree, so
+    MST(all nodes) <= its miles. Closed route: a 1-tree style bound, MST(stops) plus
+    twice the cheapest HUB edge (a route may pass the same location twice, and the
+    table doesn't obey the triangle inequality, so the two HUB legs may be one edge).
+    """
+    n = len(D)
+    if n < 2:
+        return 0.0
+    if not closed:
+        return _prim(D, range(n))
+    return _prim(D, range(1, n)) + 2 * min(D[0][1:])
+
+def trip_lower_bound(ds, locs, hub: int | None = None, closed: bool = False) -> float:
+    """path_lower_bound for stops `locs` (matrix indices; repeats are one stop) from the HUB."""
+    hub = ds.index_of(HUB_ADDRESS) if hub is None else hub
+    nodes = [hub] + [l for l in dict.fromkeys(locs) if l != hub]
+    dist = ds.distance_by_idx
+    return path_lower_bound([[dist(a, b) for b in nodes] for a in nodes], closed)
+
+def assignment_lower_bound(ds, locs, hub: int | None = None) -> float:
+    """
+    Day-level bound from the assignment relaxation: every distinct stop in `locs` is
+    entered at least once, from the HUB or another stop, so the sum over stops of
+    their cheapest incoming edge is at most the miles of any plan that delivers them
+    (open routes; with the return legs it only gets looser). Row minima of the
+    (stops + HUB) x stops table, blockwise masked mins with NumPy.
+    """
+    hub = ds.index_of(HUB_ADDRESS) if hub is None else hub
+    stops = [l for l in dict.fromkeys(locs) if l != hub]
+    if not stops:
+        return 0.0
+    nodes = [hub] + stops
+    if np is not None and ds.use_numpy:
+        a = np.asarray(nodes, dtype=np.intp)
+        step = max(1, _BLOCK // len(nodes))           # stops per block, keeps the table small
+        total = 0.0
+        for lo in range(0, len(stops), step):
+            cols = a[1 + lo:1 + lo + step]
+            d = ds.pair_distances(np.repeat(a, len(cols)), np.tile(cols, len(a))).reshape(len(a), len(cols))
+            d[np.arange(1 + lo, 1 + lo + len(cols)), np.arange(len(cols))] = np.inf   # no self loops
+            total += float(d.min(axis=0).sum())
+        return total
+    dist = ds.distance_by_idx
+    return sum(min(dist(a, s) for a in nodes if a != s) for s in stops)
+
+def spanning_lower_bound(ds, locs, hub: int | None = None) -> float:
+    """
+    MST over the HUB and every distinct stop in `locs`: a day's trips all start at the
+    HUB, so together they connect and span those locations. For open routes this
+    dominates assignment_lower_bound (each stop's tree edge to its parent is one of
+    its incoming edges). O(n^2) Prim, vectorized per step with NumPy.
+    """
+    hub = ds.index_of(HUB_ADDRESS) if hub is None else hub
+    nodes = [hub] + [l for l in dict.fromkeys(locs) if l != hub]
+    if len(nodes) < 2:
+        return 0.0
+    if np is None or not ds.use_numpy:
+        dist = ds.distance_by_idx
+        return _prim([[dist(a, b) for b in nodes] for a in nodes], range(len(nodes)))
+    a = np.asarray(nodes, dtype=np.intp)
+    src = np.empty_like(a)
+    src.fill(hub)
+    best = ds.pair_distances(src, a)
+    best[0] = np.inf                  # the HUB is the root; tree nodes are set to inf
+    total = 0.0
+    for _ in range(len(a) - 1):
+        k = int(best.argmin())
+        total += float(best[k])
+        best[k] = np.inf
+        src.fill(a[k])
+        np.minimum(best, ds.pair_distances(src, a), out=best, where=best != np.inf)
+    return total
+
+def day_lower_bound(ds, locs, hub: int | None = None) -> dict:
+    """Both day bounds for the stops in `locs` and the larger of them ("lower_bound")."""
+    a = assignment_lower_bound(ds, locs, hub)
+    t = spanning_lower_bound(ds, locs, hub)
+    return {"assignment": a, "spanning_tree": t, "lower_bound": max(a, t)}
+
+def gap(miles: float, bound: float) -> float:
+    """Optimality gap (miles - bound) / miles, 0 for an empty plan."""
+    return (miles - bound) / miles if miles > 0 else 0.0
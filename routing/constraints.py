@@ -0,0 +1,162 @@
+import re
+from functools import lru_cache
+from typing import NamedTuple, Optional
+
+from config import ONLY_TRUCK2, DELAYED_905, ADDR_FIX_1020, ARRIVAL_905_MIN, ADDR_FIX_1020_MIN
+from core.clock import clock_to_min
+
+def apply_constraints(packages, only_truck2=None, delayed=None, addr_fix=None,
+                      arrival_min: int | None = None, addr_fix_min: int | None = None) -> list:
+    """
+    Re-derive every package's constraints from its special notes, then layer the
+    overrides on top, changing only the constraints named and only on their IDs:
+    only_truck2 IDs may ride truck 2 only, delayed IDs arrive at arrival_min and
+    addr_fix IDs are held until addr_fix_min (which "wrong address" notes use too).
+    A minute given without its ID set applies to the config set (DELAYED_905 /
+    ADDR_FIX_1020). Groups are re-assigned last, so mates share the overrides.
+    Returns [(package_id, note)] for notes no rule understood.
+    """
+    unknown = apply_note_constraints(packages, addr_fix_min)
+    by_id = {p.package_id: p for p in packages}
+
+    def override(ids, field, value):
+        for pid in ids:
+            if pid in by_id:
+                setattr(by_id[pid], field, value)
+
+    if only_truck2 is not None:
+        override(only_truck2, "truck_restriction", 2)
+    if delayed is not None or arrival_min is not None:
+        override(DELAYED_905 if delayed is None else delayed, "available_time_min",
+                 ARRIVAL_905_MIN if arrival_min is None else arrival_min)
+    if addr_fix is not None or addr_fix_min is not None:
+        override(ADDR_FIX_1020 if addr_fix is None else addr_fix, "address_fix_time_min",
+                 ADDR_FIX_1020_MIN if addr_fix_min is None else addr_fix_min)
+    assign_groups(packages)
+    return unknown
+
+
+# ---------------- special-notes rules ----------------
+class NoteConstraints(NamedTuple):
+    truck_mask: int = 0                  # allowed trucks as bits; 0 = any
+    available_min: Optional[int] = None  # arrives at the hub at this minute
+    wrong_address: bool = False          # held until the address is corrected
+    deliver_with: tuple = ()             # package IDs that must ride along
+    unparsed: str = ""                   # the note, if no rule matched it
+
+_ID_LIST = r"(\d+(?:\s*(?:,|&|\band\b|\bor\b)\s*\d+)*)"
+
+def _ids(text: str) -> tuple:
+    return tuple(int(x) for x in re.findall(r"\d+", text))
+
+def _trucks(m, c: dict) -> None:
+    for t in _ids(m.group(1)):
+        c["truck_mask"] |= 1 << t
+
+def _delayed(m, c: dict) -> None:
+    c["available_min"] = clock_to_min(m.group(1))
+
+def _wrong_address(m, c: dict) -> None:
+    c["wrong_address"] = True
+
+def _deliver_with(m, c: dict) -> None:
+    c["deliver_with"] += _ids(m.group(1))
+
+# (compiled pattern, handler(match, fields)); every rule that matches is applied
+_NOTE_RULES = [
+    (re.compile(r"\bonly\s+be\s+on\s+trucks?\s+#?" + _ID_LIST, re.I), _trucks),
+    (re.compile(r"\bdelayed\b.*?\buntil\s+(\d{1,2}:\d{2}\s*(?:[ap]m)?)", re.I), _delayed),
+    (re.compile(r"\bwrong\s+address\b", re.I), _wrong_address),
+    (re.compile(r"\bdelivered\s+with\s+(?:packages?\s+)?#?" + _ID_LIST, re.I), _deliver_with),
+]
+
+@lru_cache(maxsize=None)
+def parse_note(note: str) -> NoteConstraints:
+    """One special-notes string -> NoteConstraints (cached: manifests repeat a few notes)."""
+    fields = {"truck_mask": 0, "available_min": None, "wrong_address": False, "deliver_with": ()}
+    matched = False
+    for pattern, handler in _NOTE_RULES:
+        m = pattern.search(note)
+        if m:
+            handler(m, fields)
+            matched = True
+    return NoteConstraints(**fields, unparsed="" if matched else note)
+
+def apply_note_constraints(packages, addr_fix_min: int | None = None) -> list:
+    """
+    Derive truck_mask / available_time_min / address_fix_time_min / deliver_with for
+    every package from its special_notes. Each distinct note is parsed once and the
+    result applied to all packages carrying it. A "wrong address" note holds the
+    package until addr_fix_min (default config.ADDR_FIX_1020_MIN), when the corrected
+    address is known. Returns [(package_id, note)] for notes no rule understood.
+    """
+    addr_fix_min = ADDR_FIX_1020_MIN if addr_fix_min is None else addr_fix_min
+    unknown = []
+    for p in packages:
+        c = parse_note((p.special_notes or "").strip())
+        p.truck_mask = c.truck_mask
+        p.available_time_min = c.available_min
+        p.address_fix_time_min = addr_fix_min if c.wrong_address else None
+        p.deliver_with = tuple(i for i in c.deliver_with if i != p.package_id)
+        if c.unparsed:
+            unknown.append((p.package_id, p.special_notes))
+    return unknown
+
+def assign_groups(packages) -> dict:
+    """
+    Union-find over the deliver_with links: packages joined directly or transitively
+    share group_id = smallest member ID (ungrouped packages keep None). Members get
+    the intersection of their truck masks and the latest arrival, so the group is
+    eligible exactly when all of it is. Links to IDs not in `packages` are ignored.
+    Returns {group_id: [package IDs]}; raises ValueError if a group has no common truck.
+    """
+    by_id = {p.package_id: p for p in packages}
+    parent: dict[int, int] = {}
+    size: dict[int, int] = {}
+
+    def find(x: int) -> int:
+        root = x
+        while parent[root] != root:
+            root = parent[root]
+        while parent[x] != root:          # path compression
+            parent[x], x = root, parent[x]
+        return root
+
+    for p in packages:
+        for q in p.deliver_with:
+            if q not in by_id:
+                continue
+            for x in (p.package_id, q):
+                if x not in parent:
+                    parent[x], size[x] = x, 1
+            a, b = find(p.package_id), find(q)
+            if a != b:                    # union by size
+                if size[a] < size[b]:
+                    a, b = b, a
+                parent[b] = a
+                size[a] += size[b]
+
+    members: dict[int, list] = {}
+    for x in parent:
+        members.setdefault(find(x), []).append(x)
+
+    groups = {}
+    for ids in members.values():
+        ids.sort()
+        pkgs = [by_id[i] for i in ids]
+        mask = 0
+        for p in pkgs:
+            if p.truck_mask:
+                mask = p.truck_mask if not mask else mask & p.truck_mask
+                if not mask:
+                    raise ValueError(f"Packages {ids} must ride together but share no allowed truck")
+        arrival = max((p.available_time_min or 0 for p in pkgs), default=0) or None
+        for p in pkgs:
+            p.group_id = ids[0]
+            p.truck_mask = mask
+            p.available_time_min = arrival
+        groups[ids[0]] = ids
+    for p in packages:
+        if p.package_id not in parent:
+            p.group_id = None
+    return groups
@@ -0,0 +1,181 @@
+import json
+from concurrent.futures import ProcessPoolExecutor
+
+from config import TRUCK_CAPACITY, HUB_ADDRESS, PARTITION_WORKERS, PARTITION_MAX_ITERS
+
+
+class Partition:
+    """
+    Capacity-bounded clusters of at-hub packages, one trip's worth each.
+    clusters[c] is a list of package IDs, medoids[c] the location index the cluster
+    is built around and keys[c] its (truck_mask, release_min) class: packages are
+    only clustered with others that may ride the same trucks and leave at the same time.
+    to_json()/from_json() keep just the medoids by address, so a saved partition
+    can seed partition_packages() on a later day with a similar manifest.
+    """
+
+    def __init__(self, clusters: list, medoids: list, keys: list):
+        self.clusters = clusters
+        self.medoids = medoids
+        self.keys = keys
+
+    def __len__(self) -> int:
+        return len(self.clusters)
+
+    def assignment(self) -> dict:
+        """package_id -> cluster index."""
+        return {pid: c for c, ids in enumerate(self.clusters) for pid in ids}
+
+    def to_json(self, ds) -> str:
+        return json.dumps({"medoids": [[ds.addresses[m], mask, rel]
+                                       for m, (mask, rel) in zip(self.medoids, self.keys)]})
+
+    @staticmethod
+    def seeds_from_json(ds, text: str) -> dict:
+        """Saved medoids -> {(truck_mask, release_min): [location index]} for partition_packages(seeds=...)."""
+        seeds: dict = {}
+        for addr, mask, rel in json.loads(text)["medoids"]:
+            idx = ds.index_of(addr)
+            if idx != -1:
+                seeds.setdefault((mask, rel), []).append(idx)
+        return seeds
+
+
+def _units(packages: list, capacity: int) -> list:
+    """
+    Atomic units for one class: a deliver-together group, or up to `capacity`
+    ungrouped packages at one location. Each unit is (location index, [package]).
+    """
+    units, groups, by_loc = [], {}, {}
+    for p in packages:
+        if p.group_id is not None:
+            groups.setdefault(p.group_id, []).append(p)
+        else:
+            by_loc.setdefault(p.location_idx, []).append(p)
+    for g in sorted(groups):
+        members = groups[g]
+        units.append((members[0].location_idx, members))
+    for loc in sorted(by_loc):
+        ps = sorted(by_loc[loc], key=lambda p: (p.deadline_min, p.package_id))
+        for k in range(0, len(ps), capacity):
+            units.append((loc, ps[k:k + capacity]))
+    return units
+
+
+def _cluster_class(ds, units: list, capacity: int, hub: int, seeds: list | None, max_iters: int) -> tuple:
+    """
+    Capacitated k-medoids over the distance matrix for one class of units.
+    Seeds: the given medoids, else farthest-first from the HUB. Units are assigned
+    in order of regret (how much worse their second-best medoid is) to the nearest
+    medoid with room, opening a new cluster when none has; each medoid then moves to
+    the member location with the least size-weighted distance to its cluster.
+    Returns (clusters as lists of unit indices, medoid locations).
+    """
+    dist = ds.distance_by_idx
+    total = sum(len(u[1]) for u in units)
+    k = max(1, -(-total // capacity))
+    locs = sorted({u[0] for u in units})
+
+    medoids = [m for m in (seeds or []) if m in set(locs)][:k]
+    if not medoids:
+        medoids = [max(locs, key=lambda l: (dist(hub, l), -l))]
+    while len(medoids) < min(k, len(locs)):
+        medoids.append(max((l for l in locs if l not in medoids),
+                           key=lambda l: (min(dist(l, m) for m in medoids), -l)))
+
+    # unit -> medoid distances, one column per medoid location; a round only looks up
+    # the columns of medoids that moved instead of U x k fresh distances
+    columns: dict = {}
+
+    def column(m):
+        col = columns.get(m)
+        if col is None:
+            col = columns[m] = [dist(u[0], m) for u in units]
+        return col
+
+    clusters = []
+    for _ in range(max_iters):
+        clusters = [[] for _ in medoids]
+        load = [0] * len(medoids)
+        cols = [column(m) for m in medoids]
+
+        def regret(u):
+            d = sorted(col[u] for col in cols)
+            return -(d[1] - d[0]) if len(d) > 1 else 0.0, u
+
+        for u in sorted(range(len(units)), key=regret):
+            loc, size = units[u][0], len(units[u][1])
+            fits = [c for c in range(len(medoids)) if load[c] + size <= capacity]
+            if fits:
+                c = min(fits, key=lambda c: (cols[c][u], c))
+            else:
+                c = len(medoids)
+                medoids.append(loc)
+                cols.append(column(loc))
+                clusters.append([])
+                load.append(0)
+            clusters[c].append(u)
+            load[c] += size
+
+        moved = False
+        for c, members in enumerate(clusters):
+            if not members:
+                continue
+            cand = sorted({units[u][0] for u in members})
+            best = min(cand, key=lambda l: (sum(dist(l, units[u][0]) * len(units[u][1]) for u in members), l))
+            if best != medoids[c]:
+                medoids[c] = best
+                moved = True
+        if not moved:
+            break
+
+    keep = [c for c, members in enumerate(clusters) if members]
+    return [clusters[c] for c in keep], [medoids[c] for c in keep]
+
+
+def _partition_classes(ds, classes: list, capacity: int, hub: int, seeds: dict, max_iters: int) -> list:
+    out = []
+    for key, pkgs in classes:
+        units = _units(pkgs, capacity)
+        clusters, medoids = _cluster_class(ds, units, capacity, hub, seeds.get(key), max_iters)
+        for members, m in zip(clusters, medoids):
+            out.append(([p.package_id for u in members for p in units[u][1]], m, key))
+    return out
+
+
+def partition_packages(ds, packages: list, capacity: int | None = None, seeds: dict | None = None,
+                       workers: int | None = None, max_iters: int | None = None) -> Partition:
+    """
+    Split the at-hub packages into clusters of at most `capacity` (default
+    TRUCK_CAPACITY) packages that one trip can serve. Packages are first split into
+    classes by (truck_mask, release_min), so a cluster never mixes truck restrictions or
+    release times, and deliver-together groups are never split. Classes are clustered
+    independently (capacitated k-medoids), in `workers` processes (default
+    PARTITION_WORKERS). `seeds` ({class: [location index]}, see
+    Partition.seeds_from_json) reuses a previous day's medoids as starting points.
+    """
+    capacity = TRUCK_CAPACITY if capacity is None else capacity
+    workers = PARTITION_WORKERS if workers is None else workers
+    max_iters = PARTITION_MAX_ITERS if max_iters is None else max_iters
+    hub = ds.index_of(HUB_ADDRESS)
+
+    by_class: dict = {}
+    for p in packages:
+        if p.status != "at_hub":
+            continue
+        ds.package_index(p)
+        key = (p.truck_mask, max(p.available_time_min or 0, p.address_fix_time_min or 0))
+        by_class.setdefault(key, []).append(p)
+    classes = sorted(by_class.items(), key=lambda kv: kv[0])
+    seeds = seeds or {}
+
+    if workers <= 1 or len(classes) <= 1:
+        parts = _partition_classes(ds, classes, capacity, hub, seeds, max_iters)
+    else:
+        chunks = [classes[w::workers] for w in range(min(workers, len(classes)))]
+        with ProcessPoolExecutor(max_workers=len(chunks)) as pool:
+            futures = [pool.submit(_partition_classes, ds, chunk, capacity, hub, seeds, max_iters)
+                       for chunk in chunks]
+            parts = [c for f in futures for c in f.result()]
+    parts.sort(key=lambda c: (c[2], c[1], c[0]))   # same order however the classes were split
+    return Partition([c[0] for c in parts], [c[1] for c in parts], [c[2] for c in parts])
@@ -1,84 +1,767 @@
-import re
-from config import TRUCK_CAPACITY, HUB_ADDRESS
-
-def _deadline_to_minutes_since_8(deadline: str) -> int:
-    s = (deadline or "").strip().upper()
-    if s in {"", "EOD"}:
-        hh, mm = 17, 0
-    else:
-        m = re.match(r"^\s*(\d{1,2}):(\d{2})\s*(AM|PM)?\s*$", s)
-        if m:
-            hh = int(m.group(1)); mm = int(m.group(2)); ap = m.group(3)
-            if ap == "PM" and hh != 12: hh += 12
-            if ap == "AM" and hh == 12: hh = 0
-        else:
-            try:
-                hh = int(s); mm = 0
-            except:
-                hh, mm = 17, 0
-    return max(0, (hh * 60 + mm) - (8 * 60))
+import random
+import time
+from array import array
+from collections import Counter, deque
+from concurrent.futures import ProcessPoolExecutor
+from config import (TRUCK_CAPACITY, HUB_ADDRESS, SPEED_MPH, IMPROVE_NEIGHBORS, IMPROVE_TIME_BUDGET_S,
+                    IMPROVE_MAX_ITERS, PLANNER_MODE, GRASP_STARTS, GRASP_WORKERS, GRASP_ALPHA, GRASP_SEED,
+                    INSERTION_POOL, HELD_KARP_MAX_STOPS, HELD_KARP_RETURN, IMPROVE_GAP_TARGET)
+from core.metrics import NULL_METRICS
+from routing.bounds import gap, path_lower_bound, trip_lower_bound
 
 def _eligible_for_truck(p, truck_id: int, depart_min: int) -> bool:
-    if getattr(p, "truck_restriction", None) == 2 and truck_id != 2:
+    m = p.truck_mask
+    if m and not m >> truck_id & 1:
         return False
-    at = getattr(p, "available_time_min", None)
-    if at is not None and depart_min < at:
-        return False
-    ft = getattr(p, "address_fix_time_min", None)
-    if ft is not None and depart_min < ft:
+    return (p.available_time_min or 0) <= depart_min and (p.address_fix_time_min or 0) <= depart_min
+
+def _neighbor_lists(D, k: int) -> list:
+    """k nearest other nodes per node (by the trip-local distance table D)."""
+    nodes = range(len(D))
+    return [sorted((b for b in nodes if b != a), key=D[a].__getitem__)[:k] for a in nodes]
+
+class _TimeWindows:
+    """
+    Arrival times and forward slack along an open route from the HUB (node 0), timed
+    like simulate_route: wait for a node's address fix before driving to it, then
+    travel(a, b) minutes. fs[k] is how far arrival at position k may slip before
+    some position >= k misses its deadline (waits absorb delay), so "does this change
+    make anything downstream late?" is a single comparison.
+    """
+
+    def __init__(self, travel, dls: list, fixes: list, depart_min: int):
+        self.travel = travel          # travel(node_a, node_b) -> minutes
+        self.dl = dls                 # per node; node 0 (HUB) has no deadline
+        self.fix = fixes              # per node, None = no address-fix wait
+        self.depart = int(depart_min)
+        self.t: list = []
+        self.fs: list = []
+        self.late = 0
+
+    def _next(self, t: int, a: int, b: int) -> int:
+        f = self.fix[b]
+        if f is not None and t < f:
+            t = f
+        return t + self.travel(a, b)
+
+    def reset(self, seq: list) -> None:
+        n = len(seq)
+        t = [self.depart] * n
+        for k in range(1, n):
+            t[k] = self._next(t[k - 1], seq[k - 1], seq[k])
+        fs = [float("inf")] * (n + 1)
+        for k in range(n - 1, 0, -1):
+            slip = fs[k + 1]
+            if k + 1 < n:
+                f = self.fix[seq[k + 1]]
+                slip += max(0, f - t[k]) if f is not None else 0
+            fs[k] = min(self.dl[seq[k]] - t[k], slip)
+        self.t, self.fs = t, fs
+        self.late = sum(1 for k in range(1, n) if t[k] > self.dl[seq[k]])
+
+    def insertion(self, seq: list, k: int, x: int):
+        """
+        Inserting node x after position k: returns (x's arrival, downstream ok).
+        O(1) using t / fs of the current `seq`.
+        """
+        tx = self._next(self.t[k], seq[k], x)
+        if k + 1 >= len(seq):
+            return tx, True
+        shift = self._next(tx, x, seq[k + 1]) - self.t[k + 1]
+        return tx, shift <= self.fs[k + 1]
+
+    def accepts(self, seq: list, new_seq: list) -> bool:
+        """True if new_seq (same nodes, HUB first) adds no late delivery relative to seq."""
+        if self.late:
+            probe = _TimeWindows(self.travel, self.dl, self.fix, self.depart)
+            probe.reset(new_seq)
+            return probe.late <= self.late
+        n = len(seq)
+        lo = 1
+        while lo < n and seq[lo] == new_seq[lo]:
+            lo += 1
+        hi = n - 1
+        while hi > lo and seq[hi] == new_seq[hi]:
+            hi -= 1
+        t = self.t[lo - 1]
+        for k in range(lo, hi + 1):
+            t = self._next(t, new_seq[k - 1], new_seq[k])
+            if t > self.dl[new_seq[k]]:
+                return False
+        if hi + 1 < n:
+            return self._next(t, new_seq[hi], new_seq[hi + 1]) - self.t[hi + 1] <= self.fs[hi + 1]
+        return True
+
+def _local_search(D, time_budget_s=None, max_iters=None, k=IMPROVE_NEIGHBORS, tw=None, metrics=None,
+                  stop_at=None) -> list:
+    """
+    2-opt + Or-opt (segments of 1..3) over an open path that starts at node 0 (HUB).
+    D is the trip-local distance table; returns the improved node order.
+    Moves are only tried towards each node's k nearest neighbours, and a node whose
+    neighbourhood yielded nothing is skipped (don't-look bit) until an applied move
+    touches it again. Stops at a local optimum or when the time/move budget runs out.
+    With a _TimeWindows `tw`, improving moves that would add a late delivery are skipped.
+    metrics (core.metrics) gets the 2-opt / Or-opt node scans tried and moves applied.
+    stop_at: also stop once the path is no longer than this (a lower bound plus the gap target).
+    """
+    n = len(D)
+    seq = list(range(n))
+    if n < 4:
+        return seq
+    pos = list(range(n))
+    nbrs = _neighbor_lists(D, k)
+    if tw is not None:
+        tw.reset(seq)
+
+    def d(a, b):  # b is None past the last stop: open path, no return leg
+        return 0.0 if b is None else D[a][b]
+
+    def at(i):
+        return seq[i] if i < n else None
+
+    queue = deque(range(n))
+    queued = [True] * n
+    deadline = None if time_budget_s is None else time.perf_counter() + time_budget_s
+    applied = 0
+    scans = two_opt_applied = 0
+    length = sum(d(seq[i], at(i + 1)) for i in range(n)) if stop_at is not None else 0.0
+
+    def wake(*nodes):
+        for v in nodes:
+            if v is not None and not queued[v]:
+                queued[v] = True
+                queue.append(v)
+
+    def try_two_opt(a):
+        p = pos[a]
+        for c in nbrs[a]:
+            q = pos[c]
+            lo, hi = (p, q) if p < q else (q, p)
+            # new edge (s_i, s_j) = {a, c}, or new edge (s_i+1, s_j+1) = {a, c}
+            for i, j in ((lo, hi), (lo - 1, hi - 1)):
+                if i < 0 or j - i < 2:
+                    continue
+                si, si1, sj, sj1 = seq[i], seq[i + 1], seq[j], at(j + 1)
+                delta = D[si][sj] + d(si1, sj1) - D[si][si1] - d(sj, sj1)
+                if delta < -1e-9:
+                    if tw is not None:
+                        new = seq[:i + 1] + seq[i + 1:j + 1][::-1] + seq[j + 1:]
+                        if not tw.accepts(seq, new):
+                            continue
+                    seq[i + 1:j + 1] = reversed(seq[i + 1:j + 1])
+                    for t in range(i + 1, j + 1):
+                        pos[seq[t]] = t
+                    wake(si, si1, sj, sj1)
+                    return delta
+        return None
+
+    def try_or_opt(a):
+        p = pos[a]
+        if p == 0:
+            return None
+        for L in (1, 2, 3):
+            e = p + L - 1
+            if e >= n:
+                break
+            prev, first, last, nxt = seq[p - 1], seq[p], seq[e], at(e + 1)
+            gain = D[prev][first] + d(last, nxt) - d(prev, nxt)
+            for c in nbrs[a]:
+                q = pos[c]
+                # gap g = insert between s_g and s_g+1; a stays adjacent to c
+                for g, rev in ((q, False), (q - 1, True)):
+                    if g < 0 or p - 1 <= g <= e:
+                        continue
+                    left, right = seq[g], at(g + 1)
+                    if rev:
+                        add = D[left][last] + D[first][right] - D[left][right]
+                    else:
+                        add = D[left][first] + d(last, right) - d(left, right)
+                    if add - gain < -1e-9:
+                        seg = seq[p:e + 1]
+                        if rev:
+                            seg.reverse()
+                        rest = seq[:p] + seq[e + 1:]
+                        ins = g + 1 if g < p else g + 1 - L
+                        new = rest[:ins] + seg + rest[ins:]
+                        if tw is not None and not tw.accepts(seq, new):
+                            continue
+                        seq[:] = new
+                        for t, v in enumerate(seq):
+                            pos[v] = t
+                        wake(prev, first, last, nxt, left, right)
+                        return add - gain
+        return None
+
+    while queue:
+        if deadline is not None and time.perf_counter() > deadline:
+            break
+        if max_iters is not None and applied >= max_iters:
+            break
+        if stop_at is not None and length <= stop_at:
+            break
+        a = queue.popleft()
+        queued[a] = False
+        scans += 1
+        delta = try_two_opt(a)
+        if delta is not None:
+            two_opt_applied += 1
+        else:
+            delta = try_or_opt(a)
+            if delta is None:
+                continue
+        applied += 1
+        length += delta
+        wake(a)
+        if tw is not None:
+            tw.reset(seq)
+    if metrics is not None:
+        metrics.count("two_opt_tried", scans)
+        metrics.count("two_opt_applied", two_opt_applied)
+        metrics.count("or_opt_tried", scans - two_opt_applied)
+        metrics.count("or_opt_applied", applied - two_opt_applied)
+    return seq
+
+def _improve_order(ds, hub: int, locs: list, order: list, time_budget_s=IMPROVE_TIME_BUDGET_S,
+                   max_iters=IMPROVE_MAX_ITERS, k_neighbors: int = IMPROVE_NEIGHBORS, windows=None,
+                   metrics=None, gap_target=IMPROVE_GAP_TARGET) -> list:
+    """
+    Reorder candidate positions `order` (HUB start implied) with _local_search.
+    windows = (dls, fixes, depart_min, speed_mph) per candidate position enables the
+    deadline guard, so no move makes a delivery late.
+    gap_target: stop as soon as the route is within this gap of its MST lower bound.
+    """
+    if len(order) < 3:
+        return order
+    nodes = [hub] + [locs[i] for i in order]
+    dist = ds.distance_by_idx
+    # one distance lookup per pair of distinct locations (grouped packages often share one)
+    uniq = list(dict.fromkeys(nodes))
+    row = {a: {b: dist(a, b) for b in uniq} for a in uniq}
+    D = [[row[a][b] for b in nodes] for a in nodes]
+    stop_at = None if gap_target is None else path_lower_bound(D) / (1.0 - gap_target)
+    tw = None
+    if windows is not None:
+        dls, fixes, depart_min, speed_mph = windows
+        tw = _TimeWindows(lambda a, b: int(round(60.0 * D[a][b] / speed_mph)),
+                          [float("inf")] + [dls[i] for i in order], [None] + [fixes[i] for i in order], depart_min)
+    seq = _local_search(D, time_budget_s, max_iters, k_neighbors, tw, metrics, stop_at)
+    return [order[v - 1] for v in seq[1:]]
+
+def improve_route(ds, route: list, time_budget_s=IMPROVE_TIME_BUDGET_S, max_iters=IMPROVE_MAX_ITERS,
+                  k_neighbors: int = IMPROVE_NEIGHBORS) -> list:
+    """Reorder a planned route (packages, HUB start implied) with _local_search."""
+    locs = [ds.package_index(p) for p in route]
+    order = _improve_order(ds, ds.index_of(HUB_ADDRESS), locs, list(range(len(route))),
+                           time_budget_s, max_iters, k_neighbors)
+    return [route[i] for i in order]
+
+def _held_karp(ds, hub: int, locs: list, order: list, dls: list, fixes: list, depart_min: int,
+               speed_mph: float, closed: bool = False):
+    """
+    Minimum-miles order of the candidate positions in `order` by Held-Karp bitmask DP
+    (O(2^n n^2) for n positions; meant for n <= HELD_KARP_MAX_STOPS). State (S, j) is
+    "visited set S, now at j"; flat array tables hold miles, arrival minute and
+    predecessor for two labels per state: the cheapest path and the earliest-arriving
+    one. Arrivals are timed like simulate_route (address-fix waits, per-leg rounded
+    minutes) and a transition that would arrive after the deadline is dropped, so only
+    on-time orders are built. Exact when deadlines don't bind; when they do, the
+    earliest label keeps the tight orders reachable (a heuristic, not a full Pareto set).
+    closed=True adds the leg back to the HUB.
+    Returns the order, or None if no on-time order was found.
+    """
+    n = len(order)
+    if n < 2:
+        return list(order)
+    nodes = [hub] + [locs[i] for i in order]
+    dist = ds.distance_by_idx
+    uniq = list(dict.fromkeys(nodes))
+    row = {a: {b: dist(a, b) for b in uniq} for a in uniq}
+    D = [[row[a][b] for b in nodes] for a in nodes]
+    T = [[int(round(60.0 * d / speed_mph)) for d in r] for r in D]
+    dl = [dls[i] for i in order]
+    fx = [fixes[i] for i in order]
+
+    # slot (S, j, label) = 2 * (S * n + j) + label; label 0 = cheapest, 1 = earliest
+    size = 1 << n
+    inf = float("inf")
+    cost = array("d", [inf]) * (2 * size * n)
+    arrive = array("q", [0]) * (2 * size * n)
+    parent = array("b", [-1]) * (2 * size * n)    # predecessor slot's 2 * j + label
+    start = int(depart_min)
+    for k in range(n):
+        t = (start if fx[k] is None or start >= fx[k] else fx[k]) + T[0][k + 1]
+        if t <= dl[k]:
+            s = 2 * ((1 << k) * n + k)
+            cost[s] = cost[s + 1] = D[0][k + 1]
+            arrive[s] = arrive[s + 1] = t
+
+    for mask in range(1, size):
+        free = ~mask & (size - 1)
+        if not free:
+            break                      # the full set is the last mask
+        for j in range(n):
+            here = 2 * (mask * n + j)
+            if cost[here] == inf:
+                continue
+            Dj, Tj = D[j + 1], T[j + 1]
+            same = cost[here] == cost[here + 1] and arrive[here] == arrive[here + 1]
+            for label in ((0,) if same else (0, 1)):
+                c, t0 = cost[here + label], arrive[here + label]
+                rest = free
+                while rest:
+                    low = rest & -rest
+                    rest ^= low
+                    k = low.bit_length() - 1
+                    t = (t0 if fx[k] is None or t0 >= fx[k] else fx[k]) + Tj[k + 1]
+                    if t > dl[k]:
+                        continue
+                    s = 2 * ((mask | low) * n + k)
+                    nc = c + Dj[k + 1]
+                    if nc < cost[s] - 1e-9 or (nc <= cost[s] + 1e-9 and t < arrive[s]):
+                        cost[s], arrive[s], parent[s] = nc, t, 2 * j + label
+                    if t < arrive[s + 1] or cost[s + 1] == inf or (t == arrive[s + 1] and nc < cost[s + 1] - 1e-9):
+                        cost[s + 1], arrive[s + 1], parent[s + 1] = nc, t, 2 * j + label
+
+    full = 2 * (size - 1) * n
+    best, last = inf, -1
+    for j in range(n):
+        c = cost[full + 2 * j] + (D[j + 1][0] if closed else 0.0)
+        if c < best - 1e-9:
+            best, last = c, 2 * j
+    if last == -1:
+        return None
+    seq, mask = [], size - 1
+    while last != -1:
+        j = last >> 1
+        seq.append(order[j])
+        last, mask = parent[2 * (mask * n + j) + (last & 1)], mask ^ (1 << j)
+    seq.reverse()
+    return seq
+
+def _exact_order(ds, hub: int, locs: list, order: list, dls: list, fixes: list, depart_min: int,
+                 speed_mph: float) -> list:
+    """Held-Karp order of `order`'s stops if it beats `order` on (late, miles); else `order`."""
+    hk = _held_karp(ds, hub, locs, order, dls, fixes, depart_min, speed_mph, HELD_KARP_RETURN)
+    if hk is None:
+        return order
+
+    def key(o):
+        late, miles = _evaluate(ds, hub, locs, dls, fixes, o, depart_min, speed_mph)
+        return late, miles + (ds.distance_by_idx(locs[o[-1]], hub) if HELD_KARP_RETURN else 0.0)
+    return hk if key(hk) < key(order) else order
+
+def _within_gap(ds, hub: int, locs: list, dls: list, fixes: list, order: list, depart_min: int,
+                speed_mph: float) -> bool:
+    """True if `order` is already within IMPROVE_GAP_TARGET of its lower bound (never when unset)."""
+    if IMPROVE_GAP_TARGET is None:
         return False
-    return True
-
-def _two_opt_once(route, ds):
-    if len(route) < 4:
-        return route
-    best = route[:]
-    improved = True
-    while improved:
-        improved = False
-        for i in range(0, len(best) - 3):
-            A = HUB_ADDRESS if i == 0 else best[i - 1].address
-            B = best[i].address
-            for k in range(i + 1, len(best) - 1):
-                C = best[k].address
-                D = best[k + 1].address
-                before = ds.get_distance(A, B) + ds.get_distance(C, D)
-                after  = ds.get_distance(A, C) + ds.get_distance(B, D)
-                if after + 1e-9 < before:
-                    best[i:k+1] = reversed(best[i:k+1])
-                    improved = True
-                    break
-            if improved:
+    miles = _evaluate(ds, hub, locs, dls, fixes, order, depart_min, speed_mph)[1]
+    return gap(miles, trip_lower_bound(ds, [locs[i] for i in order], hub)) <= IMPROVE_GAP_TARGET
+
+def _evaluate(ds, hub: int, locs: list, dls: list, fixes: list, order: list, depart_min: int,
+              speed_mph: float) -> tuple:
+    """(late deliveries, miles) for visiting `order`, timed exactly like simulate_route."""
+    dist = ds.distance_by_idx
+    t = int(depart_min); miles = 0.0; late = 0; curr = hub
+    for i in order:
+        if fixes[i] is not None and t < fixes[i]:
+            t = fixes[i]
+        d = dist(curr, locs[i])
+        t += int(round(60.0 * d / speed_mph))
+        miles += d
+        curr = locs[i]
+        if t > dls[i]:
+            late += 1
+    return late, miles
+
+#  Construction
+def _unit(ds, locs: list, i: int, mates) -> list:
+    """Candidate i plus its group mates, mates ordered by distance from i."""
+    if not mates or not mates[i]:
+        return [i]
+    d = ds.distance_by_idx
+    return [i] + sorted(mates[i], key=lambda m: d(locs[i], locs[m]))
+
+def _consolidate(locs: list, dls: list, fixes: list, mates, capacity: int) -> tuple:
+    """
+    Collapse candidates into stops. Ungrouped candidates at the same location share a
+    stop of at most `capacity` packages (earliest deadline first); grouped candidates
+    stay one stop each so group mates keep pointing at single stops. Per stop: its
+    members, location, earliest deadline, latest address fix, size and mate stops.
+    Returns (members, locs, dls, fixes, sizes, mates) with mates None if ungrouped.
+    """
+    members: list = []
+    by_loc: dict[int, int] = {}                 # location -> its open (not full) stop
+    stop_of = [0] * len(locs)
+    for i in sorted(range(len(locs)), key=lambda i: (dls[i], i)):
+        if mates and mates[i]:
+            s = len(members)
+            members.append([i])
+        else:
+            s = by_loc.get(locs[i])
+            if s is None or len(members[s]) >= capacity:
+                s = by_loc[locs[i]] = len(members)
+                members.append([])
+            members[s].append(i)
+        stop_of[i] = s
+    s_locs = [locs[m[0]] for m in members]
+    s_dls = [dls[m[0]] for m in members]       # members are deadline-ordered
+    s_fixes = [max((fixes[i] for i in m if fixes[i] is not None), default=None) for m in members]
+    s_sizes = [len(m) for m in members]
+    s_mates = None
+    if mates:
+        s_mates = [tuple(stop_of[j] for j in mates[m[0]]) if len(m) == 1 else () for m in members]
+    return members, s_locs, s_dls, s_fixes, s_sizes, s_mates
+
+def _trim_overflow(order: list, members: list, capacity: int, mates) -> None:
+    """
+    Constructions may take a whole ungrouped stop into the last free slots. Drop the
+    excess latest-deadline packages from the smallest ungrouped stop that can absorb it
+    (it stays on the route; the dropped packages stay at the hub).
+    """
+    excess = sum(len(members[s]) for s in order) - capacity
+    if excess <= 0:
+        return
+    for s in sorted(order, key=lambda s: len(members[s])):
+        if len(members[s]) > excess and not (mates and mates[s]):
+            members[s] = members[s][:len(members[s]) - excess]
+            return
+
+def _group_mates(groups: list, capacity: int):
+    """
+    Per candidate, the other candidate positions of its group (groups[i] = -1: none),
+    or None when nothing is grouped. A group larger than `capacity` can't ride as one
+    unit, so its members are split into singles.
+    """
+    if all(g == -1 for g in groups):
+        return None
+    pos: dict[int, list] = {}
+    for i, g in enumerate(groups):
+        if g != -1:
+            pos.setdefault(g, []).append(i)
+    return [tuple(j for j in pos[g] if j != i) if g != -1 and len(pos[g]) <= capacity else ()
+            for i, g in enumerate(groups)]
+
+def _construct_greedy(ds, hub: int, locs: list, dls: list, capacity: int, mates=None, sizes=None) -> list:
+    """
+    NN (distance, tie-break earlier deadline); one nearest_candidate call per step.
+    Picking a grouped candidate takes its whole group (mates[i]) or, if the group no
+    longer fits, none of it. sizes[i] is how many packages candidate i carries (default 1);
+    an ungrouped multi-package stop may overflow the last slots (see _trim_overflow).
+    """
+    arr_locs, arr_dls, active = ds.candidate_arrays(locs, dls)
+    order = []
+    load = 0
+    curr = hub
+    while load < capacity:
+        pos = ds.nearest_candidate(curr, arr_locs, arr_dls, active)
+        if pos == -1:
+            break
+        unit = _unit(ds, locs, pos, mates)
+        for i in unit:
+            active[i] = False
+        need = len(unit) if sizes is None else sum(sizes[i] for i in unit)
+        if load + need > capacity and len(unit) > 1:
+            continue
+        order.extend(unit)
+        load += need
+        curr = locs[unit[-1]]
+    return order
+
+def _construct_grasp(ds, hub: int, locs: list, capacity: int, rng, alpha: float) -> list:
+    """
+    Randomized NN: each step draws uniformly from the restricted candidate list
+    {d <= d_min + alpha * (d_max - d_min)} of the remaining candidates.
+    """
+    dist = ds.distance_by_idx
+    remaining = list(range(len(locs)))
+    order = []
+    curr = hub
+    while remaining and len(order) < capacity:
+        ds_ = [dist(curr, locs[i]) for i in remaining]
+        lo, hi = min(ds_), max(ds_)
+        cut = lo + alpha * (hi - lo)
+        rcl = [k for k, d in enumerate(ds_) if d <= cut]
+        k = rcl[rng.randrange(len(rcl))]
+        order.append(remaining[k])
+        curr = locs[remaining[k]]
+        remaining[k] = remaining[-1]
+        remaining.pop()
+    return order
+
+def _construct_insertion(ds, hub: int, locs: list, dls: list, fixes: list, depart_min: int, capacity: int,
+                         speed_mph: float, pool: int = 0, mates=None, sizes=None) -> list:
+    """
+    Deadline-aware cheapest insertion. Repeatedly inserts the (package, position) with
+    the lowest added miles among those that keep every routed package on time; the
+    O(1) downstream check uses _TimeWindows slack. A package that cannot itself make
+    its deadline is only taken once no on-time insertion is left.
+    pool > 0 limits the candidates to the `pool` most urgent (deadline, then HUB distance).
+    Inserting a grouped candidate also inserts its mates, each at its cheapest position
+    that keeps every routed package on time. If a mate would itself be late the group is
+    undone and, like a late package, only taken once no on-time insertion is left.
+    """
+    dist = ds.distance_by_idx
+    n = len(locs)
+    loc = [hub] + list(locs)                      # node 0 = HUB, node i+1 = candidate i
+    tw = _TimeWindows(lambda a, b: int(round(60.0 * dist(loc[a], loc[b]) / speed_mph)),
+                      [float("inf")] + list(dls), [None] + list(fixes), depart_min)
+
+    unrouted = list(range(1, n + 1))
+    if pool and n > pool:
+        unrouted.sort(key=lambda x: (tw.dl[x], dist(hub, loc[x]), x))
+        keep = set(unrouted[:pool])
+        if mates:
+            keep.update(m + 1 for x in list(keep) for m in mates[x - 1])
+        unrouted = sorted(keep)
+
+    def best_position(seq, x):
+        # (x late, k) for the cheapest position in seq (tw reset to it) that makes no routed stop
+        # late, on-time x first; appending never delays anything, so there always is one
+        best = None
+        lx = loc[x]
+        for k in range(len(seq)):
+            tx, ok = tw.insertion(seq, k, x)
+            if not ok:
+                continue
+            a = loc[seq[k]]
+            cost = dist(a, lx) + (dist(lx, loc[seq[k + 1]]) - dist(a, loc[seq[k + 1]]) if k + 1 < len(seq) else 0)
+            key = (tx > tw.dl[x], cost)
+            if best is None or key < best[0]:
+                best = (key, k)
+        return best[0][0], best[1]
+
+    size = [1] * (n + 1) if sizes is None else [0] + list(sizes)
+    need = [size[x] + (sum(size[m + 1] for m in mates[x - 1]) if mates else 0) for x in range(n + 1)]
+    seq = [0]
+    load = 0
+    blocked = set()                           # anchors whose group can't all be on time
+    tw.reset(seq)
+    while unrouted and load < capacity:
+        best = None
+        for ux, x in enumerate(unrouted):
+            lx = loc[x]
+            if load + need[x] > capacity and mates and mates[x - 1]:
+                continue                      # its group no longer fits
+            for k in range(len(seq)):
+                tx, ok = tw.insertion(seq, k, x)
+                if not ok:
+                    continue
+                a = loc[seq[k]]
+                if k + 1 < len(seq):
+                    b = loc[seq[k + 1]]
+                    cost = dist(a, lx) + dist(lx, b) - dist(a, b)
+                else:
+                    cost = dist(a, lx)
+                key = (tx > tw.dl[x] or x in blocked, cost, tw.dl[x], x)
+                if best is None or key < best[0]:
+                    best = (key, ux, k)
+        if best is None:
+            break
+        (late, *_), ux, k = best
+        x = unrouted[ux]
+        trial = seq[:k + 1] + [x] + seq[k + 1:]
+        tw.reset(trial)
+        for m in (mates[x - 1] if mates else ()):   # the rest of its group rides along
+            mate_late, pos = best_position(trial, m + 1)
+            if mate_late and not late:
                 break
+            trial.insert(pos + 1, m + 1)
+            tw.reset(trial)
+        else:
+            seq = trial
+            load += need[x]
+            unrouted[ux] = unrouted[-1]
+            unrouted.pop()
+            for m in (mates[x - 1] if mates else ()):
+                unrouted.remove(m + 1)
+            continue
+        blocked.add(x)                        # undo the group: a mate would be late
+        tw.reset(seq)
+    return [x - 1 for x in seq[1:]]
+
+def _grasp_starts(ds, hub, locs, dls, fixes, depart_min, capacity, speed_mph, alpha, seed, starts,
+                  mates=None, sizes=None, metrics=None) -> tuple:
+    """
+    Best (key, order) over the given start numbers. Every start routes the package set
+    the greedy picks: start 0 is the greedy order itself, start s > 0 a randomized
+    construction over that set (seeded by seed, s). Keeping the set fixed matters:
+    ranking routes over different sets by miles favours trips that leave far packages
+    for later trips and raises the day total.
+    """
+    chosen = _construct_greedy(ds, hub, locs, dls, capacity, mates, sizes)
+    sub = [locs[i] for i in chosen]
+    best = None
+    for s in starts:
+        if s == 0:
+            order = chosen
+        else:
+            order = [chosen[k] for k in _construct_grasp(ds, hub, sub, len(sub),
+                                                         random.Random(seed * 1_000_003 + s), alpha)]
+        order = _improve_order(ds, hub, locs, order, windows=(dls, fixes, depart_min, speed_mph),
+                               metrics=metrics)
+        key = _evaluate(ds, hub, locs, dls, fixes, order, depart_min, speed_mph)
+        if best is None or key < best[0]:
+            best = (key, order)
     return best
 
-def plan_route_for_truck(ds, packages: list, truck_id: int, depart_time_min: int):
+_WORKER_DS = None  # per-process DistanceService, set once by _init_grasp_worker
+
+
+def _init_grasp_worker(ds) -> None:
+    global _WORKER_DS
+    _WORKER_DS = ds
+
+
+def _grasp_starts_in_worker(*args) -> tuple:
+    return _grasp_starts(_WORKER_DS, *args)
+
+
+def grasp_pool(ds, workers: int | None = None):
+    """
+    Process pool for GRASP starts (None when workers, default GRASP_WORKERS, is <= 1).
+    ds is sent to each worker once, so a caller planning many trips creates one pool
+    and passes it to every plan_route_for_truck call; the caller shuts it down.
+    """
+    workers = GRASP_WORKERS if workers is None else workers
+    if workers <= 1:
+        return None
+    return ProcessPoolExecutor(max_workers=workers, initializer=_init_grasp_worker, initargs=(ds,))
+
+def _plan_grasp(ds, hub, locs, dls, fixes, depart_min, capacity, speed_mph,
+                starts: int, workers: int, alpha: float, seed: int, mates=None, sizes=None,
+                metrics=None, pool=None) -> list:
+    """
+    Best of `starts` constructions + local search, by (late count, miles); ties keep the lower start.
+    metrics only sees in-process starts (worker processes don't report back).
+    pool (see grasp_pool) runs the starts; without one a pool is made for this call.
+    """
+    if workers <= 1 or starts <= 1:
+        return _grasp_starts(ds, hub, locs, dls, fixes, depart_min, capacity, speed_mph, alpha, seed,
+                             range(starts), mates, sizes, metrics)[1]
+    if pool is None:
+        with grasp_pool(ds, workers) as pool:
+            return _plan_grasp(ds, hub, locs, dls, fixes, depart_min, capacity, speed_mph, starts, workers,
+                               alpha, seed, mates, sizes, metrics, pool)
+    chunks = [list(range(w, starts, workers)) for w in range(min(workers, starts))]
+    futures = [pool.submit(_grasp_starts_in_worker, hub, locs, dls, fixes, depart_min, capacity, speed_mph,
+                           alpha, seed, chunk, mates, sizes) for chunk in chunks]
+    results = [(f.result(), min(chunk)) for f, chunk in zip(futures, chunks)]
+    return min(results, key=lambda r: (r[0][0], r[1]))[0][1]
+
+def plan_route_for_truck(ds, packages: list, truck_id: int, depart_time_min: int, batch=None,
+                         capacity: int | None = None, speed_mph: float | None = None, mode: str | None = None,
+                         metrics=None, max_miles: float | None = None, rejected: set | None = None,
+                         pool=None):
+    """
+    Pick and order up to `capacity` (default TRUCK_CAPACITY) eligible at-hub packages for one trip.
+    With a PackageBatch (rows aligned with `packages`) candidates are filtered on its
+    columns instead of Package attributes.
+    mode (default PLANNER_MODE):
+      "greedy" - nearest neighbour + local search
+      "grasp"  - best of GRASP_STARTS seeded randomized constructions (+ local search)
+                 over the greedy's package set, spread over GRASP_WORKERS processes
+                 (`pool`, from grasp_pool, if given; otherwise one made per call)
+      "insertion" - deadline-aware cheapest insertion + local search
+    Local search never applies a move that would make a delivery late. A trip of at most
+    HELD_KARP_MAX_STOPS stops is then re-ordered exactly (_held_karp) when that is better.
+    Packages sharing a group_id are planned as one unit: all of the group or none of it.
+    Routing runs over stops (packages sharing a location_idx, see _consolidate), so
+    co-located packages cost one node in construction and local search.
+    metrics (core.metrics.Metrics) gets the construct / improve timers and local-search counters.
+    max_miles: mileage budget left for this trip. If the chosen stops' lower bound
+    (routing.bounds.trip_lower_bound) already exceeds it, the trip is rejected ([])
+    before any improvement work; so is a finished route whose miles exceed it. The
+    IDs of a rejected trip's packages are added to `rejected`, if given.
+    """
     # 1) filter candidates
-    cand = []
-    for p in packages:
-        if getattr(p, "status", "at_hub") != "at_hub":
-            continue
-        if not _eligible_for_truck(p, truck_id, depart_time_min):
-            continue
-        cand.append(p)
+    if batch is not None:
+        rows = batch.candidates(truck_id, depart_time_min)
+        cand = [packages[i] for i in rows]
+        locs = [batch.location_idx[i] for i in rows]
+        locs = [l if l != -1 else ds.package_index(p) for l, p in zip(locs, cand)]
+        dls = [batch.deadline_min[i] for i in rows]
+    else:
+        cand = []
+        for p in packages:
+            if getattr(p, "status", "at_hub") != "at_hub":
+                continue
+            if not _eligible_for_truck(p, truck_id, depart_time_min):
+                continue
+            cand.append(p)
+        locs = [ds.package_index(p) for p in cand]
+        dls = [p.deadline_min for p in cand]
     if not cand:
         return []
 
-    # 2) greedy NN (distance, tie-break earlier deadline)
-    remaining = cand[:]
-    route = []
-    curr = HUB_ADDRESS
-    while remaining and len(route) < TRUCK_CAPACITY:
-        best_p, best_key = None, None
-        for p in remaining:
-            d  = ds.get_distance(curr, p.address)
-            dl = _deadline_to_minutes_since_8(getattr(p, "deadline", "EOD"))
-            key = (d, dl)
-            if best_key is None or key < best_key:
-                best_key = key; best_p = p
-        route.append(best_p)
-        remaining.remove(best_p)
-        curr = best_p.address
-
-    # 3) shave crossings
-    return _two_opt_once(route, ds)
+    # a deliver-together group is a candidate only if all of it is (at hub, eligible)
+    groups = [batch.group[i] for i in rows] if batch is not None else \
+        [-1 if p.group_id is None else p.group_id for p in cand]
+    if any(g != -1 for g in groups):
+        if batch is not None:
+            sizes = batch.group_size
+        else:
+            sizes = Counter(p.group_id for p in packages if p.group_id is not None)
+        have = Counter(groups)
+        keep = [k for k, g in enumerate(groups) if g == -1 or have[g] == sizes[g]]
+        if len(keep) < len(cand):
+            cand, locs, dls, groups = ([col[k] for k in keep] for col in (cand, locs, dls, groups))
+        if not cand:
+            return []
+
+    capacity = TRUCK_CAPACITY if capacity is None else capacity
+    speed_mph = SPEED_MPH if speed_mph is None else speed_mph
+    mode = PLANNER_MODE if mode is None else mode
+    hub = ds.index_of(HUB_ADDRESS)
+
+    fixes = [p.address_fix_time_min for p in cand]
+    # 2) route over stops (packages sharing a location), not individual packages
+    members, locs, dls, fixes, sizes, mates = _consolidate(locs, dls, fixes, _group_mates(groups, capacity),
+                                                           capacity)
+    windows = (dls, fixes, depart_time_min, speed_mph)
+    m = NULL_METRICS if metrics is None else metrics
+
+    def over_budget(order, miles=None):
+        if max_miles is None:
+            return False
+        if miles is None:
+            miles = trip_lower_bound(ds, [locs[s] for s in order], hub)
+        if miles <= max_miles:
+            return False
+        m.count("rejected_trips")
+        if rejected is not None:
+            rejected.update(cand[i].package_id for s in order for i in members[s])
+        return True
+
+    if mode == "grasp":
+        # constructions and their local searches interleave, so it is all "construct"
+        with m.timer("construct"):
+            order = _plan_grasp(ds, hub, locs, dls, fixes, depart_time_min, capacity, speed_mph,
+                                GRASP_STARTS, GRASP_WORKERS, GRASP_ALPHA, GRASP_SEED, mates, sizes, metrics, pool)
+        if over_budget(order):
+            return []
+    elif mode in ("greedy", "insertion"):
+        # 3) construction, 4) local search (2-opt + Or-opt) within the configured budget
+        with m.timer("construct"):
+            if mode == "greedy":
+                order = _construct_greedy(ds, hub, locs, dls, capacity, mates, sizes)
+            else:
+                order = _construct_insertion(ds, hub, locs, dls, fixes, depart_time_min, capacity, speed_mph,
+                                             INSERTION_POOL, mates, sizes)
+        if over_budget(order):
+            return []
+        with m.timer("improve"):
+            order = _improve_order(ds, hub, locs, order, windows=windows, metrics=metrics)
+    else:
+        raise ValueError(f"Unknown planner mode: {mode!r}")
+    if 1 < len(order) <= HELD_KARP_MAX_STOPS and not _within_gap(ds, hub, locs, dls, fixes, order,
+                                                                 depart_time_min, speed_mph):
+        # few enough stops: take the exact order if it beats the heuristic one
+        with m.timer("exact"):
+            order = _exact_order(ds, hub, locs, order, dls, fixes, depart_time_min, speed_mph)
+    # 5) expand stops back to packages (earliest deadline first within a stop)
+    _trim_overflow(order, members, capacity, mates)
+    if max_miles is not None and over_budget(order, _evaluate(ds, hub, locs, dls, fixes, order,
+                                                              depart_time_min, speed_mph)[1]):
+        return []
+    return [cand[i] for s in order for i in members[s]]
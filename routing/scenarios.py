@@ -0,0 +1,110 @@
+import copy
+import os
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+
+from routing.constraints import apply_constraints
+from routing.scheduler import run_full_plan
+
+# Override keys (config names) -> run_full_plan / apply_constraints parameters
+_PLAN_KEYS = {"SPEED_MPH": "speed_mph", "TRUCK_CAPACITY": "capacity", "FLEET": "fleet",
+              "NUM_DRIVERS": "drivers", "START_MIN": "start_min", "PLANNER_MODE": "planner_mode",
+              "PARTITION": "partition"}
+_CONSTRAINT_KEYS = {"ONLY_TRUCK2": "only_truck2", "DELAYED_905": "delayed", "ADDR_FIX_1020": "addr_fix",
+                    "ARRIVAL_905_MIN": "arrival_min", "ADDR_FIX_1020_MIN": "addr_fix_min"}
+
+_WORKER_DS = None  # per-process DistanceService, mapped once by _init_worker
+
+
+def _init_worker(cache_path: str, use_numpy: bool) -> None:
+    global _WORKER_DS
+    from data.distance_service import DistanceService
+    _WORKER_DS = DistanceService(use_numpy=use_numpy)
+    _WORKER_DS.load_binary(cache_path)   # read-only pages shared across workers
+
+
+def _split_overrides(overrides: dict):
+    plan, cons = {}, {}
+    for k, v in overrides.items():
+        if k == "name":
+            continue
+        if k in _PLAN_KEYS:
+            plan[_PLAN_KEYS[k]] = v
+        elif k in _CONSTRAINT_KEYS:
+            cons[_CONSTRAINT_KEYS[k]] = v
+        else:
+            raise ValueError(f"Unknown scenario override: {k!r}")
+    return plan, cons
+
+
+def run_scenario(ds, packages: list, overrides: dict) -> dict:
+    """
+    Run one what-if plan on private copies of `packages` (the caller's objects are
+    never touched) and return its summary row.
+    """
+    plan, cons = _split_overrides(overrides)
+    pkgs = [copy.copy(p) for p in packages]   # detached from any HashTable
+    for p in pkgs:
+        p.status = "at_hub"
+        p.delivery_min = None
+        p.truck_id = None
+        p.board_time_min = None
+    if cons:
+        apply_constraints(pkgs, **cons)
+
+    result = run_full_plan(ds, pkgs, **plan)
+    # late counts deliveries after the deadline; packages never delivered are "undelivered"
+    late = sum(1 for p in pkgs if p.delivery_min is not None and p.delivery_min > p.deadline_min)
+    return {
+        "name": overrides.get("name", ", ".join(f"{k}={v}" for k, v in overrides.items())),
+        "total_miles": result["total_miles"],
+        "late": late,
+        "undelivered": len(result["undelivered"]),
+        "delivered": result["delivered"],
+        "total_packages": result["total_packages"],
+        "finish": max((t["return"] for t in result["trips"]), default=0),
+        "trips": len(result["trips"]),
+    }
+
+
+def _run_in_worker(packages: list, overrides: dict) -> dict:
+    return run_scenario(_WORKER_DS, packages, overrides)
+
+
+def run_scenarios(ds, packages: list, scenarios: list, workers: int | None = None) -> list:
+    """
+    Run every override dict in `scenarios` against the same base packages and
+    return their summary rows in input order. With workers > 1 each plan runs in a
+    ProcessPoolExecutor worker that memory-maps the distance matrix from the binary
+    cache (exported to a temp file first if `ds` was loaded from CSV).
+    """
+    if workers is None:
+        workers = os.cpu_count() or 1
+    if workers <= 1 or len(scenarios) <= 1:
+        return [run_scenario(ds, packages, o) for o in scenarios]
+
+    tmp = None
+    cache_path = ds.cache_path
+    if cache_path is None:
+        fd, tmp = tempfile.mkstemp(suffix=".dmx")
+        os.close(fd)
+        ds.export_binary(tmp)
+        cache_path = tmp
+    try:
+        with ProcessPoolExecutor(max_workers=min(workers, len(scenarios)), initializer=_init_worker,
+                                 initargs=(cache_path, ds.use_numpy)) as pool:
+            futures = [pool.submit(_run_in_worker, packages, o) for o in scenarios]
+            return [f.result() for f in futures]
+    finally:
+        if tmp is not None:
+            os.remove(tmp)
+
+
+def format_comparison(rows: list) -> str:
+    """Plain-text comparison table of scenario rows."""
+    from reporting.status import minutes_to_str
+    lines = [f"{'Scenario':<32} {'Miles':>7} {'Late':>5} {'Undel':>5} {'Deliv':>7} {'Trips':>5} {'Finish':>6}"]
+    for r in rows:
+        lines.append(f"{r['name'][:32]:<32} {r['total_miles']:7.1f} {r['late']:5d} {r['undelivered']:5d} "
+                     f"{r['delivered']:3d}/{r['total_packages']:<3d} {r['trips']:5d} {minutes_to_str(r['finish']):>6}")
+    return "\n".join(lines)
@@ -1,79 +1,548 @@
-from routing.planner import plan_route_for_truck
+import heapq
+from config import FLEET, NUM_DRIVERS, TRUCK_CAPACITY, SPEED_MPH, HUB_ADDRESS, PARTITION, METRICS, PLANNER_MODE
+from core.metrics import Metrics, NULL_METRICS
+from core.models import Package, PackageBatch
+from reporting.timeline import Event, StatusTimeline, sort_events
+from routing.bounds import day_lower_bound, gap, trip_lower_bound
+from routing.partition import partition_packages
+from routing.planner import grasp_pool, plan_route_for_truck
 from routing.simulate import simulate_route
 
-def run_full_plan(ds, packages: list):
+# Package fields apply_event() may change
+_UPDATE_FIELDS = ("address", "city", "state", "zip_code", "deadline", "special_notes",
+                  "available_time_min", "address_fix_time_min", "truck_restriction", "truck_mask")
+
+
+class Dispatcher:
     """
-    Two-driver scheduler: start Truck 1 & 2 at t=0 (08:00), then reuse the earlier-free slot.
+    Event-driven N-truck / M-driver scheduler.
+
+    Drivers sit in a heap keyed by the minute they are next free. Driver i starts on
+    fleet[i]; each pop picks a truck for that driver and dispatches one trip:
+      1. a truck that still has restricted at-hub packages, if this driver can take it
+         (it is the driver's own truck or nobody holds it);
+      2. otherwise a never-used idle truck, once the driver's own truck has run a trip;
+      3. otherwise the driver's own truck.
+    If nothing can be planned the driver waits for the next package release; if that
+    yields nothing too, the driver retries at the next later driver-free or release
+    time, and retires when there is none. Restricted counts and release times are
+    kept incrementally, so a dispatch never rescans the whole manifest.
+
+    With a partition (routing.partition), each trip plans over the open cluster with
+    the earliest deadline that the truck may carry and that is released, instead of
+    over every at-hub package; it falls back to the whole pool when none qualifies.
+    Each cluster's at-hub count and earliest deadline are kept as trips leave, so
+    picking a cluster looks at one summary per cluster, not at its packages.
+
+    With metrics (core.metrics) every dispatch attempt is a trip scope: planner
+    construct/improve time, simulate time, 2-opt / Or-opt moves and distance lookups
+    are kept per trip and per truck and returned as result["metrics"].
+
+    With a mileage budget (max_miles) each trip is planned against what is left of it:
+    a trip whose lower bound (routing.bounds) or planned miles exceed that is rejected
+    by the planner and its packages stay at the hub. result() reports the day's lower
+    bound, the plan's optimality gap against it, and the packages left undelivered
+    (and which of them were turned away by the budget).
+
+    After run(), apply_event() folds a single package change (new package, late
+    arrival, corrected address, ...) into the existing plan without re-planning the day.
     """
-    def remaining():
-        return [p for p in packages if p.status == "at_hub"]
 
-    miles_by_truck = {1: 0.0, 2: 0.0, 3: 0.0}
-    counts_by_truck = {1: 0, 2: 0, 3: 0}
-    trips = []
+    def __init__(self, ds, packages: list, fleet=None, drivers: int | None = None, hash_table=None,
+                 capacity: int | None = None, speed_mph: float | None = None, start_min: int = 0,
+                 planner_mode: str | None = None, partition=None, metrics=None, max_miles: float | None = None):
+        self.ds = ds
+        self.packages = packages
+        self.fleet = list(FLEET if fleet is None else fleet)
+        self.num_drivers = min(NUM_DRIVERS if drivers is None else drivers, len(self.fleet))
+        self.hash_table = hash_table
+        self.capacity = capacity      # None -> config defaults downstream
+        self.speed_mph = speed_mph
+        self.start_min = start_min    # first departure (minutes after 08:00)
+        self.planner_mode = planner_mode
+        self.max_miles = max_miles    # day mileage budget (None = unlimited)
+
+        # metrics: None -> config.METRICS, True -> a fresh Metrics, or a Metrics to add to
+        if metrics is None:
+            metrics = METRICS
+        if metrics is True:
+            metrics = Metrics()
+        self.metrics = metrics or None
+        self._m = self.metrics or NULL_METRICS
+
+        self.batch = PackageBatch.from_packages(packages)  # columnar view for candidate filtering
+        self.trips: list = []
+        self.miles_by_truck = {t: 0.0 for t in self.fleet}
+        self.counts_by_truck = {t: 0 for t in self.fleet}
+        self.end_by_truck = {t: 0 for t in self.fleet}
+        self.used: set = set()
+        self.rejected: set = set()               # package IDs of trips rejected for the budget
+        self._pool = None                        # GRASP process pool, open during run()
+        self._by_id = {p.package_id: p for p in packages}
+        self._trip_of: dict[int, int] = {}       # package_id -> index into self.trips
+
+        # partition: None -> config.PARTITION, True -> cluster now, or a Partition to reuse
+        if partition is None:
+            partition = PARTITION
+        if partition is True:
+            partition = partition_packages(ds, packages, capacity=capacity)
+        self.partition = partition or None
+        self._clusters = [] if self.partition is None else \
+            [[self._by_id[pid] for pid in ids if pid in self._by_id] for ids in self.partition.clusters]
+        self._cluster_of = {p.package_id: c for c, pkgs in enumerate(self._clusters) for p in pkgs}
+        self._cluster_left = [sum(p.status == "at_hub" for p in pkgs) for pkgs in self._clusters]
+        self._cluster_due: list = [None] * len(self._clusters)   # earliest at-hub deadline, None = stale
+
+        at_hub = [p for p in packages if p.status == "at_hub"]
+        self._remaining = len(at_hub)
+        self._restricted: dict[int, int] = {}    # truck -> at-hub packages restricted to it
+        self._releases: list = []                # heap of future release minutes
+        for p in at_hub:
+            if p.truck_restriction is not None:
+                self._restricted[p.truck_restriction] = self._restricted.get(p.truck_restriction, 0) + 1
+            for t in (p.available_time_min, p.address_fix_time_min):
+                if t:
+                    self._releases.append(t)
+        heapq.heapify(self._releases)
+
+    # ---------------- state helpers ----------------
+    def remaining(self) -> int:
+        if self.hash_table is not None:
+            return self.hash_table.count_with_status("at_hub")
+        return self._remaining
+
+    def _next_release_after(self, t: int):
+        # driver pops are time-ordered, so releases <= t never matter again
+        rel = self._releases
+        while rel and rel[0] <= t:
+            heapq.heappop(rel)
+        return rel[0] if rel else None
+
+    def _pick_truck(self, own: int, holder: dict) -> int:
+        def available(t):
+            return holder.get(t) is None or t == own
+        for t in sorted(self._restricted):
+            if self._restricted[t] > 0 and t in self.miles_by_truck and available(t):
+                return t
+        if own in self.used:
+            for t in self.fleet:
+                if t not in self.used and available(t):
+                    return t
+        return own
 
-    def dispatch(truck_id: int, depart_min: int):
-        pkgs = plan_route_for_truck(ds, remaining(), truck_id=truck_id, depart_time_min=depart_min)
+    def _hub_moved(self, pkgs, delta: int) -> None:
+        """pkgs left (-1) or rejoined (+1) the hub: keep the remaining, restricted and cluster counts."""
+        for p in pkgs:
+            self._remaining += delta
+            if p.truck_restriction is not None:
+                self._restricted[p.truck_restriction] = self._restricted.get(p.truck_restriction, 0) + delta
+            c = self._cluster_of.get(p.package_id)
+            if c is not None:
+                self._cluster_left[c] += delta
+                self._cluster_due[c] = None
+
+    def _next_cluster(self, truck_id: int, depart_min: int):
+        """At-hub packages of the released cluster for truck_id with the earliest deadline."""
+        best = None
+        for c, left in enumerate(self._cluster_left):
+            if not left:
+                continue
+            mask, release = self.partition.keys[c]
+            if release > depart_min or (mask and not mask >> truck_id & 1):
+                continue
+            due = self._cluster_due[c]
+            if due is None:
+                due = self._cluster_due[c] = min(p.deadline_min for p in self._clusters[c] if p.status == "at_hub")
+            if best is None or (due, c) < best:
+                best = (due, c)
+        return None if best is None else [p for p in self._clusters[best[1]] if p.status == "at_hub"]
+
+    def _miles_left(self):
+        """What is left of the mileage budget, or None if there is none."""
+        return None if self.max_miles is None else self.max_miles - sum(self.miles_by_truck.values())
+
+    # ---------------- dispatch ----------------
+    def _plan(self, truck_id: int, depart_min: int) -> list:
+        left = self._miles_left()
+        params = dict(truck_id=truck_id, depart_time_min=depart_min, capacity=self.capacity,
+                      speed_mph=self.speed_mph, mode=self.planner_mode, metrics=self.metrics, max_miles=left,
+                      rejected=self.rejected, pool=self._pool)
+        if self._clusters:
+            cluster = self._next_cluster(truck_id, depart_min)
+            if cluster:
+                pkgs = plan_route_for_truck(self.ds, cluster, **params)
+                if pkgs:
+                    return pkgs
+        return plan_route_for_truck(self.ds, self.packages, batch=self.batch, **params)
+
+    def dispatch(self, truck_id: int, depart_min: int, driver: int | None = None):
+        with self._m.trip(truck_id, depart=depart_min, driver=driver) as scope:
+            self._m.count("dispatches")
+            out = self._dispatch(truck_id, depart_min, driver)
+            if out[2]:
+                scope["trip"] = len(self.trips) - 1
+        return out
+
+    def _dispatch(self, truck_id: int, depart_min: int, driver: int | None):
+        pkgs = self._plan(truck_id, depart_min)
         if not pkgs:
             return 0.0, depart_min, 0
+        self._hub_moved(pkgs, -1)
         for p in pkgs:
             p.status = "en_route"
-        miles, end_time, _legs = simulate_route(ds, pkgs, depart_min, truck_id=truck_id)
-        trips.append({"truck": truck_id, "depart": depart_min, "return": end_time, "miles": miles, "count": len(pkgs)})
-        miles_by_truck[truck_id] += miles
-        counts_by_truck[truck_id] += len(pkgs)
+        ids = [p.package_id for p in pkgs]
+        self.batch.mark(ids, "en_route")
+        with self._m.timer("simulate"):
+            miles, end_time, _legs = simulate_route(self.ds, pkgs, depart_min, truck_id=truck_id,
+                                                    speed_mph=self.speed_mph, hash_table=self.hash_table)
+        self.batch.mark(ids, "delivered")
+        self.used.add(truck_id)
+
+        trip = len(self.trips)
+        self.trips.append({"truck": truck_id, "driver": driver, "depart": depart_min, "return": end_time,
+                           "miles": miles, "count": len(pkgs), "packages": ids})
+        for pid in ids:
+            self._trip_of[pid] = trip
+        self.miles_by_truck[truck_id] += miles
+        self.counts_by_truck[truck_id] += len(pkgs)
+        self.end_by_truck[truck_id] = max(self.end_by_truck[truck_id], end_time)
         return miles, end_time, len(pkgs)
 
-    # Wave 1
-    slotA = {"truck": 1, "free": 0}
-    slotB = {"truck": 2, "free": 0}
-    used = {1, 2}
-
-    _, endA, _ = dispatch(1, 0); slotA["free"] = endA
-    _, endB, _ = dispatch(2, 0); slotB["free"] = endB
-
-    # Subsequent waves
-    safety = 0
-    while remaining() and safety < 100:
-        safety += 1
-        slot = slotA if slotA["free"] <= slotB["free"] else slotB
-        depart = slot["free"]
-        rem = remaining()
-
-        needs_t2 = any(getattr(p, "truck_restriction", None) == 2 for p in rem)
-        if needs_t2:
-            next_truck = 2
-        else:
-            next_truck = 3 if 3 not in used else slot["truck"]
-            used.add(next_truck)
-
-        _, end_time, count = dispatch(next_truck, depart)
-        if count == 0:
-            unlocks = []
-            for p in rem:
-                at = getattr(p, "available_time_min", 0)
-                ft = getattr(p, "address_fix_time_min", 0)
-                if at and at > depart: unlocks.append(at)
-                if ft and ft > depart: unlocks.append(ft)
-            if unlocks:
-                depart2 = min(unlocks)
-                _, end_time, count = dispatch(next_truck, depart2)
+    def run(self) -> dict:
+        instrumented = self.metrics is not None and self.metrics.instrument(self.ds)
+        if (self.planner_mode or PLANNER_MODE) == "grasp":
+            self._pool = grasp_pool(self.ds)      # one pool for every trip of the day
+        try:
+            return self._run()
+        finally:
+            if self._pool is not None:
+                self._pool.shutdown()
+                self._pool = None
+            if instrumented:
+                Metrics.uninstrument(self.ds)
+
+    def _run(self) -> dict:
+        holder = {}                                   # truck -> driver holding it
+        heap = []                                     # (free_min, driver, truck)
+        for d in range(self.num_drivers):
+            holder[self.fleet[d]] = d
+            heap.append((self.start_min, d, self.fleet[d]))
+        heapq.heapify(heap)
+
+        while heap and self.remaining():
+            depart, driver, own = heapq.heappop(heap)
+            truck = self._pick_truck(own, holder)
+            if truck != own:
+                holder.pop(own, None)
+                holder[truck] = driver
+
+            _, end_time, count = self.dispatch(truck, depart, driver)
             if count == 0:
+                unlock = self._next_release_after(depart)
+                if unlock is not None:
+                    depart = unlock
+                    _, end_time, count = self.dispatch(truck, depart, driver)
+            if count == 0:
+                # nothing for this driver now: retry at the next later event, else retire
+                later = [t for t in (heap[0][0] if heap else None, self._next_release_after(depart))
+                         if t is not None and t > depart]
+                if not later:
+                    holder.pop(truck, None)
+                    continue
+                end_time = min(later)
+            heapq.heappush(heap, (end_time, driver, truck))
+
+        return self.result()
+
+    # ---------------- incremental re-planning ----------------
+    def _committed(self, trip: dict, at_time: int) -> int:
+        """Leading stops of `trip` the truck has delivered or is already driving to at at_time."""
+        if trip["depart"] >= at_time:
+            return 0
+        prev, n = trip["depart"], 0
+        for pid in trip["packages"]:
+            if prev >= at_time:
                 break
+            n += 1
+            prev = self._by_id[pid].delivery_min
+        return n
 
-        slot["truck"] = next_truck
-        slot["free"] = end_time
-
-    total_miles = sum(miles_by_truck.values())
-    delivered = sum(1 for p in packages if p.status == "delivered")
-    return {
-        "trucks": [
-            {"id": 1, "miles": miles_by_truck[1], "end": max([t["return"] for t in trips if t["truck"] == 1], default=0), "count": counts_by_truck[1]},
-            {"id": 2, "miles": miles_by_truck[2], "end": max([t["return"] for t in trips if t["truck"] == 2], default=0), "count": counts_by_truck[2]},
-            {"id": 3, "miles": miles_by_truck[3], "end": max([t["return"] for t in trips if t["truck"] == 3], default=0), "count": counts_by_truck[3]},
-        ],
-        "total_miles": total_miles,
-        "delivered": delivered,
-        "total_packages": len(packages),
-        "trips": trips,
-    }
+    def _retime(self, j: int) -> None:
+        """Re-simulate trip j (same departure) and fold the changes into the truck totals."""
+        trip = self.trips[j]
+        pkgs = [self._by_id[pid] for pid in trip["packages"]]
+        with self._m.timer("simulate"):
+            miles, end, _ = simulate_route(self.ds, pkgs, trip["depart"], truck_id=trip["truck"],
+                                           speed_mph=self.speed_mph, hash_table=self.hash_table)
+        truck = trip["truck"]
+        self.miles_by_truck[truck] += miles - trip["miles"]
+        self.counts_by_truck[truck] += len(pkgs) - trip["count"]
+        trip.update({"miles": miles, "return": end if pkgs else trip["depart"], "count": len(pkgs)})
+        self.end_by_truck[truck] = max(t["return"] for t in self.trips if t["truck"] == truck)
+
+    def _cascade(self, j: int, touched: set) -> None:
+        """Push back the next trip of the same driver / truck if trip j now returns later."""
+        ret, trip = self.trips[j]["return"], self.trips[j]
+        for key in ("driver", "truck"):
+            for i in range(j + 1, len(self.trips)):
+                nxt = self.trips[i]
+                if nxt[key] == trip[key] and nxt[key] is not None:
+                    if nxt["depart"] < ret:
+                        nxt["depart"] = ret
+                        self._retime(i)
+                        touched.add(i)
+                        self._cascade(i, touched)
+                    break
+
+    def _suffix_late(self, trip: dict, k: int, pkg) -> tuple:
+        """(late stops from position k on without / with pkg inserted at k) for trip."""
+        dist, loc_of = self.ds.distance_by_idx, self.ds.package_index
+        speed = SPEED_MPH if self.speed_mph is None else self.speed_mph
+        stops = trip["packages"]
+        if k == 0:
+            t0, start = trip["depart"], self.ds.index_of(HUB_ADDRESS)
+        else:
+            prev = self._by_id[stops[k - 1]]
+            t0, start = prev.delivery_min, loc_of(prev)
+
+        def walk(seq):
+            t, cur, late = t0, start, 0
+            for p in seq:
+                if p.address_fix_time_min is not None and t < p.address_fix_time_min:
+                    t = p.address_fix_time_min
+                loc = loc_of(p)
+                t += int(round(60.0 * dist(cur, loc) / speed))
+                cur = loc
+                late += t > p.deadline_min
+            return late
+
+        rest = [self._by_id[pid] for pid in stops[k:]]
+        return walk(rest), walk([pkg] + rest)
+
+    def _place(self, pkg, at_time: int, on_board: int | None, touched: set) -> bool:
+        """
+        Insert pkg into the cheapest position that adds no late delivery: the uncommitted
+        stops of its own trip if it is already on board, otherwise any not-yet-departed
+        trip with room on an allowed truck. With a mileage budget, positions that add more
+        miles than are left are skipped. Returns False if no trip can take it.
+        """
+        dist, loc_of = self.ds.distance_by_idx, self.ds.package_index
+        hub = self.ds.index_of(HUB_ADDRESS)
+        x = loc_of(pkg)
+        cap = TRUCK_CAPACITY if self.capacity is None else self.capacity
+        release = max(pkg.available_time_min or 0, pkg.address_fix_time_min or 0)
+
+        if on_board is not None:
+            trips = [on_board]
+        else:
+            trips = [j for j, t in enumerate(self.trips)
+                     if t["depart"] >= max(at_time, release) and t["count"] < cap
+                     and pkg.allows_truck(t["truck"])]
+
+        # cheapest added miles first (O(1) each), then the first one that adds no late stop
+        options = []
+        for j in trips:
+            stops = self.trips[j]["packages"]
+            lo = self._committed(self.trips[j], at_time)
+            for k in range(lo, len(stops) + 1):
+                a = hub if k == 0 else loc_of(self._by_id[stops[k - 1]])
+                if k < len(stops):
+                    b = loc_of(self._by_id[stops[k]])
+                    added = dist(a, x) + dist(x, b) - dist(a, b)
+                else:
+                    added = dist(a, x)
+                options.append((added, j, k))
+        left = self._miles_left()
+        if left is not None:
+            options = [o for o in options if o[0] <= left + 1e-9]   # simulated trips end at the last stop
+        if not options:
+            return False
+        options.sort()
+        best = None
+        for added, j, k in options:
+            before, after = self._suffix_late(self.trips[j], k, pkg)
+            extra = after - before
+            if best is None or extra < best[0]:
+                best = (extra, j, k)
+            if extra == 0:
+                break
+
+        _, j, k = best
+        if pkg.status == "at_hub":
+            self._hub_moved((pkg,), -1)
+        self.trips[j]["packages"].insert(k, pkg.package_id)
+        self._trip_of[pkg.package_id] = j
+        self.batch.mark((pkg.package_id,), "delivered")
+        if on_board is None:
+            pkg.board_time_min = None
+        self._retime(j)
+        touched.add(j)
+        self._cascade(j, touched)
+        return True
+
+    def _dispatch_extra(self, pkg, at_time: int, touched: set) -> None:
+        """
+        New trip for a package no planned trip can take, on the earliest free driver.
+        With a mileage budget the package is rejected (left at the hub) if even the
+        drive out to it doesn't fit in what is left, or the planner turns the trip down.
+        """
+        release = max(at_time, pkg.available_time_min or 0, pkg.address_fix_time_min or 0)
+        last = {}
+        for j, t in enumerate(self.trips):
+            last[t["driver"]] = j
+        best = None
+        for d in range(self.num_drivers):
+            j = last.get(d)
+            truck = self.trips[j]["truck"] if j is not None else self.fleet[d]
+            if not pkg.allows_truck(truck):
+                truck = next((t for t in self.fleet if pkg.allows_truck(t)),
+                             (pkg.truck_mask & -pkg.truck_mask).bit_length() - 1)
+            free = self.trips[j]["return"] if j is not None else self.start_min
+            depart = max(release, free, self.end_by_truck.get(truck, 0))
+            if best is None or (depart, d) < best[:2]:
+                best = (depart, d, truck)
+        depart, driver, truck = best
+
+        if pkg.status != "at_hub":
+            self._hub_moved((pkg,), 1)
+        pkg.status = "at_hub"
+        pkg.truck_id = None
+        pkg.board_time_min = None
+        self.batch.mark((pkg.package_id,), "at_hub")
+        left = self._miles_left()
+        if left is not None and self.ds.distance_by_idx(self.ds.index_of(HUB_ADDRESS),
+                                                        self.ds.package_index(pkg)) > left + 1e-9:
+            self.rejected.add(pkg.package_id)
+            return
+        self.miles_by_truck.setdefault(truck, 0.0)
+        self.counts_by_truck.setdefault(truck, 0)
+        self.end_by_truck.setdefault(truck, 0)
+        if self.dispatch(truck, depart, driver)[2]:
+            touched.add(len(self.trips) - 1)
+        if left is not None and pkg.status == "at_hub":
+            self.rejected.add(pkg.package_id)
+
+    def apply_event(self, update, at_time: int) -> dict:
+        """
+        Apply one package change at minute at_time to the plan produced by run().
+
+        `update` is a new Package, or a dict with "package_id" plus any of
+        _UPDATE_FIELDS (e.g. {"package_id": 9, "address": "410 S State St",
+        "address_fix_time_min": 140}). Only the package's own trip is re-simulated, plus
+        whichever trip it moves into and any later trip of the same driver/truck that
+        now has to leave later; everything else (routes, timings, distances) is reused.
+        Stops the truck is already committed to at at_time can't change (ValueError).
+        With a mileage budget a package whose insertion or extra trip doesn't fit in what
+        is left stays at the hub and is reported in result()["rejected"].
+        Returns {"trips": [touched trip indices], "miles_delta": float}.
+        """
+        miles0 = sum(self.miles_by_truck.values())
+        touched: set = set()
+        on_board = None
+
+        if isinstance(update, Package):
+            pkg = update
+            if pkg.package_id in self._by_id:
+                raise ValueError(f"Package {pkg.package_id} already planned; pass a dict update instead")
+            self.ds.package_index(pkg)
+            self.packages.append(pkg)
+            self._by_id[pkg.package_id] = pkg
+            self.batch.append(pkg)
+            if self.hash_table is not None:
+                self.hash_table.bulk_insert((pkg,))
+            self._hub_moved((pkg,), 1)
+        else:
+            fields = dict(update)
+            pid = fields.pop("package_id")
+            pkg = self._by_id.get(pid)
+            if pkg is None:
+                raise ValueError(f"Unknown package {pid}")
+            bad = set(fields) - set(_UPDATE_FIELDS)
+            if bad:
+                raise ValueError(f"Unsupported update field(s): {', '.join(sorted(bad))}")
+
+            j = self._trip_of.get(pid)
+            if j is not None:
+                trip = self.trips[j]
+                pos = trip["packages"].index(pid)
+                if pos < self._committed(trip, at_time):
+                    raise ValueError(f"Package {pid} is already delivered or out for delivery at minute {at_time}")
+                if trip["depart"] < at_time:
+                    if fields.keys() & {"available_time_min", "truck_restriction", "truck_mask"}:
+                        raise ValueError(f"Package {pid} is already on truck {trip['truck']}")
+                    on_board = j
+
+            if "address" in fields:
+                idx = self.ds.index_of(fields["address"])
+                if idx == -1:
+                    raise ValueError(f"Address not in distance matrix: '{fields['address']}' (package {pid})")
+                pkg.location_idx = idx
+            waiting = pkg.status == "at_hub"
+            if waiting:
+                self._hub_moved((pkg,), -1)    # re-counted below under its new restriction
+            for k, v in fields.items():
+                setattr(pkg, k, v)
+            if waiting:
+                self._hub_moved((pkg,), 1)
+            self.batch.refresh(pkg)
+
+            if j is not None:
+                self.trips[j]["packages"].remove(pid)
+                self._retime(j)
+                touched.add(j)
+
+        if not self._place(pkg, at_time, on_board, touched):
+            self._dispatch_extra(pkg, at_time, touched)
+        return {"trips": sorted(touched), "miles_delta": sum(self.miles_by_truck.values()) - miles0}
+
+    # ---------------- results ----------------
+    def _events(self) -> tuple:
+        """(non-empty trips, their depart/board/deliver/return events)."""
+        trips, events = [], []
+        for trip in self.trips:
+            if not trip["count"]:
+                continue
+            i, truck, dep = len(trips), trip["truck"], trip["depart"]
+            trips.append(trip)
+            events.append(Event(dep, "depart", truck, i, None))
+            for pid in trip["packages"]:
+                events.append(Event(dep, "board", truck, i, pid))
+                events.append(Event(self._by_id[pid].delivery_min, "deliver", truck, i, pid))
+            events.append(Event(trip["return"], "return", truck, i, None))
+        return trips, sort_events(events)
+
+    def result(self) -> dict:
+        trips, events = self._events()
+        hub = self.ds.index_of(HUB_ADDRESS)
+        loc_of = self.ds.package_index
+        for trip in trips:
+            trip["lower_bound"] = trip_lower_bound(self.ds, [loc_of(self._by_id[pid]) for pid in trip["packages"]], hub)
+        bounds = day_lower_bound(self.ds, [loc_of(p) for p in self.packages if p.status == "delivered"], hub)
+        total = sum(self.miles_by_truck.values())
+        undelivered = sorted(p.package_id for p in self.packages if p.status != "delivered")
+        return {
+            "trucks": [{"id": t, "miles": self.miles_by_truck[t], "end": self.end_by_truck[t],
+                        "count": self.counts_by_truck[t]} for t in self.fleet],
+            "total_miles": total,
+            "lower_bound": bounds["lower_bound"],                # no plan delivering the same packages is shorter
+            "gap": gap(total, bounds["lower_bound"]),
+            "bounds": bounds,                                   # assignment / spanning-tree day bounds
+            "delivered": sum(1 for p in self.packages if p.status == "delivered"),
+            "total_packages": len(self.packages),
+            "undelivered": undelivered,                         # package IDs, by ID
+            "rejected": [pid for pid in undelivered if pid in self.rejected],  # ... left out by the budget
+            "trips": trips,
+            "events": events,                                   # sorted depart/board/deliver/return log
+            "timeline": StatusTimeline(self.packages, events),  # bisect-based status queries
+            "metrics": self.metrics,                            # core.metrics.Metrics, or None if off
+        }
+
+
+def run_full_plan(ds, packages: list, hash_table=None, fleet=None, drivers: int | None = None, **params):
+    """
+    Plan and simulate the whole day with `drivers` drivers over the `fleet` truck ids
+    (defaults: config.NUM_DRIVERS, config.FLEET). See Dispatcher for the dispatch rules.
+    If the HashTable holding `packages` is given, its status index is used for counts.
+    Extra params (capacity, speed_mph, start_min, planner_mode, partition, metrics, max_miles) go to Dispatcher.
+    """
+    return Dispatcher(ds, packages, fleet=fleet, drivers=drivers, hash_table=hash_table, **params).run()
@@ -1,31 +1,124 @@
+from itertools import accumulate
 from config import SPEED_MPH, HUB_ADDRESS
-from reporting.status import minutes_to_str
 
-def simulate_route(ds, ordered_pkgs: list, depart_time_min: int, truck_id: int):
-    miles = 0.0
-    time_min = int(depart_time_min)
-    curr = HUB_ADDRESS
-    legs = []
+try:
+    import numpy as np
+except ImportError:  # optional: plain-list simulation
+    np = None
 
+def simulate_indices(ds, locs, depart_time_min: int, speed_mph: float | None = None, fixes=None,
+                     start: int | None = None):
+    """
+    Time one trip given as matrix indices, without touching Package objects.
+    Leg minutes are rounded per leg like the planner's _TimeWindows; arrivals are
+    their cumulative sum from departure, and an address fix (fixes[k], None = none)
+    holds the truck until that minute before it drives to stop k, so
+    arrival[k] = C[k] + max(depart, max over j <= k of fixes[j] - C[j-1]),
+    one running max over the cumulative leg minutes C.
+    Returns (miles, arrival minutes, leg miles) with lists for the last two.
+    """
+    speed = SPEED_MPH if speed_mph is None else speed_mph
+    depart = int(depart_time_min)
+    start = ds.index_of(HUB_ADDRESS) if start is None else start
+    legs = ds.path_distances(start, locs)
+    if not len(legs):
+        return 0.0, [], []
+
+    if np is not None and isinstance(legs, np.ndarray):
+        travel = np.rint(60.0 * legs / speed).astype(np.int64)
+        cum = np.cumsum(travel)
+        base = np.full(len(travel), depart, dtype=np.int64)
+        if fixes is not None and any(f is not None for f in fixes):
+            fx = np.array([depart if f is None else f for f in fixes], dtype=np.int64)
+            base = np.maximum.accumulate(np.maximum(base, fx - (cum - travel)))
+        miles = float(np.cumsum(legs)[-1])     # left-to-right, same total as a running sum
+        return miles, (cum + base).tolist(), legs.tolist()
+
+    travel = [int(round(60.0 * d / speed)) for d in legs]
+    if fixes is None or all(f is None for f in fixes):
+        arrivals = list(accumulate(travel, initial=depart))[1:]
+    else:
+        arrivals, t = [], depart
+        for tm, f in zip(travel, fixes):
+            if f is not None and t < f:
+                t = f
+            t += tm
+            arrivals.append(t)
+    return list(accumulate(legs))[-1], arrivals, legs
+
+def simulate_batch(ds, routes: list, depart_time_min: int, speed_mph: float | None = None, fixes=None,
+                   start: int | None = None) -> tuple:
+    """
+    simulate_indices over many routes at once (what-if evaluation): every leg of every
+    route is gathered in one pair_distances call over the concatenated routes, and
+    the per-route cumulative sums / running maxes are taken over the flat arrays with
+    the route boundaries restarting them. fixes, if given, is one list per route.
+    Returns (miles per route, minute of the last delivery per route).
+    """
+    if np is None or not ds.use_numpy:
+        out = [simulate_indices(ds, r, depart_time_min, speed_mph, None if fixes is None else fixes[k], start)
+               for k, r in enumerate(routes)]
+        return [o[0] for o in out], [o[1][-1] if o[1] else int(depart_time_min) for o in out]
+
+    speed = SPEED_MPH if speed_mph is None else speed_mph
+    depart = int(depart_time_min)
+    start = ds.index_of(HUB_ADDRESS) if start is None else start
+    lens = np.fromiter((len(r) for r in routes), dtype=np.intp, count=len(routes))
+    ends = np.cumsum(lens)
+    firsts = ends - lens
+    flat = np.fromiter((loc for r in routes for loc in r), dtype=np.intp, count=int(ends[-1]) if len(ends) else 0)
+    if not len(flat):
+        return [0.0] * len(routes), [depart] * len(routes)
+
+    prev = np.empty_like(flat)
+    prev[1:] = flat[:-1]
+    nonempty = lens > 0
+    prev[firsts[nonempty]] = start
+    legs = ds.pair_distances(prev, flat)
+
+    travel = np.rint(60.0 * legs / speed).astype(np.int64)
+    cum = np.cumsum(travel)
+    cum -= np.repeat(cum[firsts[nonempty]] - travel[firsts[nonempty]], lens[nonempty])  # per-route restart
+    arrivals = cum + depart
+    if fixes is not None:
+        fx = np.fromiter((depart if f is None else f for fr in fixes for f in fr), dtype=np.int64, count=len(flat))
+        base = np.maximum(depart, fx - (cum - travel))
+        # running max per route: lift each route above every earlier one, then drop the lift
+        lift = (int(base.max()) + 1) * np.repeat(np.arange(len(routes)), lens)
+        base = np.maximum.accumulate(base + lift) - lift
+        arrivals = cum + base
+
+    miles = np.zeros(len(routes))
+    miles[nonempty] = np.add.reduceat(legs, firsts[nonempty])
+    last = np.full(len(routes), depart, dtype=np.int64)
+    last[nonempty] = arrivals[ends[nonempty] - 1]
+    return miles.tolist(), last.tolist()
+
+def simulate_route(ds, ordered_pkgs: list, depart_time_min: int, truck_id: int, speed_mph: float | None = None,
+                   hash_table=None):
+    """
+    Deliver ordered_pkgs in order (see simulate_indices) and record board time,
+    delivery minute, status and truck on them. With the HashTable holding them, the
+    delivered state is written in one bulk_update instead of per-package setters.
+    Returns (miles, minute of the last delivery, [(address, leg miles, arrival)]).
+    """
     # record board time once per trip (optional, useful for snapshots)
     for p in ordered_pkgs:
-        if getattr(p, "board_time_min", None) is None:
+        if p.board_time_min is None:
             p.board_time_min = depart_time_min
 
-    for p in ordered_pkgs:
-        fix = getattr(p, "address_fix_time_min", None)
-        if fix is not None and time_min < fix:
-            time_min = fix
-        d = ds.get_distance(curr, p.address)
-        travel_min = int(round(60.0 * d / SPEED_MPH))
-        time_min += travel_min
-        miles += d
-        curr = p.address
-
-        p.status = "delivered"
-        p.delivery_time = minutes_to_str(time_min)
-        p.truck_id = truck_id
-
-        legs.append((curr, d, time_min))
-
-    return miles, time_min, legs
+    locs = [ds.package_index(p) for p in ordered_pkgs]
+    fixes = [p.address_fix_time_min for p in ordered_pkgs]
+    miles, arrivals, legs = simulate_indices(ds, locs, depart_time_min, speed_mph, fixes)
+
+    if hash_table is not None:
+        hash_table.bulk_update([p.package_id for p in ordered_pkgs], status="delivered", truck_id=truck_id,
+                               delivery_mins=arrivals)
+    else:
+        for p, t in zip(ordered_pkgs, arrivals):
+            p.status = "delivered"
+            p.delivery_min = t
+            p.truck_id = truck_id
+
+    end = arrivals[-1] if arrivals else int(depart_time_min)
+    return miles, end, [(p.address, d, t) for p, d, t in zip(ordered_pkgs, legs, arrivals)]
@@ -0,0 +1,36 @@
+import pytest
+
+from config import DISTANCE_CSV, HUB_ADDRESS, PACKAGE_CSV
+from core.hash_table import HashTable
+from data.distance_service import DistanceService
+from data.package_loader import iter_package_records
+from data.sources import open_text
+from routing.constraints import apply_note_constraints, assign_groups
+
+
+@pytest.fixture(scope="session")
+def ds():
+    """The bundled distance table (read-only; shared by every test)."""
+    service = DistanceService()
+    service.load_distance_data(str(DISTANCE_CSV))
+    return service
+
+
+@pytest.fixture(scope="session")
+def hub(ds):
+    return ds.index_of(HUB_ADDRESS)
+
+
+@pytest.fixture
+def day(ds):
+    """Fresh (HashTable, packages) for the bundled manifest, with note constraints and groups applied."""
+    ht = HashTable()
+    with open_text(str(PACKAGE_CSV)) as f:
+        records = list(iter_package_records(f))
+    for rec in records:
+        rec["location_idx"] = ds.index_of(rec["address"])
+    ht.bulk_insert(records)
+    packages = sorted(ht, key=lambda p: p.package_id)
+    apply_note_constraints(packages)
+    assign_groups(packages)
+    return ht, packages
@@ -0,0 +1,117 @@
+import random
+
+import pytest
+
+from core.models import Package
+from routing.partition import partition_packages
+from routing.scheduler import Dispatcher
+from routing.simulate import simulate_indices
+
+
+def _check_plan(d, ds):
+    """Invariants of a Dispatcher plan after run() and any number of apply_event() calls."""
+    trips = [t for t in d.trips if t["count"]]
+    seen = [pid for t in trips for pid in t["packages"]]
+    assert len(seen) == len(set(seen))                                  # each package rides once
+    assert set(seen) == {p.package_id for p in d.packages if p.status == "delivered"}
+
+    for key in ("driver", "truck"):                                      # no overlapping trips
+        by = {}
+        for t in trips:
+            by.setdefault(t[key], []).append(t)
+        for ts in by.values():
+            ts.sort(key=lambda t: t["depart"])
+            for a, b in zip(ts, ts[1:]):
+                assert b["depart"] >= a["return"]
+
+    for t in trips:
+        pkgs = [d._by_id[pid] for pid in t["packages"]]
+        for p in pkgs:
+            assert p.allows_truck(t["truck"])                            # truck restrictions
+            assert t["depart"] >= (p.available_time_min or 0)            # late arrivals
+            assert p.truck_id == t["truck"]
+        miles, arrivals, _ = simulate_indices(ds, [ds.package_index(p) for p in pkgs], t["depart"],
+                                              d.speed_mph, [p.address_fix_time_min for p in pkgs])
+        assert t["miles"] == pytest.approx(miles)
+        assert [p.delivery_min for p in pkgs] == arrivals                # fixes waited for, times current
+        assert t["return"] == arrivals[-1]
+
+    for truck, miles in d.miles_by_truck.items():                        # miles add up
+        assert miles == pytest.approx(sum(t["miles"] for t in trips if t["truck"] == truck))
+        assert d.counts_by_truck[truck] == sum(t["count"] for t in trips if t["truck"] == truck)
+    assert d.result()["total_miles"] == pytest.approx(sum(t["miles"] for t in trips))
+
+    at_hub = [p for p in d.packages if p.status == "at_hub"]                # hub counters match a rescan
+    assert d._remaining == len(at_hub)
+    restricted = {}
+    for p in at_hub:
+        if p.truck_restriction is not None:
+            restricted[p.truck_restriction] = restricted.get(p.truck_restriction, 0) + 1
+    assert {t: n for t, n in d._restricted.items() if n} == restricted
+
+
+def test_plan_invariants_after_run(ds, day):
+    ht, packages = day
+    d = Dispatcher(ds, packages, hash_table=ht)
+    d.run()
+    _check_plan(d, ds)
+    assert ht.count_with_status("delivered") == len(packages)
+
+
+def test_plan_invariants_after_events(ds, day):
+    ht, packages = day
+    d = Dispatcher(ds, packages, hash_table=ht)
+    d.run()
+    rng = random.Random(0)
+    addrs = ds.addresses[1:]
+    next_id = max(p.package_id for p in packages) + 1
+    applied = 0
+    for _ in range(60):
+        at = rng.randint(0, 180)
+        kind = rng.random()
+        if kind < 0.25:
+            upd = Package(next_id, rng.choice(addrs), rng.choice(["EOD", "12:00 PM"]), "Salt Lake City", "84101", "2")
+            next_id += 1
+        elif kind < 0.5:
+            upd = {"package_id": rng.choice(packages).package_id, "available_time_min": at + rng.randint(0, 90)}
+        elif kind < 0.75:
+            upd = {"package_id": rng.choice(packages).package_id, "truck_restriction": rng.choice(d.fleet)}
+        else:
+            upd = {"package_id": rng.choice(packages).package_id, "address": rng.choice(addrs),
+                   "address_fix_time_min": at}
+        try:
+            out = d.apply_event(upd, at)
+        except ValueError:             # already delivered / on board: rejected, plan unchanged
+            _check_plan(d, ds)
+            continue
+        applied += 1
+        assert all(0 <= j < len(d.trips) for j in out["trips"])
+        _check_plan(d, ds)
+    assert applied > 10
+    assert ht.count_with_status("delivered") == len(d.packages)
+
+
+def test_hub_counts_with_packages_left(ds, day):
+    ht, packages = day
+    d = Dispatcher(ds, packages, partition=partition_packages(ds, packages), max_miles=40)
+    stranded = d.run()["undelivered"]
+    _check_plan(d, ds)
+    pid = next(pid for pid in stranded if d._by_id[pid].truck_restriction is not None)
+    truck = d.trips[0]["truck"]
+    out = d.apply_event({"package_id": pid, "truck_restriction": truck, "deadline": "EOD"}, 0)
+    assert out["trips"] == [0] and d._by_id[pid].status == "delivered"    # moved onto a planned trip
+    _check_plan(d, ds)
+    d.apply_event({"package_id": stranded[-1], "truck_restriction": 3}, 0)  # re-restricted, still stranded
+    _check_plan(d, ds)
+
+
+def test_committed_stop_cannot_change(ds, day):
+    ht, packages = day
+    d = Dispatcher(ds, packages, hash_table=ht)
+    d.run()
+    first = min(d.trips, key=lambda t: t["depart"])
+    pid = first["packages"][0]
+    with pytest.raises(ValueError):
+        d.apply_event({"package_id": pid, "address": ds.addresses[1]}, d._by_id[pid].delivery_min)
+    with pytest.raises(ValueError):
+        d.apply_event({"package_id": pid, "weight": 3}, 0)
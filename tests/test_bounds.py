@@ -0,0 +1,59 @@
+import itertools
+import random
+
+import pytest
+
+from routing.bounds import path_lower_bound, trip_lower_bound
+from routing.partition import partition_packages
+from routing.planner import _evaluate
+from routing.scheduler import Dispatcher
+
+
+def test_trip_bound_never_exceeds_any_order(ds, hub):
+    rng = random.Random(0)
+    for n in range(1, 7):
+        locs = rng.sample(range(1, len(ds.addresses)), n)
+        none, eod = [None] * n, [10 ** 6] * n
+        best = min(_evaluate(ds, hub, locs, eod, none, list(p), 0, 18)[1] for p in itertools.permutations(range(n)))
+        assert trip_lower_bound(ds, locs, hub) <= best + 1e-9
+        closed = min(_evaluate(ds, hub, locs, eod, none, list(p), 0, 18)[1] + ds.distance_by_idx(locs[p[-1]], hub)
+                     for p in itertools.permutations(range(n)))
+        assert trip_lower_bound(ds, locs, hub, closed=True) <= closed + 1e-9
+
+
+def test_path_bound_of_a_line_is_exact():
+    xs = [0, 4, 1, 3]
+    assert path_lower_bound([[abs(a - b) for b in xs] for a in xs]) == 4
+
+
+def test_day_bounds_below_the_plan(ds, day):
+    ht, packages = day
+    result = Dispatcher(ds, packages, hash_table=ht).run()
+    assert 0 < result["lower_bound"] <= result["total_miles"]
+    assert result["bounds"]["assignment"] <= result["bounds"]["spanning_tree"] + 1e-9
+    for trip in result["trips"]:
+        assert trip["lower_bound"] <= trip["miles"] + 1e-9
+    assert result["undelivered"] == [] and result["rejected"] == []
+
+
+@pytest.mark.parametrize("budget", [10, 20, 30, 45, 60])
+def test_mileage_budget_is_never_exceeded(ds, day, budget):
+    ht, packages = day
+    result = Dispatcher(ds, packages, hash_table=ht, max_miles=budget).run()
+    assert result["total_miles"] <= budget + 1e-9
+    undelivered = {p.package_id for p in packages if p.status != "delivered"}
+    assert result["undelivered"] == sorted(undelivered)
+    assert result["rejected"] and set(result["rejected"]) <= undelivered    # all budgets < the 83.4-mile plan
+    assert result["delivered"] + len(undelivered) == result["total_packages"]
+
+
+def test_apply_event_keeps_the_mileage_budget(ds, day):
+    ht, packages = day
+    d = Dispatcher(ds, packages, hash_table=ht, partition=partition_packages(ds, packages), max_miles=26)
+    stranded = d.run()["undelivered"]
+    for pid in stranded:                        # placed, sent on an extra trip, or rejected
+        d.apply_event({"package_id": pid, "deadline": "EOD"}, 0)
+        assert sum(d.miles_by_truck.values()) <= 26 + 1e-9
+    result = d.result()
+    assert stranded[0] in result["rejected"]    # the 3.0-mile insertion no longer fits
+    assert result["rejected"] == result["undelivered"]
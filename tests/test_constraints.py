@@ -0,0 +1,92 @@
+import pytest
+
+from core.models import Package
+from routing.constraints import apply_constraints, apply_note_constraints, assign_groups, parse_note
+from routing.scheduler import Dispatcher
+
+
+def _pkgs(notes: dict, n: int = 8):
+    pkgs = [Package(i, f"{i} Main St", "EOD", "Salt Lake City", "84101", "1", special_notes=notes.get(i, ""))
+            for i in range(1, n + 1)]
+    apply_note_constraints(pkgs)
+    return pkgs
+
+
+def test_parse_note_rules():
+    assert parse_note("Can only be on truck 2").truck_mask == 1 << 2
+    assert parse_note("Can only be on trucks 1 or 3").truck_mask == (1 << 1) | (1 << 3)
+    assert parse_note("Can only be on truck 100").truck_mask == 1 << 100
+    assert parse_note("Delayed on flight---will not arrive to depot until 9:05 am").available_min == 65
+    assert parse_note("Wrong address listed").wrong_address
+    assert parse_note("Must be delivered with 13, 15").deliver_with == (13, 15)
+    assert parse_note("Fragile").unparsed == "Fragile"
+
+
+def test_groups_are_transitive_and_ignore_unknown_ids():
+    pkgs = _pkgs({1: "Must be delivered with 2", 3: "Must be delivered with 2, 99", 5: "Must be delivered with 6",
+                  6: "Must be delivered with 5"})
+    groups = assign_groups(pkgs)
+    assert groups == {1: [1, 2, 3], 5: [5, 6]}
+    assert [p.group_id for p in pkgs] == [1, 1, 1, None, 5, 5, None, None]
+
+
+def test_group_members_share_truck_mask_and_latest_arrival():
+    pkgs = _pkgs({1: "Must be delivered with 2, 3", 2: "Can only be on trucks 1 or 2",
+                  3: "Can only be on trucks 2 or 3. Delayed on flight until 9:05 am"})
+    assign_groups(pkgs)
+    for p in pkgs[:3]:
+        assert p.truck_mask == 1 << 2
+        assert p.available_time_min == 65
+    assert pkgs[3].truck_mask == 0 and pkgs[3].available_time_min is None
+
+
+def test_group_without_common_truck_is_rejected():
+    pkgs = _pkgs({1: "Must be delivered with 2. Can only be on truck 1", 2: "Can only be on truck 2"})
+    with pytest.raises(ValueError):
+        assign_groups(pkgs)
+
+
+def test_reassigning_clears_stale_groups():
+    pkgs = _pkgs({1: "Must be delivered with 2"})
+    assign_groups(pkgs)
+    pkgs[0].deliver_with = ()
+    assert assign_groups(pkgs) == {}
+    assert all(p.group_id is None for p in pkgs)
+
+
+def test_overrides_layer_on_note_constraints(day):
+    ht, packages = day
+    apply_constraints(packages, delayed=[15], only_truck2=[1])
+    p = {q.package_id: q for q in packages}
+    assert [p[i].available_time_min for i in (13, 14, 15, 16, 19, 20)] == [65] * 6   # the whole group waits
+    assert p[1].truck_restriction == 2 and p[2].truck_restriction is None
+    assert all(p[i].truck_restriction == 2 for i in (3, 18, 36, 38))                 # from the notes, kept
+    assert all(p[i].available_time_min == 65 for i in (6, 25, 28, 32))
+    assert p[9].address_fix_time_min == 140
+
+    apply_constraints(packages, addr_fix_min=150)                                    # a minute alone: config IDs
+    assert p[9].address_fix_time_min == 150 and p[15].available_time_min is None
+
+
+def test_groups_ride_together_in_the_plan(ds, day):
+    ht, packages = day
+    groups = {}
+    for p in packages:
+        if p.group_id is not None:
+            groups.setdefault(p.group_id, []).append(p.package_id)
+    assert groups                                    # the sample day has a deliver-together group
+    d = Dispatcher(ds, packages, hash_table=ht)
+    d.run()
+    for ids in groups.values():
+        assert len({d._trip_of[pid] for pid in ids}) == 1
+
+
+def test_restriction_to_a_high_truck_id(ds, day):
+    ht, packages = day
+    ht.lookup(3).special_notes = "Can only be on truck 100"
+    apply_note_constraints(packages)
+    assign_groups(packages)
+    d = Dispatcher(ds, packages, fleet=range(1, 201), drivers=50, hash_table=ht)
+    result = d.run()
+    assert result["delivered"] == len(packages)
+    assert ht.lookup(3).truck_id == 100
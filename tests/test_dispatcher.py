@@ -0,0 +1,61 @@
+import routing.planner as planner
+from routing.partition import partition_packages
+from routing.scheduler import Dispatcher
+
+
+def _plan(d):
+    return [(t["truck"], t["depart"], t["packages"]) for t in d.trips]
+
+
+def test_grasp_pool_matches_in_process(ds, day, monkeypatch):
+    ht, packages = day
+    local = Dispatcher(ds, packages, planner_mode="grasp")
+    local.run()
+    plan = _plan(local)
+    for p in packages:
+        p.status, p.delivery_min, p.truck_id, p.board_time_min = "at_hub", None, None, None
+
+    monkeypatch.setattr(planner, "GRASP_WORKERS", 2)
+    calls = []
+    real = planner.grasp_pool
+    monkeypatch.setattr("routing.scheduler.grasp_pool", lambda *a: calls.append(a) or real(*a))
+    pooled = Dispatcher(ds, packages, planner_mode="grasp")
+    pooled.run()
+    assert len(calls) == 1                         # one pool for the whole run
+    assert pooled._pool is None                    # ... shut down afterwards
+    assert _plan(pooled) == plan
+
+
+def _check_cluster_counts(d):
+    for c, pkgs in enumerate(d._clusters):
+        assert d._cluster_left[c] == sum(p.status == "at_hub" for p in pkgs)
+
+
+def test_partition_cluster_counts_stay_current(ds, day):
+    ht, packages = day
+    part = partition_packages(ds, packages)
+    d = Dispatcher(ds, packages, hash_table=ht, partition=part)
+    assert d.run()["delivered"] == len(packages)
+    assert d._cluster_left == [0] * len(part.clusters)
+
+
+def test_partition_cluster_counts_with_packages_left(ds, day):
+    ht, packages = day
+    d = Dispatcher(ds, packages, hash_table=ht, partition=partition_packages(ds, packages), max_miles=40)
+    result = d.run()
+    assert result["undelivered"]                   # the budget leaves some clusters open
+    _check_cluster_counts(d)
+    assert any(d._cluster_left)
+
+    pid = result["undelivered"][0]                 # a stranded package placed by apply_event
+    d.apply_event({"package_id": pid, "address_fix_time_min": 200}, 180)
+    _check_cluster_counts(d)
+
+
+def test_partition_cluster_counts_after_place(ds, day):
+    ht, packages = day
+    d = Dispatcher(ds, packages, hash_table=ht, partition=partition_packages(ds, packages), max_miles=40)
+    pid = d.run()["undelivered"][0]
+    out = d.apply_event({"package_id": pid, "deadline": "EOD"}, 0)   # fits into a planned trip
+    assert d._trip_of[pid] in out["trips"] and d._by_id[pid].status == "delivered"
+    _check_cluster_counts(d)
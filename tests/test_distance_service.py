@@ -0,0 +1,53 @@
+import os
+import pickle
+import shutil
+
+import pytest
+
+from config import DISTANCE_CSV
+from data.distance_service import DistanceService, np
+
+NUMPY = [False] + ([True] if np is not None else [])
+
+
+def _same_matrix(a, b):
+    n = len(a.addresses)
+    return b.addresses == a.addresses and \
+        all(a.distance_by_idx(i, j) == b.distance_by_idx(i, j) for i in range(n) for j in range(n))
+
+
+@pytest.mark.parametrize("use_numpy", NUMPY)
+def test_binary_round_trip(tmp_path, ds, use_numpy):
+    path = str(tmp_path / "d.dmx")
+    ds.export_binary(path)
+    loaded = DistanceService(use_numpy=use_numpy)
+    loaded.load_binary(path)
+    assert _same_matrix(ds, loaded)
+    for addr in ds.addresses:
+        assert loaded.index_of(addr) == ds.index_of(addr)
+
+
+def test_load_cached_miss_hit_and_touch(tmp_path, ds):
+    csv = tmp_path / "distance_table.csv"
+    shutil.copy(DISTANCE_CSV, csv)
+    assert DistanceService().load_cached(str(csv)) is False          # parsed, cache written
+    assert os.path.exists(tmp_path / "distance_table.dmx")
+    hit = DistanceService()
+    assert hit.load_cached(str(csv)) is True
+    assert _same_matrix(ds, hit)
+
+    os.utime(csv, ns=(0, 0))                                          # touched, same content
+    assert DistanceService().load_cached(str(csv)) is True
+
+    with open(csv, "a", encoding="utf-8") as f:                       # content changed
+        f.write("\n")
+    assert DistanceService().load_cached(str(csv)) is False
+
+
+def test_pickled_service_remaps_the_cache(tmp_path, ds):
+    path = str(tmp_path / "d.dmx")
+    ds.export_binary(path)
+    mapped = DistanceService()
+    mapped.load_binary(path)
+    copy = pickle.loads(pickle.dumps(mapped))
+    assert _same_matrix(ds, copy)
@@ -0,0 +1,128 @@
+import random
+
+import pytest
+
+from core.hash_table import HashTable, OpenAddressingHashTable
+from core.models import Package
+
+BACKENDS = (HashTable, OpenAddressingHashTable)
+
+
+def _pkg(pid, deadline="EOD"):
+    return Package(pid, f"{pid} Main St", deadline, "Salt Lake City", "84101", "1")
+
+
+@pytest.mark.parametrize("cls", BACKENDS)
+def test_insert_lookup_update(cls):
+    t = cls()
+    t.insert(1, "1 Main St", "EOD", "Salt Lake City", "84101", "2", location_idx=5)
+    t.insert(1, "1 Main St", "10:30 AM", "Salt Lake City", "84101", "3")
+    p = t.lookup(1)
+    assert len(t) == 1
+    assert (p.deadline_min, p.weight, p.location_idx) == (150, 3, 5)   # index kept: same address
+    t.insert(1, "2 Main St", "EOD", "Salt Lake City", "84101", "3")
+    assert t.lookup(1).location_idx is None                           # address changed: stale
+    assert t.lookup(2) is None
+
+
+@pytest.mark.parametrize("cls", BACKENDS)
+def test_remove_then_lookup_and_reinsert(cls):
+    t = cls(8)
+    t.bulk_insert([_pkg(i) for i in range(1, 201)])
+    removed = list(range(1, 201, 3))
+    for pid in removed:
+        assert t.remove(pid).package_id == pid
+        assert t.remove(pid) is None
+    kept = [i for i in range(1, 201) if i not in set(removed)]
+    assert len(t) == len(kept)
+    assert all(t.lookup(pid) is None for pid in removed)
+    assert [p.package_id for p in t.lookup_many(kept)] == kept      # probe runs survive the holes
+
+    t.bulk_insert([_pkg(pid) for pid in removed])
+    assert len(t) == 200
+    assert sorted(p.package_id for p in t) == list(range(1, 201))
+
+
+@pytest.mark.parametrize("cls", BACKENDS)
+def test_random_ops_match_a_dict(cls):
+    rng = random.Random(3)
+    t, ref = cls(8), {}
+    for _ in range(5000):
+        pid = rng.randrange(1, 400)
+        if rng.random() < 0.6:
+            p = _pkg(pid)
+            t.bulk_insert((p,))
+            ref[pid] = p
+        else:
+            assert t.remove(pid) is ref.pop(pid, None)
+        assert len(t) == len(ref)
+    assert all(t.lookup(pid) is p for pid, p in ref.items())
+    assert {p.package_id for p in t} == set(ref)
+
+
+@pytest.mark.parametrize("cls", BACKENDS)
+def test_grows_and_shrinks(cls):
+    t = cls(8)
+    t.bulk_insert([_pkg(i) for i in range(1, 1001)])
+    assert t.load_factor <= t.MAX_LOAD
+    for i in range(1, 991):
+        t.remove(i)
+    assert t.load_factor >= t.MIN_LOAD or t._capacity() == t.MIN_CAPACITY
+    assert [p.package_id for p in t.lookup_many(range(991, 1001))] == list(range(991, 1001))
+
+
+def _check_indexes(t):
+    pkgs = list(t)
+    for status in {p.status for p in pkgs} | {"at_hub", "delivered"}:
+        assert t.ids_with_status(status) == {p.package_id for p in pkgs if p.status == status}
+    for truck in {p.truck_id for p in pkgs} - {None}:
+        assert [p.package_id for p in t.packages_on_truck(truck)] == \
+            sorted(p.package_id for p in pkgs if p.truck_id == truck)
+    assert [p.package_id for p in t.by_deadline()] == \
+        [p.package_id for p in sorted(pkgs, key=lambda p: (p.deadline_min, p.package_id))]
+
+
+@pytest.mark.parametrize("cls", BACKENDS)
+def test_secondary_indexes_follow_changes(cls):
+    rng = random.Random(11)
+    deadlines = ["EOD", "9:00 AM", "10:30 AM", "12:00 PM"]
+    t = cls()
+    t.bulk_insert([_pkg(i, rng.choice(deadlines)) for i in range(1, 301)])
+    _check_indexes(t)
+
+    for p in list(t):
+        r = rng.random()
+        if r < 0.3:
+            p.status = "delivered"
+            p.truck_id = rng.randint(1, 3)
+        elif r < 0.5:
+            p.deadline = rng.choice(deadlines)
+        elif r < 0.6:
+            t.remove(p.package_id)
+    _check_indexes(t)
+
+    t.bulk_update([p.package_id for p in t if p.status == "at_hub"][:20], status="en_route", truck_id=2,
+                  delivery_mins=range(20))
+    _check_indexes(t)
+    assert t.count_with_status("en_route") == 20
+
+
+@pytest.mark.parametrize("cls", BACKENDS)
+def test_by_deadline_filters(cls):
+    t = cls()
+    t.bulk_insert([_pkg(1, "EOD"), _pkg(2, "10:30 AM"), _pkg(3, "9:00 AM"), _pkg(4, "10:30 AM")])
+    t.lookup(4).status = "delivered"
+    assert [p.package_id for p in t.by_deadline(due_by=150)] == [3, 2, 4]
+    assert [p.package_id for p in t.by_deadline("at_hub", due_by=150)] == [3, 2]
+    assert [p.package_id for p in t.by_deadline("delivered")] == [4]
+    t.remove(3)
+    assert [p.package_id for p in t.by_deadline()] == [2, 4, 1]
+
+
+def test_removed_package_no_longer_updates_indexes():
+    t = HashTable()
+    t.bulk_insert([_pkg(1)])
+    p = t.remove(1)
+    p.status = "delivered"
+    p.deadline = "9:00 AM"
+    assert t.count_with_status("delivered") == 0 and t.by_deadline() == []
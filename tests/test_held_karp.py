@@ -0,0 +1,73 @@
+import itertools
+import random
+
+import pytest
+
+from routing.planner import _evaluate, _exact_order, _held_karp
+
+SPEED = 18
+
+
+def _instance(ds, rng, n, deadlines):
+    locs = rng.sample(range(1, len(ds.addresses)), n)
+    dls = [rng.choice(deadlines) for _ in range(n)]
+    fixes = [rng.choice([None, None, None, 40]) for _ in range(n)]
+    return locs, dls, fixes
+
+
+def _brute(ds, hub, locs, dls, fixes, closed=False):
+    """(late, miles) of the best order over all permutations."""
+    best = None
+    for perm in itertools.permutations(range(len(locs))):
+        late, miles = _evaluate(ds, hub, locs, dls, fixes, list(perm), 0, SPEED)
+        if closed:
+            miles += ds.distance_by_idx(locs[perm[-1]], hub)
+        if best is None or (late, miles) < best:
+            best = (late, miles)
+    return best
+
+
+@pytest.mark.parametrize("n", range(2, 8))
+@pytest.mark.parametrize("closed", [False, True])
+def test_matches_brute_force_without_binding_deadlines(ds, hub, n, closed):
+    rng = random.Random(n)
+    for _ in range(4):
+        locs, dls, fixes = _instance(ds, rng, n, [10 ** 6])
+        order = _held_karp(ds, hub, locs, list(range(n)), dls, fixes, 0, SPEED, closed)
+        assert sorted(order) == list(range(n))
+        miles = _evaluate(ds, hub, locs, dls, fixes, order, 0, SPEED)[1]
+        if closed:
+            miles += ds.distance_by_idx(locs[order[-1]], hub)
+        assert miles == pytest.approx(_brute(ds, hub, locs, dls, fixes, closed)[1])
+
+
+@pytest.mark.parametrize("n", range(2, 8))
+def test_orders_found_under_deadlines_are_on_time(ds, hub, n):
+    rng = random.Random(100 + n)
+    found = 0
+    for _ in range(6):
+        locs, dls, fixes = _instance(ds, rng, n, [30, 60, 90, 540])
+        order = _held_karp(ds, hub, locs, list(range(n)), dls, fixes, 0, SPEED)
+        late, miles = _brute(ds, hub, locs, dls, fixes)
+        if order is None:
+            continue
+        found += 1
+        assert sorted(order) == list(range(n))
+        got = _evaluate(ds, hub, locs, dls, fixes, order, 0, SPEED)
+        assert got[0] == 0 == late
+        assert got[1] >= miles - 1e-9
+    assert found
+
+
+def test_exact_order_never_worse_than_the_input(ds, hub):
+    rng = random.Random(7)
+    for _ in range(40):
+        n = rng.randint(2, 8)
+        locs, dls, fixes = _instance(ds, rng, n, [60, 150, 540])
+        order = rng.sample(range(n), n)
+        out = _exact_order(ds, hub, locs, order, dls, fixes, 0, SPEED)
+        assert sorted(out) == sorted(order)
+
+        def key(o):
+            return _evaluate(ds, hub, locs, dls, fixes, o, 0, SPEED)
+        assert key(out) <= key(order)
@@ -0,0 +1,47 @@
+import random
+
+from routing.planner import _evaluate, _improve_order, _local_search
+
+
+def _path_miles(D, seq):
+    return sum(D[a][b] for a, b in zip(seq, seq[1:]))
+
+
+def _line_table(xs):
+    return [[abs(a - b) for b in xs] for a in xs]
+
+
+def test_untangles_points_on_a_line():
+    # HUB at 0, stops scattered along a line: the only optimal open path sweeps outward
+    xs = [0, 5, 1, 4, 2, 6, 3]
+    seq = _local_search(_line_table(xs))
+    assert seq[0] == 0
+    assert [xs[v] for v in seq] == sorted(xs)
+
+
+def test_result_is_a_permutation_and_never_longer():
+    rng = random.Random(5)
+    for n in (2, 3, 4, 8, 20):
+        pts = [(rng.random(), rng.random()) for _ in range(n)]
+        D = [[((a[0] - b[0]) ** 2 + (a[1] - b[1]) ** 2) ** 0.5 for b in pts] for a in pts]
+        seq = _local_search(D)
+        assert seq[0] == 0 and sorted(seq) == list(range(n))
+        assert _path_miles(D, seq) <= _path_miles(D, list(range(n))) + 1e-9
+
+
+def test_move_budget_is_respected():
+    xs = [0, 9, 1, 8, 2, 7, 3, 6, 4, 5]
+    assert _local_search(_line_table(xs), max_iters=0) == list(range(len(xs)))
+
+
+def test_improve_order_on_bundled_matrix(ds, hub):
+    rng = random.Random(7)
+    for _ in range(20):
+        locs = rng.sample(range(1, len(ds.addresses)), 12)
+        order = list(range(len(locs)))
+        out = _improve_order(ds, hub, locs, order)
+        assert sorted(out) == order
+
+        def miles(o):
+            return _evaluate(ds, hub, locs, [10 ** 6] * len(locs), [None] * len(locs), o, 0, 18)[1]
+        assert miles(out) <= miles(order) + 1e-9
@@ -0,0 +1,41 @@
+import pickle
+
+from core.metrics import Metrics
+from routing.scheduler import Dispatcher
+
+
+def test_dispatcher_records_counters_and_trip_scopes(ds, day):
+    ht, packages = day
+    m = Metrics()
+    result = Dispatcher(ds, packages, hash_table=ht, metrics=m).run()
+    assert result["metrics"] is m
+    assert m.counters["distance_lookups"] > 0
+    assert m.counters["dispatches"] == len(m.trips)
+    assert sum(s["trip"] is not None for s in m.trips) == len(result["trips"])
+    assert {"construct", "simulate"} <= set(m.timers)
+    assert "distance_by_idx" not in vars(ds)          # run() removes its instrumentation
+
+
+def test_instrumented_service_pickles_without_wrappers(tmp_path, ds):
+    path = str(tmp_path / "d.dmx")
+    ds.export_binary(path)
+    mapped = type(ds)()
+    mapped.load_binary(path)
+    m = Metrics()
+    assert m.instrument(mapped) and not m.instrument(mapped)
+    copy = pickle.loads(pickle.dumps(mapped))
+    assert "distance_by_idx" not in vars(copy)
+    assert copy.distance_by_idx(1, 2) == ds.distance_by_idx(1, 2)
+    mapped.distance_by_idx(1, 2)
+    assert m.counters["distance_lookups"] == 1        # the original keeps counting
+
+
+def test_resolve_timer_covers_every_resolver_caller(ds):
+    m = Metrics()
+    m.instrument(ds)
+    try:
+        ds.get_distance(ds.addresses[1], ds.addresses[2])     # resolves without going through index_of
+        assert "resolve" in m.timers
+    finally:
+        Metrics.uninstrument(ds)
+    assert "_find_address_index" not in vars(ds)
@@ -0,0 +1,69 @@
+import gzip
+import io
+
+import pytest
+
+from config import DISTANCE_CSV, PACKAGE_CSV
+from data.distance_service import DistanceService
+from data.package_loader import MissingHeaderError, iter_package_records
+from data.sources import open_text
+
+HEADER = '"Package\nID",Address,City,State,Zip,Delivery Deadline,Weight,Notes\n'
+
+
+def _records(text, on_error=None):
+    return list(iter_package_records(io.StringIO(text), on_error))
+
+
+def test_bundled_manifest_streams_every_package():
+    with open_text(str(PACKAGE_CSV)) as f:
+        recs = list(iter_package_records(f))
+    assert [r["package_id"] for r in recs] == list(range(1, 41))
+    assert all(r["address"] and r["deadline"] for r in recs)
+
+
+def test_rows_before_header_and_blank_rows_are_skipped():
+    text = "WGUPS manifest,,,,\n" + HEADER + \
+        "1,1 Main St,SLC,UT,84101,EOD,2,\n,,,,,,,\n2,2 Main St,SLC,UT,84101,10:30 AM,3,Delayed\n"
+    recs = _records(text)
+    assert [(r["package_id"], r["deadline"], r["special_notes"]) for r in recs] == \
+        [(1, "EOD", ""), (2, "10:30 AM", "Delayed")]
+
+
+def test_malformed_rows_report_their_first_line():
+    text = HEADER + \
+        "1,1 Main St,SLC,UT,84101,EOD,2,\n" \
+        "x,2 Main St,SLC,UT,84101,EOD,2,\n" \
+        '3,3 Main St,SLC,UT,84101,EOD,2,"two\nlines"\n' \
+        "4,4 Main St,SLC,UT,84101,25:99 PM,2,\n" \
+        "5,5 Main St,SLC\n"
+    errors = []
+    recs = _records(text, lambda line, msg: errors.append(line))
+    assert [r["package_id"] for r in recs] == [1, 3]
+    assert errors == [4, 7, 8]                 # the quoted two-line cell counts as two lines
+
+    with pytest.raises(ValueError, match="line 4"):
+        _records(text)
+
+
+def test_missing_header():
+    with pytest.raises(MissingHeaderError):
+        _records("1,1 Main St,SLC,UT,84101,EOD,2,\n")
+
+
+def test_gzip_sources_match_plain(tmp_path):
+    gz = tmp_path / "package_file.csv.gz"
+    gz.write_bytes(gzip.compress(PACKAGE_CSV.read_bytes()))
+    with open_text(str(PACKAGE_CSV)) as f:
+        plain = list(iter_package_records(f))
+    with open_text(str(gz)) as f:
+        assert list(iter_package_records(f)) == plain
+
+    dgz = tmp_path / "distance_table.csv.gz"
+    dgz.write_bytes(gzip.compress(DISTANCE_CSV.read_bytes()))
+    a, b = DistanceService(), DistanceService()
+    a.load_distance_data(str(DISTANCE_CSV))
+    b.load_distance_data(str(dgz))
+    n = len(a.addresses)
+    assert b.addresses == a.addresses
+    assert all(a.distance_by_idx(i, j) == b.distance_by_idx(i, j) for i in range(n) for j in range(n))
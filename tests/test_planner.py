@@ -0,0 +1,46 @@
+import pytest
+
+from config import TRUCK_CAPACITY
+from core.models import Package
+from routing.planner import _consolidate, plan_route_for_truck
+
+
+def test_consolidate_merges_colocated_packages():
+    locs = [7, 3, 7, 7, 3, 9]
+    dls = [540, 150, 60, 540, 540, 240]
+    fixes = [None, None, 130, None, None, None]
+    members, s_locs, s_dls, s_fixes, sizes, mates = _consolidate(locs, dls, fixes, None, capacity=2)
+    stops = {tuple(m): (l, d, f) for m, l, d, f in zip(members, s_locs, s_dls, s_fixes)}
+    # location 7 has three packages but a stop holds at most `capacity`: earliest deadlines first
+    assert stops == {(2, 0): (7, 60, 130), (3,): (7, 540, None), (1, 4): (3, 150, None), (5,): (9, 240, None)}
+    assert sizes == [len(m) for m in members] and mates is None
+
+
+def test_consolidate_keeps_grouped_packages_single():
+    locs, dls, fixes = [4, 4, 4], [540, 540, 540], [None] * 3
+    mates = [(1,), (0,), ()]
+    members, _, _, _, _, s_mates = _consolidate(locs, dls, fixes, mates, capacity=16)
+    assert sorted(map(sorted, members)) == [[0], [1], [2]]
+    stop = {m[0]: s for s, m in enumerate(members)}
+    assert s_mates[stop[0]] == (stop[1],) and s_mates[stop[2]] == ()
+
+
+@pytest.mark.parametrize("mode", ["greedy", "insertion", "grasp"])
+def test_planned_trip_visits_each_location_once(ds, day, mode):
+    _, packages = day
+    trip = plan_route_for_truck(ds, packages, truck_id=1, depart_time_min=0, mode=mode)
+    ids = [p.package_id for p in trip]
+    assert 0 < len(trip) <= TRUCK_CAPACITY and len(ids) == len(set(ids))
+    assert all(p.status == "at_hub" and p.allows_truck(1) and (p.available_time_min or 0) <= 0 for p in trip)
+    locs = [ds.package_index(p) for p in trip]
+    runs = [l for k, l in enumerate(locs) if k == 0 or l != locs[k - 1]]
+    assert len(runs) == len(set(runs))               # co-located packages are delivered back to back
+
+
+def test_stop_larger_than_capacity_is_split(ds):
+    addr = ds.addresses[5]
+    pkgs = [Package(i, addr, "EOD", "Salt Lake City", "84101", "1") for i in range(1, 6)]
+    for p in pkgs:
+        ds.package_index(p)
+    trip = plan_route_for_truck(ds, pkgs, truck_id=1, depart_time_min=0, capacity=3)
+    assert [p.package_id for p in trip] == [1, 2, 3]
@@ -0,0 +1,15 @@
+from routing.scenarios import format_comparison, run_scenarios
+
+
+def test_undelivered_packages_are_reported(ds, day):
+    _, packages = day
+    rows = run_scenarios(ds, packages, [
+        {"name": "base"},
+        {"name": "no truck 2", "FLEET": [1, 3], "ONLY_TRUCK2": [3, 18, 36, 38]},
+    ], workers=1)
+    base, no2 = rows
+    assert (base["undelivered"], base["delivered"]) == (0, 40)
+    assert no2["undelivered"] == 4 and no2["delivered"] == 36
+    assert no2["late"] == 0                       # counted in "undelivered", not in "late"
+    assert "Undel" in format_comparison(rows).splitlines()[0]
+    assert all(p.status == "at_hub" for p in packages)   # the caller's packages are untouched
@@ -0,0 +1,86 @@
+import random
+
+import pytest
+
+from config import DISTANCE_CSV, SPEED_MPH
+from core.hash_table import HashTable
+from core.models import Package
+from data.distance_service import DistanceService, np
+from routing.simulate import simulate_batch, simulate_indices, simulate_route
+
+
+@pytest.fixture(scope="module", params=[False] + ([True] if np is not None else []), ids=["lists", "numpy"])
+def service(request):
+    s = DistanceService(use_numpy=request.param)
+    s.load_distance_data(str(DISTANCE_CSV))
+    return s
+
+
+def _loop(ds, hub, locs, depart, fixes):
+    """Reference: the per-package walk (wait for the fix, drive the rounded leg minutes)."""
+    t, cur, miles, arrivals = depart, hub, 0.0, []
+    for loc, f in zip(locs, fixes):
+        if f is not None and t < f:
+            t = f
+        d = ds.distance_by_idx(cur, loc)
+        t += int(round(60.0 * d / SPEED_MPH))
+        miles += d
+        arrivals.append(t)
+        cur = loc
+    return miles, arrivals
+
+
+def _routes(ds, rng, count):
+    n = len(ds.addresses)
+    routes = [[rng.randrange(n) for _ in range(rng.randint(0, 12))] for _ in range(count)]
+    fixes = [[rng.choice([None, None, rng.randint(0, 180)]) for _ in r] for r in routes]
+    return routes, fixes
+
+
+def test_simulate_indices_matches_the_loop(service, hub):
+    rng = random.Random(0)
+    routes, fixes = _routes(service, rng, 300)
+    for r, f in zip(routes, fixes):
+        depart = rng.randint(0, 120)
+        miles, arrivals, legs = simulate_indices(service, r, depart, fixes=f)
+        ref_miles, ref_arrivals = _loop(service, hub, r, depart, f)
+        assert arrivals == ref_arrivals
+        assert miles == pytest.approx(ref_miles)
+        assert len(legs) == len(r)
+
+
+def test_simulate_batch_matches_single_routes(service):
+    rng = random.Random(1)
+    routes, fixes = _routes(service, rng, 200)
+    for f in (None, fixes):
+        miles, last = simulate_batch(service, routes, 30, fixes=f)
+        for k, r in enumerate(routes):
+            m, arrivals, _ = simulate_indices(service, r, 30, fixes=None if f is None else f[k])
+            assert miles[k] == pytest.approx(m)
+            assert last[k] == (arrivals[-1] if arrivals else 30)
+
+
+def test_simulate_route_bulk_write_back(service):
+    addrs = service.addresses[1:]
+    rng = random.Random(2)
+
+    def pkgs():
+        out = [Package(i, addrs[(i * 7) % len(addrs)], "EOD", "Salt Lake City", "84101", "1") for i in range(1, 13)]
+        for p in out:
+            service.package_index(p)
+        out[3].address_fix_time_min = 140
+        return out
+
+    plain = pkgs()
+    rng.shuffle(plain)
+    order = [p.package_id for p in plain]
+    ht = HashTable()
+    ht.bulk_insert(pkgs())
+    stored = ht.lookup_many(order)
+
+    a = simulate_route(service, plain, 20, truck_id=3)
+    b = simulate_route(service, stored, 20, truck_id=3, hash_table=ht)
+    assert a == b
+    assert [p.delivery_min for p in stored] == [p.delivery_min for p in plain]
+    assert ht.count_with_status("delivered") == 12
+    assert [p.package_id for p in ht.packages_on_truck(3)] == list(range(1, 13))
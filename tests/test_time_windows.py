@@ -0,0 +1,94 @@
+import random
+
+from routing.planner import _construct_insertion, _evaluate, _improve_order, _TimeWindows
+
+
+def _instance(rng, n):
+    """Random travel minutes over nodes 0..n (0 = HUB) and a route that is on time with some slack."""
+    T = [[0 if a == b else rng.randint(1, 30) for b in range(n + 1)] for a in range(n + 1)]
+    fixes = [None] + [rng.choice([None, None, None, rng.randint(0, 120)]) for _ in range(n)]
+    seq = [0] + rng.sample(range(1, n + 1), n)
+    tw = _TimeWindows(lambda a, b: T[a][b], [float("inf")] * (n + 1), fixes, 0)
+    tw.reset(seq)
+    dls = [float("inf")] * (n + 1)
+    for k in range(1, n + 1):
+        dls[seq[k]] = tw.t[k] + rng.randint(0, 25)
+    return T, dls, fixes, seq
+
+
+def _arrivals(T, fixes, seq, depart=0):
+    t, out = depart, [depart]
+    for a, b in zip(seq, seq[1:]):
+        if fixes[b] is not None and t < fixes[b]:
+            t = fixes[b]
+        t += T[a][b]
+        out.append(t)
+    return out
+
+
+def _late(T, dls, fixes, seq):
+    return sum(t > dls[v] for t, v in zip(_arrivals(T, fixes, seq)[1:], seq[1:]))
+
+
+def test_reset_times_match_a_plain_walk():
+    rng = random.Random(1)
+    for _ in range(200):
+        T, dls, fixes, seq = _instance(rng, 8)
+        tw = _TimeWindows(lambda a, b: T[a][b], dls, fixes, 0)
+        tw.reset(seq)
+        assert tw.t == _arrivals(T, fixes, seq)
+        assert tw.late == 0
+
+
+def test_insertion_slack_check_matches_brute_force():
+    rng = random.Random(2)
+    for _ in range(300):
+        T, dls, fixes, seq = _instance(rng, 7)
+        x = seq.pop(rng.randrange(1, len(seq)))       # a node not on the route
+        tw = _TimeWindows(lambda a, b: T[a][b], dls, fixes, 0)
+        tw.reset(seq)
+        if tw.late:
+            continue
+        for k in range(len(seq)):
+            new = seq[:k + 1] + [x] + seq[k + 1:]
+            times = _arrivals(T, fixes, new)
+            tx, ok = tw.insertion(seq, k, x)
+            assert tx == times[k + 1]
+            downstream_ok = all(times[i] <= dls[new[i]] for i in range(k + 2, len(new)))
+            assert ok == downstream_ok
+
+
+def test_accepts_matches_brute_force():
+    rng = random.Random(3)
+    for _ in range(300):
+        T, dls, fixes, seq = _instance(rng, 8)
+        if rng.random() < 0.3:                         # some routes start with late stops
+            dls[seq[-1]] = -1
+        tw = _TimeWindows(lambda a, b: T[a][b], dls, fixes, 0)
+        tw.reset(seq)
+        i, j = sorted(rng.sample(range(1, len(seq)), 2))
+        new = seq[:i] + seq[i:j + 1][::-1] + seq[j + 1:]
+        assert tw.accepts(seq, new) == (_late(T, dls, fixes, new) <= _late(T, dls, fixes, seq))
+
+
+def test_guarded_local_search_adds_no_late_delivery(ds, hub):
+    rng = random.Random(4)
+    for _ in range(30):
+        n = 14
+        locs = rng.sample(range(1, len(ds.addresses)), n)
+        dls = [rng.choice([60, 150, 240, 540]) for _ in range(n)]
+        fixes = [rng.choice([None, None, 60]) for _ in range(n)]
+        order = _construct_insertion(ds, hub, locs, dls, fixes, 0, n, 18)
+        assert sorted(order) == list(range(n))
+        late0, _ = _evaluate(ds, hub, locs, dls, fixes, order, 0, 18)
+        out = _improve_order(ds, hub, locs, order, windows=(dls, fixes, 0, 18))
+        assert sorted(out) == list(range(n))
+        assert _evaluate(ds, hub, locs, dls, fixes, out, 0, 18)[0] <= late0
+
+
+def test_group_mate_insertion_keeps_routed_stops_on_time(ds, hub):
+    locs, dls, fixes = [19, 2, 24, 23], [540, 60, 60, 60], [None] * 4
+    mates = [[1], [0], [], []]                     # 0 and 1 are delivered together
+    order = _construct_insertion(ds, hub, locs, dls, fixes, 0, 4, 18, mates=mates)
+    assert sorted(order) == [0, 1, 2, 3]
+    assert _evaluate(ds, hub, locs, dls, fixes, order, 0, 18)[0] == 0
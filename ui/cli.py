@@ -21,11 +21,23 @@ class UserInterface:
             print("============================================================")
             choice = input("Enter your choice (1-6): ").strip()
 
-            if choice == "5":
+            if choice == "3":
+                raw = input("Enter truck number: ").strip()
+                try:
+                    truck = int(raw)
+                except ValueError:
+                    print(f"Invalid truck number: {raw!r}")
+                    continue
+                pkgs = self.ht.packages_on_truck(truck)
+                if not pkgs:
+                    print(f"No packages on Truck {truck}.")
+                for p in pkgs:
+                    print(f"Pkg {p.package_id:2d}: {p.status:<9} {p.delivery_time or '--:--':>5} | {p.address}")
+            elif choice == "5":
                 when = input("Enter time (e.g., 08:55, 10:05, 12:45): ").strip()
                 status_at(when, self.ht, self.result)
             elif choice == "6":
                 break
             else:
 
-                print("Feature not shown in this refactor snippet. (Use 5 or 6.)")
+                print("Feature not shown in this refactor snippet. (Use 3, 5 or 6.)")